@@ -0,0 +1,58 @@
+# Tiempo de arranque de un worker: crear la aplicación (crear_app) en un proceso nuevo,
+# comparado con el tiempo de importar pandas, matplotlib, openpyxl y reportlab, que antes
+# se cargaban al iniciar y ahora solo en las rutas que los usan.
+#
+# Uso:  python benchmarks/arranque.py [repeticiones]
+#
+# Cada medición se hace en un proceso nuevo para no aprovechar los módulos ya importados.
+# La aplicación se crea sobre una base SQLite temporal, ya migrada en una primera ejecución.
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CREAR_APP = '''
+import sys, time
+inicio = time.perf_counter()
+from inventario import crear_app
+crear_app({'BASE_DATOS': sys.argv[1]})
+print(time.perf_counter() - inicio)
+'''
+
+# Lo que importaba app.py al iniciar antes de cargar estas librerías solo en sus rutas
+IMPORTACIONES_PESADAS = '''
+import time
+inicio = time.perf_counter()
+import pandas
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from openpyxl import Workbook, load_workbook
+from reportlab.platypus import SimpleDocTemplate, Table
+print(time.perf_counter() - inicio)
+'''
+
+def medir(codigo, repeticiones, *argumentos):
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', codigo, *argumentos], cwd=RAIZ,
+                                capture_output=True, text=True, check=True)
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]))
+    return tiempos
+
+def mostrar(nombre, tiempos):
+    print(f'{nombre:<25} {statistics.median(tiempos):8.3f} s {min(tiempos):8.3f} s {max(tiempos):8.3f} s')
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as carpeta:
+        base_datos = os.path.join(carpeta, 'inventario.db')
+        # Primera ejecución: crea y migra la base para que las siguientes midan solo el arranque
+        medir(CREAR_APP, 1, base_datos)
+
+        print(f'{repeticiones} repeticiones')
+        print(f'{"medición":<25} {"mediana":>10} {"mínimo":>10} {"máximo":>10}')
+        mostrar('crear_app', medir(CREAR_APP, repeticiones, base_datos))
+        mostrar('importaciones pesadas', medir(IMPORTACIONES_PESADAS, repeticiones))
@@ -0,0 +1,88 @@
+# Comparación de la página de canastas perdidas: DataFrame de pandas con pd.to_datetime y
+# .dt.days contra los días calculados en SQL (julianday) y las filas leídas como
+# diccionarios desde el cursor (exportaciones.iterar_diccionarios), como hace la ruta.
+#
+# Uso:  python benchmarks/canastas_perdidas.py [filas] [repeticiones]
+#
+# Crea las tablas de canastas vencidas y vendedores en una base SQLite en memoria y mide,
+# para cada método, la mediana del tiempo y la memoria máxima reservada por Python
+# (tracemalloc). La importación de pandas se mide aparte porque la ruta anterior la pagaba
+# en el arranque de cada worker.
+import os
+import statistics
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inventario.exportaciones import iterar_diccionarios
+from inventario.vencimientos import CONSULTA_VENCIDAS
+
+def crear_base(filas):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE vendedores (codigo TEXT PRIMARY KEY, nombre TEXT)')
+    conn.execute('''
+        CREATE TABLE canastas_vencidas (
+            codigo_barras TEXT PRIMARY KEY, vendedor_codigo TEXT,
+            fecha_prestamo TEXT, fecha_vencimiento TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO vendedores VALUES (?, ?)', ((f'V{i}', f'Vendedor {i}') for i in range(50)))
+    inicio = datetime(2025, 1, 1, 8, 0, 0)
+    conn.executemany('INSERT INTO canastas_vencidas VALUES (?, ?, ?, ?)', (
+        (f'CANASTA#{i:06d}', f'V{i % 50}',
+         str(inicio + timedelta(minutes=i, microseconds=i)),
+         str(inicio + timedelta(days=7, minutes=i)))
+        for i in range(filas)
+    ))
+    conn.commit()
+    return conn
+
+# Ruta anterior: DataFrame completo y conversión de fechas con pandas
+def con_pandas(conn, ahora):
+    import pandas as pd
+
+    df = pd.read_sql_query(CONSULTA_VENCIDAS, conn, params=(ahora.strftime('%Y-%m-%d %H:%M:%S'),))
+    df['fecha_prestamo'] = pd.to_datetime(df['fecha_prestamo'], format='mixed')
+    df['dias_prestada'] = (ahora - df['fecha_prestamo']).dt.days
+    return df.to_dict(orient='records')
+
+# Ruta actual: días calculados en la consulta y filas como diccionarios desde el cursor
+def con_sql(conn, ahora):
+    cursor = conn.execute(CONSULTA_VENCIDAS, (ahora.strftime('%Y-%m-%d %H:%M:%S'),))
+    return list(iterar_diccionarios(cursor))
+
+def medir(nombre, funcion, conn, ahora, repeticiones):
+    funcion(conn, ahora)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(conn, ahora)
+        tiempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    filas = funcion(conn, ahora)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{nombre:<20} {statistics.median(tiempos) * 1000:10.1f} ms {pico / 1024 / 1024:10.1f} MB')
+    return filas
+
+if __name__ == '__main__':
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    conn = crear_base(filas)
+    ahora = datetime.now().replace(microsecond=0)
+
+    inicio = time.perf_counter()
+    import pandas
+    print(f'importar pandas: {(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+    print(f'{filas} filas, {repeticiones} repeticiones')
+    print(f'{"método":<20} {"mediana":>13} {"memoria":>13}')
+    filas_pandas = medir('pandas', con_pandas, conn, ahora, repeticiones)
+    filas_sql = medir('sql + diccionarios', con_sql, conn, ahora, repeticiones)
+
+    # Los dos métodos deben dar los mismos días prestada
+    assert [fila['dias_prestada'] for fila in filas_pandas] == [fila['dias_prestada'] for fila in filas_sql]
@@ -0,0 +1,66 @@
+# Comparación de la exportación a Excel: DataFrame de pandas contra el libro de solo
+# escritura de openpyxl que usan las rutas (exportaciones.generar_excel).
+#
+# Uso:  python benchmarks/exportar_excel.py [filas]
+#
+# Crea una tabla de canastas en una base SQLite en memoria y mide, para cada método,
+# el tiempo total y la memoria máxima reservada por Python (tracemalloc).
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inventario.exportaciones import generar_excel
+
+ENCABEZADO = ["Código de Barras", "Tamaño", "Color", "Estado", "Fecha de Registro", "Actualidad"]
+CONSULTA = 'SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad FROM canastas'
+
+def crear_base(filas):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE canastas (
+            codigo_barras TEXT PRIMARY KEY, tamano TEXT, color TEXT,
+            estado TEXT, fecha_registro TEXT, actualidad TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO canastas VALUES (?, ?, ?, ?, ?, ?)', (
+        (f'CANASTA#{i:06d}', 'Estandar', 'Amarillo', 'Nuevo', '2025-01-01 08:00:00',
+         'Prestada' if i % 3 else 'Disponible')
+        for i in range(filas)
+    ))
+    conn.commit()
+    return conn
+
+# Ruta anterior: todas las filas en un DataFrame y luego al libro
+def exportar_pandas(conn, archivo):
+    df = pd.DataFrame(conn.execute(CONSULTA).fetchall(), columns=ENCABEZADO)
+    with pd.ExcelWriter(archivo, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Canastas')
+
+# Ruta actual: filas desde el cursor al libro de solo escritura
+def exportar_solo_escritura(conn, archivo):
+    generar_excel(archivo, 'Canastas', ENCABEZADO, conn.execute(CONSULTA))
+
+def medir(nombre, funcion, conn):
+    with tempfile.TemporaryFile() as archivo:
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        funcion(conn, archivo)
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tamano = archivo.tell()
+    print(f'{nombre:<20} {segundos:8.2f} s {pico / 1024 / 1024:10.1f} MB {tamano / 1024 / 1024:10.1f} MB')
+
+if __name__ == '__main__':
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    conn = crear_base(filas)
+    print(f'{filas} filas')
+    print(f'{"método":<20} {"tiempo":>10} {"memoria":>13} {"archivo":>13}')
+    medir('pandas', exportar_pandas, conn)
+    medir('solo escritura', exportar_solo_escritura, conn)
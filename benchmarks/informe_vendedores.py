@@ -0,0 +1,97 @@
+# Comparación del informe de movimientos por vendedor de un rango de días: agrupar los
+# movimientos con BETWEEN sobre las fechas contra sumar el resumen diario (resumen_diario),
+# como hace la ruta.
+#
+# Uso:  python benchmarks/informe_vendedores.py [movimientos] [repeticiones]
+#
+# Crea canastas, vendedores y un año de movimientos en una base SQLite en memoria, arma el
+# resumen diario con la misma función que la migración y mide la mediana del tiempo de cada
+# método para un día, un mes y el año completo.
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inventario.esquema import crear_resumen_diario
+from inventario.resumen import subconsulta_movimientos_dias
+
+def crear_base(movimientos):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE vendedores (codigo TEXT PRIMARY KEY, nombre TEXT)')
+    conn.execute('CREATE TABLE canastas (codigo_barras TEXT PRIMARY KEY, tamano TEXT, color TEXT)')
+    conn.execute('''
+        CREATE TABLE movimientos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, vendedor_codigo TEXT,
+            tipo TEXT, codigo_barras TEXT, fecha TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_movimientos_fecha ON movimientos (fecha)')
+    conn.executemany('INSERT INTO vendedores VALUES (?, ?)', ((f'V{i}', f'Vendedor {i}') for i in range(50)))
+    conn.executemany('INSERT INTO canastas VALUES (?, ?, ?)', (
+        (f'CANASTA#{i:05d}', ('Estandar', 'Grande')[i % 2], ('Rojo', 'Azul', 'Amarillo')[i % 3])
+        for i in range(5000)
+    ))
+    aleatorio = random.Random(1)
+    inicio = datetime(2024, 1, 1, 6, 0, 0)
+    segundos = 365 * 24 * 3600
+    conn.executemany('INSERT INTO movimientos (vendedor_codigo, tipo, codigo_barras, fecha) VALUES (?, ?, ?, ?)', (
+        (f'V{aleatorio.randrange(50)}', aleatorio.choice(('Sale', 'Entra')), f'CANASTA#{aleatorio.randrange(5000):05d}',
+         str(inicio + timedelta(seconds=aleatorio.randrange(segundos), microseconds=1)))
+        for _ in range(movimientos)
+    ))
+    crear_resumen_diario(conn.cursor())
+    conn.commit()
+    return conn
+
+# Ruta anterior: agrupar los movimientos del rango
+def desde_movimientos(conn, fecha_inicio, fecha_fin):
+    return conn.execute('''
+        SELECT v.nombre,
+               SUM(CASE WHEN m.tipo = 'Sale' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN m.tipo = 'Entra' THEN 1 ELSE 0 END)
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.fecha BETWEEN ? AND ?
+        GROUP BY v.nombre
+    ''', (f'{fecha_inicio} 00:00:00', f'{fecha_fin} 23:59:59')).fetchall()
+
+# Ruta actual: días cerrados desde el resumen diario (todo el año de prueba ya pasó)
+def desde_resumen(conn, fecha_inicio, fecha_fin):
+    movimientos_dias, parametros = subconsulta_movimientos_dias(fecha_inicio, fecha_fin, '2025-01-01')
+    return conn.execute(f'''
+        SELECT v.nombre,
+               SUM(CASE WHEN r.tipo = 'Sale' THEN r.cantidad ELSE 0 END),
+               SUM(CASE WHEN r.tipo = 'Entra' THEN r.cantidad ELSE 0 END)
+        FROM ({movimientos_dias}) r
+        JOIN vendedores v ON r.vendedor_codigo = v.codigo
+        GROUP BY v.nombre
+    ''', parametros).fetchall()
+
+def medir(funcion, conn, fecha_inicio, fecha_fin, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = funcion(conn, fecha_inicio, fecha_fin)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, filas
+
+if __name__ == '__main__':
+    movimientos = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    conn = crear_base(movimientos)
+    filas_resumen = conn.execute('SELECT COUNT(*) FROM resumen_diario').fetchone()[0]
+
+    print(f'{movimientos} movimientos, {filas_resumen} filas en el resumen diario, {repeticiones} repeticiones')
+    print(f'{"rango":<10} {"movimientos":>14} {"resumen":>12}')
+    for nombre, fecha_inicio, fecha_fin in (('día', '2024-06-15', '2024-06-15'),
+                                            ('mes', '2024-06-01', '2024-06-30'),
+                                            ('año', '2024-01-01', '2024-12-31')):
+        tiempo_movimientos, filas_movimientos = medir(desde_movimientos, conn, fecha_inicio, fecha_fin, repeticiones)
+        tiempo_resumen, filas_resumen = medir(desde_resumen, conn, fecha_inicio, fecha_fin, repeticiones)
+        # Los dos métodos deben dar los mismos totales
+        assert filas_movimientos == filas_resumen
+        print(f'{nombre:<10} {tiempo_movimientos:11.1f} ms {tiempo_resumen:9.1f} ms')
@@ -0,0 +1,83 @@
+# Tiempo de reconstrucción del estado de las canastas y los vendedores (reproducir_movimientos):
+# desde todo el historial y desde una instantánea con los movimientos posteriores.
+#
+# Uso:  python benchmarks/reproducir_movimientos.py [movimientos] [canastas]
+#
+# Crea una base SQLite en memoria con las migraciones de la aplicación y agrega préstamos y
+# devoluciones alternados sin actualizar el estado, que calcula la reconstrucción. Mide cada
+# reconstrucción y cuántas canastas y vendedores corrigió; antes de la última se dañan a mano
+# algunas canastas y contadores.
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inventario.esquema import migrar
+from inventario.instantaneas import MANUAL, reproducir_movimientos, tomar_instantanea
+
+def crear_base(canastas):
+    conn = sqlite3.connect(':memory:')
+    migrar(conn)
+    conn.executemany('INSERT INTO vendedores (codigo, nombre) VALUES (?, ?)',
+                     ((f'V{i}', f'Vendedor {i}') for i in range(50)))
+    conn.executemany('''
+        INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+        VALUES (?, 'Estandar', 'Rojo', 'Nuevo', '2024-01-01 00:00:00', 'Disponible')
+    ''', ((f'CANASTA#{i:05d}',) for i in range(canastas)))
+    conn.commit()
+    return conn
+
+# Préstamos y devoluciones: cada canasta alterna salidas y entradas del mismo vendedor
+def generar_movimientos(movimientos, canastas):
+    aleatorio = random.Random(1)
+    prestadas = {}
+    fecha = datetime(2024, 1, 1, 6, 0, 0)
+    filas = []
+    for _ in range(movimientos):
+        codigo = f'CANASTA#{aleatorio.randrange(canastas):05d}'
+        fecha += timedelta(seconds=30)
+        if codigo in prestadas:
+            filas.append((prestadas.pop(codigo), 'Entra', codigo, str(fecha)))
+        else:
+            prestadas[codigo] = f'V{aleatorio.randrange(50)}'
+            filas.append((prestadas[codigo], 'Sale', codigo, str(fecha)))
+    return filas
+
+def agregar_movimientos(conn, filas):
+    conn.executemany('INSERT INTO movimientos (vendedor_codigo, tipo, codigo_barras, fecha) VALUES (?, ?, ?, ?)', filas)
+    conn.commit()
+
+def medir(nombre, conn, instantanea):
+    cursor = conn.cursor()
+    inicio = time.perf_counter()
+    _, reproducidos, canastas, vendedores = reproducir_movimientos(cursor, instantanea)
+    conn.commit()
+    print(f'{nombre:<22} {reproducidos:>12} {time.perf_counter() - inicio:9.2f} s {canastas:>10} {vendedores:>11}')
+
+if __name__ == '__main__':
+    movimientos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    canastas = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    conn = crear_base(canastas)
+    filas = generar_movimientos(movimientos, canastas)
+    corte = len(filas) * 9 // 10
+
+    print(f'{movimientos} movimientos, {canastas} canastas')
+    print(f'{"reconstrucción":<22} {"movimientos":>12} {"tiempo":>11} {"canastas":>10} {"vendedores":>11}')
+
+    # El 90 % del historial se agrega directamente, sin estado: la reconstrucción lo calcula todo
+    agregar_movimientos(conn, filas[:corte])
+    medir('todo el historial', conn, (None, 0))
+
+    # Instantánea del estado y el 10 % restante del historial, que se reproduce desde ella
+    instantanea = tomar_instantanea(conn.cursor(), MANUAL)
+    agregar_movimientos(conn, filas[corte:])
+    medir('desde la instantánea', conn, instantanea)
+
+    # Incidente: canastas y contadores dañados a mano
+    conn.execute("UPDATE canastas SET actualidad = 'Disponible', vendedor_actual = NULL WHERE rowid % 100 = 0")
+    conn.execute('UPDATE resumen_vendedores SET prestadas_activas = prestadas_activas + 1')
+    conn.commit()
+    medir('tras dañar el estado', conn, instantanea)
@@ -0,0 +1,67 @@
+# Configuración de gunicorn para servir la aplicación en producción:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Modelo de concurrencia con SQLite
+# ---------------------------------
+# - Cada worker es un proceso con su propio pool de conexiones; los hilos de un worker
+#   atienden peticiones en paralelo y cada petición usa una conexión del pool.
+# - La base de datos está en modo WAL: las lecturas (tablero, informes) no se bloquean entre
+#   sí ni con las escrituras, pero solo hay un escritor a la vez. Los demás esperan hasta
+#   SQLITE_BUSY_TIMEOUT_MS en lugar de fallar, así que los escaneos de las estaciones se
+#   atienden en orden aunque lleguen a la vez.
+# - Las escrituras son transacciones cortas (un lote de movimientos), por eso conviene pocos
+#   procesos y varios hilos: más workers no aumentan el número de escritores simultáneos.
+# - Los informes pesados se generan en el ejecutor de trabajos de cada worker (TRABAJOS_HILOS),
+#   fuera de los hilos que atienden peticiones.
+# - Cada pantalla suscrita a /eventos (tablero y movimientos en tiempo real) ocupa un hilo
+#   mientras está conectada; cada worker atiende como mucho EVENTOS_MAXIMO_PANTALLAS (por
+#   defecto la mitad de GUNICORN_HILOS) y a las demás les pide reconectarse más tarde, así
+#   siempre quedan hilos libres para las peticiones normales.
+# - Todo lo que se comparte entre workers está en la base de datos (versión del tablero,
+#   vencidas, trabajos, métricas); lo que se guarda en memoria es solo caché de cada proceso.
+# - La base de datos debe estar en un disco local: WAL no funciona sobre sistemas de archivos en red.
+#
+# Actualizar el código sin cortar el servicio
+# -------------------------------------------
+# Con preload_app la aplicación se carga en el maestro y los workers son copias suyas, así que
+# `kill -HUP <pid del maestro>` reemplaza los workers pero con el código ya cargado: sirve para
+# cambios de esta configuración, no para desplegar código nuevo. Para eso:
+#
+#     kill -USR2 <pid del maestro>    # arranca un maestro nuevo con el código nuevo (y aplica las migraciones)
+#     kill -WINCH <pid del maestro>   # cuando el nuevo atiende bien, el viejo cierra sus workers
+#     kill -QUIT <pid del maestro>    # y termina; los workers terminan antes las peticiones en curso
+#
+# El pid del maestro viejo queda en <pidfile>.oldbin mientras conviven los dos. Si algo falla,
+# basta con `kill -HUP` al viejo y `kill -QUIT` al nuevo. Reiniciar el servicio completo también
+# carga el código nuevo, pero corta las conexiones abiertas (las pantallas de /eventos se
+# reconectan solas).
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Pocos procesos y varios hilos por proceso (ver arriba)
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_HILOS', '8'))
+
+# Cargar la aplicación (y aplicar las migraciones) una vez en el maestro antes de crear los
+# workers; por eso el código nuevo se despliega con USR2 y no con HUP (ver arriba)
+preload_app = True
+
+# Archivo con el pid del maestro, para enviarle las señales
+pidfile = os.getenv('GUNICORN_PIDFILE', 'gunicorn.pid')
+
+# Los informes grandes se generan en segundo plano, pero el historial y los PDF por canasta
+# siguen siendo síncronos
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Reemplazar cada worker tras un número de peticiones para acotar el crecimiento de memoria
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,125 @@
+# Aplicación de inventario de canastas.
+#
+# crear_app() arma la aplicación: configuración, base de datos, blueprints y comandos.
+# pandas, matplotlib, openpyxl y reportlab no se importan aquí: cada ruta que los usa los
+# importa al atender su primera petición, así iniciar un worker no paga su tiempo de carga.
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from .canastas import bp as canastas_bp
+from .comandos import COMANDOS
+from .db import iniciar_base_datos
+from .eventos import DifusorEventos, bp as eventos_bp
+from .informes import bp as informes_bp
+from .metricas import bp as metricas_bp, iniciar_metricas
+from .movimientos import bp as movimientos_bp
+from .tablero import bp as tablero_bp
+from .usuarios import bp as usuarios_bp
+from .vendedores import bp as vendedores_bp
+
+# Carpeta raíz del proyecto (plantillas, archivos estáticos y base de datos)
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def crear_app(config=None):
+    app = Flask(__name__,
+                template_folder=os.path.join(RAIZ_PROYECTO, 'Templates'),
+                static_folder=os.path.join(RAIZ_PROYECTO, 'static'),
+                instance_path=os.path.join(RAIZ_PROYECTO, 'instance'))
+    app.secret_key = 'secret_key'  # Para manejar las alertas (flashes)
+
+    # Obtener la ruta de la base de datos desde una variable de entorno
+    #db_path = os.getenv("DATABASE_URL", "'/home/JohnRave/Inventario_Canastas/db/Inventario.db'")
+    app.config.update(
+        BASE_DATOS=os.path.join(RAIZ_PROYECTO, 'db', 'inventario.db'),
+        # Máximo de conexiones abiertas que se guardan para reutilizar
+        TAMANO_POOL_CONEXIONES=8,
+    )
+
+    # Perfil de almacenamiento de SQLite. Con WAL los informes largos no bloquean los escaneos
+    # y las escrituras concurrentes esperan (busy_timeout) en lugar de fallar con "database is locked".
+    # Cada valor se puede cambiar con la variable de entorno del mismo nombre.
+    app.config.update(
+        SQLITE_JOURNAL_MODE=os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        SQLITE_SYNCHRONOUS=os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        SQLITE_BUSY_TIMEOUT_MS=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000')),
+        SQLITE_CACHE_SIZE_KB=int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000')),
+        SQLITE_MMAP_SIZE=int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))),
+        SQLITE_TEMP_STORE=os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+        SQLITE_CHECKPOINT_SEGUNDOS=int(os.getenv('SQLITE_CHECKPOINT_SEGUNDOS', '300')),
+    )
+
+    # Días de préstamo antes de considerar perdida una canasta. DIAS_VENCIMIENTO_CANASTAS permite
+    # fijar otro valor por tamaño o por tamaño y color, en JSON: {"Grande": 10, "Grande/Azul": 14}
+    app.config.update(
+        DIAS_VENCIMIENTO=int(os.getenv('DIAS_VENCIMIENTO', '7')),
+        DIAS_VENCIMIENTO_CANASTAS=json.loads(os.getenv('DIAS_VENCIMIENTO_CANASTAS', '{}')),
+        VENCIMIENTOS_BARRIDO_SEGUNDOS=int(os.getenv('VENCIMIENTOS_BARRIDO_SEGUNDOS', '60')),
+    )
+
+    # Informes pesados que se generan en segundo plano: hilos que los ejecutan, horas que se
+    # guardan los archivos generados y minutos tras los cuales un trabajo sin terminar se da por perdido
+    app.config.update(
+        TRABAJOS_HILOS=int(os.getenv('TRABAJOS_HILOS', '2')),
+        TRABAJOS_RETENCION_HORAS=int(os.getenv('TRABAJOS_RETENCION_HORAS', '24')),
+        TRABAJOS_MINUTOS_MAXIMOS=int(os.getenv('TRABAJOS_MINUTOS_MAXIMOS', '30')),
+    )
+
+    # Instantáneas del estado: cada cuántos movimientos se toma una, cada cuántos segundos lo revisa
+    # cada proceso y cuántas se conservan
+    app.config.update(
+        INSTANTANEAS_CADA_MOVIMIENTOS=int(os.getenv('INSTANTANEAS_CADA_MOVIMIENTOS', '5000')),
+        INSTANTANEAS_REVISION_SEGUNDOS=int(os.getenv('INSTANTANEAS_REVISION_SEGUNDOS', '300')),
+        INSTANTANEAS_CONSERVAR=int(os.getenv('INSTANTANEAS_CONSERVAR', '10')),
+    )
+
+    # Archivo de movimientos: meses que se conservan en la tabla de movimientos y carpeta de las
+    # bases por año (por defecto db/archivo junto a la base de datos)
+    app.config.update(
+        ARCHIVO_MESES=int(os.getenv('ARCHIVO_MESES', '12')),
+        ARCHIVO_CARPETA=os.getenv('ARCHIVO_CARPETA'),
+    )
+
+    # Eventos en tiempo real (/eventos): cada cuántos segundos se revisa si otro proceso cambió
+    # el tablero, cada cuántos se envía un comentario que mantiene viva la conexión, cuánto dura
+    # cada conexión antes de que el navegador se reconecte y cuántas pantallas atiende cada
+    # proceso a la vez. Cada pantalla ocupa un hilo mientras está conectada, así que por defecto
+    # se admite la mitad de los hilos de cada worker (GUNICORN_HILOS, el mismo valor que usa
+    # gunicorn.conf.py) y la otra mitad queda para las peticiones normales.
+    hilos_worker = int(os.getenv('GUNICORN_HILOS', '8'))
+    app.config.update(
+        EVENTOS_REVISION_SEGUNDOS=float(os.getenv('EVENTOS_REVISION_SEGUNDOS', '1')),
+        EVENTOS_PING_SEGUNDOS=int(os.getenv('EVENTOS_PING_SEGUNDOS', '15')),
+        EVENTOS_DURACION_SEGUNDOS=int(os.getenv('EVENTOS_DURACION_SEGUNDOS', '300')),
+        EVENTOS_MAXIMO_PANTALLAS=int(os.getenv('EVENTOS_MAXIMO_PANTALLAS', max(1, hilos_worker // 2))),
+    )
+
+    # Métricas (/metrics): token para leerlas sin sesión de administrador, cada cuántos segundos
+    # suma cada proceso sus mediciones a la base de datos y milisegundos a partir de los que una
+    # petición o una consulta SQL se escriben en el registro como lentas (0 desactiva)
+    app.config.update(
+        METRICAS_TOKEN=os.getenv('METRICAS_TOKEN'),
+        METRICAS_VOLCADO_SEGUNDOS=int(os.getenv('METRICAS_VOLCADO_SEGUNDOS', '15')),
+        METRICAS_PETICION_LENTA_MS=int(os.getenv('METRICAS_PETICION_LENTA_MS', '2000')),
+        METRICAS_CONSULTA_LENTA_MS=int(os.getenv('METRICAS_CONSULTA_LENTA_MS', '200')),
+    )
+
+    # Valores de prueba o de otro entorno
+    if config:
+        app.config.update(config)
+
+    iniciar_metricas(app)
+    iniciar_base_datos(app)
+    app.extensions['ejecutor_trabajos'] = ThreadPoolExecutor(max_workers=app.config['TRABAJOS_HILOS'],
+                                                              thread_name_prefix='trabajos')
+    app.extensions['difusor_eventos'] = DifusorEventos(app)
+
+    for blueprint in (tablero_bp, vendedores_bp, canastas_bp, movimientos_bp, informes_bp, usuarios_bp, eventos_bp, metricas_bp):
+        app.register_blueprint(blueprint)
+
+    for comando in COMANDOS:
+        app.cli.add_command(comando)
+
+    return app
@@ -0,0 +1,128 @@
+# Archivo de movimientos antiguos.
+#
+# Los préstamos cerrados (la salida y su entrada) con más de ARCHIVO_MESES meses pasan a una base
+# SQLite por año en la carpeta de archivo (movimientos_2024.db) y salen de la tabla movimientos,
+# que se mantiene pequeña para los escaneos y el tablero. Los préstamos abiertos no se archivan.
+# Cada par cerrado suma y resta lo mismo, así que los contadores por vendedor no cambian, y el
+# resumen diario conserva los totales de los informes por vendedor (al reconstruirlo se leen
+# también los años archivados). Los informes que listan movimientos adjuntan (ATTACH) los años
+# del rango pedido; la conexión los separa al volver al pool.
+import os
+from datetime import date, datetime
+
+from flask import current_app
+
+from .instantaneas import ARCHIVO, tomar_instantanea
+
+def carpeta_archivo(app):
+    return app.config['ARCHIVO_CARPETA'] or os.path.join(os.path.dirname(app.config['BASE_DATOS']), 'archivo')
+
+def ruta_archivo(carpeta, anio):
+    return os.path.join(carpeta, f'movimientos_{anio}.db')
+
+# Primer día del mes que está 'meses' meses antes de la fecha indicada
+def fecha_corte(meses, hoy=None):
+    hoy = hoy or date.today()
+    total = hoy.year * 12 + hoy.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1).isoformat()
+
+# Adjuntar a la conexión la base de archivo de un año (si no lo está) con la tabla de movimientos.
+# Devuelve el nombre con que quedó adjuntada.
+def adjuntar_archivo(conn, carpeta, anio):
+    nombre = f'archivo_{anio}'
+    adjuntas = {fila[1] for fila in conn.execute('PRAGMA database_list')}
+    if nombre not in adjuntas:
+        conn.execute('ATTACH DATABASE ? AS ' + nombre, (ruta_archivo(carpeta, anio),))
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {nombre}.movimientos (
+                id INTEGER PRIMARY KEY,
+                vendedor_codigo TEXT,
+                tipo TEXT,
+                codigo_barras TEXT,
+                fecha TEXT
+            )
+        ''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {nombre}.idx_movimientos_fecha ON movimientos (fecha)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {nombre}.idx_movimientos_canasta_fecha ON movimientos (codigo_barras, fecha DESC)')
+    return nombre
+
+# Adjuntar los años archivados que tocan el rango de días (YYYY-MM-DD, ambos incluidos).
+# Devuelve los nombres de las bases adjuntadas, para consultarlas junto a main.
+def adjuntar_archivos_rango(conn, fecha_inicio, fecha_fin):
+    anios = conn.execute('''
+        SELECT anio FROM archivos_movimientos
+        WHERE desde <= ? AND hasta >= ?
+        ORDER BY anio
+    ''', (f'{fecha_fin} 23:59:59', f'{fecha_inicio} 00:00:00')).fetchall()
+    if not anios:
+        return []
+    carpeta = carpeta_archivo(current_app)
+    # ATTACH no se puede hacer dentro de una transacción
+    if conn.in_transaction:
+        conn.commit()
+    return [adjuntar_archivo(conn, carpeta, anio) for anio, in anios]
+
+# Pasar al archivo los préstamos cerrados anteriores a la fecha de corte (YYYY-MM-DD).
+# Primero se copian y confirman en el archivo de cada año, y solo después se borran de la tabla
+# de movimientos los que ya están copiados, así un fallo a mitad nunca pierde movimientos.
+# Devuelve [(año, movimientos archivados)].
+def archivar_movimientos(conn, carpeta, corte, conservar_instantaneas=None):
+    os.makedirs(carpeta, exist_ok=True)
+    cursor = conn.cursor()
+    if conn.in_transaction:
+        conn.commit()
+
+    # Instantánea antes de archivar: el estado se reproduce desde ella sin los movimientos archivados
+    instantanea = tomar_instantanea(cursor, ARCHIVO, conservar_instantaneas)
+    conn.commit()
+
+    # Una salida se archiva solo si su canasta tiene un movimiento posterior (su entrada) también
+    # anterior al corte; las entradas anteriores al corte cierran siempre un préstamo
+    cursor.execute('DROP TABLE IF EXISTS temp.movimientos_por_archivar')
+    cursor.execute('''
+        CREATE TEMP TABLE movimientos_por_archivar AS
+        SELECT m.id, substr(m.fecha, 1, 4) AS anio
+        FROM movimientos m
+        WHERE m.fecha < ? AND m.id <= ?
+        AND (m.tipo = 'Entra' OR EXISTS (
+            SELECT 1 FROM movimientos n
+            WHERE n.codigo_barras = m.codigo_barras AND n.fecha > m.fecha AND n.fecha < ?
+        ))
+    ''', (corte, instantanea[1], corte))
+    conn.commit()
+
+    archivados = []
+    anios = [anio for anio, in cursor.execute('SELECT DISTINCT anio FROM temp.movimientos_por_archivar ORDER BY anio')]
+    for anio in anios:
+        nombre = adjuntar_archivo(conn, carpeta, anio)
+        try:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO {nombre}.movimientos (id, vendedor_codigo, tipo, codigo_barras, fecha)
+                SELECT m.id, m.vendedor_codigo, m.tipo, m.codigo_barras, m.fecha
+                FROM main.movimientos m
+                JOIN temp.movimientos_por_archivar a ON a.id = m.id
+                WHERE a.anio = ?
+            ''', (anio,))
+            conn.commit()
+
+            cursor.execute(f'''
+                DELETE FROM main.movimientos
+                WHERE id IN (SELECT id FROM temp.movimientos_por_archivar WHERE anio = ?)
+                AND id IN (SELECT id FROM {nombre}.movimientos)
+            ''', (anio,))
+            cantidad = cursor.rowcount
+            cursor.execute(f'''
+                INSERT INTO archivos_movimientos (anio, cantidad, desde, hasta, actualizado)
+                SELECT ?, COUNT(*), MIN(fecha), MAX(fecha), ? FROM {nombre}.movimientos WHERE true
+                ON CONFLICT(anio) DO UPDATE SET
+                    cantidad = excluded.cantidad, desde = excluded.desde,
+                    hasta = excluded.hasta, actualizado = excluded.actualizado
+            ''', (anio, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.execute(f'DETACH DATABASE {nombre}')
+        archivados.append((anio, cantidad))
+
+    cursor.execute('DROP TABLE temp.movimientos_por_archivar')
+    return archivados
@@ -0,0 +1,23 @@
+# Decoradores de acceso para las rutas: sesión iniciada y rol de administrador
+from functools import wraps
+
+from flask import flash, redirect, session, url_for
+
+# Decorador para restringir acceso a administradores
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'role' not in session or session['role'] != 'admin':
+            flash('No tienes permisos para acceder a esta página')
+            return redirect(url_for('tablero.index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Por favor, inicia sesión para continuar.')
+            return redirect(url_for('usuarios.login'))
+        return f(*args, **kwargs)
+    return decorated_function
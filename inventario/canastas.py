@@ -0,0 +1,404 @@
+# Registro, inventario, importación y exportación de canastas, y canastas perdidas
+import csv
+import io
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+
+from .autenticacion import admin_required, login_required
+from .db import obtener_conexion
+from .exportaciones import TIPO_EXCEL, TIPO_PDF, generar_excel, generar_pdf, iterar_diccionarios, iterar_filas, respuesta_csv
+from .movimientos import TAMANO_PAGINA_DEFECTO, TAMANOS_PAGINA
+from .resumen import incrementar_version, sumar_resumen_canastas
+from .trabajos import encolar_informe, informe_segundo_plano
+from .vencimientos import CONSULTA_VENCIDAS, barrer_vencidas, contar_vencidas
+
+bp = Blueprint('canastas', __name__)
+
+# ===================== Canastas =====================
+
+# Valores permitidos en el registro y en los filtros de canastas
+TAMANOS_CANASTA = ('Pequeña', 'Mediana', 'Estandar', 'Grande')
+COLORES_CANASTA = ('Amarillo', 'Azul', 'Blanco', 'Gris Claro', 'Gris Oscuro', 'Morado', 'Negro', 'Naranja', 'Rojo', 'Verde', 'Vinotinto')
+ESTADOS_CANASTA = ('Nuevo', 'Usado')
+ACTUALIDADES_CANASTA = ('Prestada', 'Disponible', 'Fuera de servicio')
+
+# Columnas por las que se puede ordenar el inventario
+COLUMNAS_CANASTAS = ('codigo_barras', 'tamano', 'color', 'estado', 'fecha_registro', 'actualidad')
+
+# Ruta para registrar canastas
+@bp.route('/canastas', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def canastas():
+    tamano = color = estado = actualidad = ''
+    codigo_barras = ''
+
+    if request.method == 'POST':
+        codigo_barras = request.form['codigo_barras']
+        tamano = request.form['tamano']
+        color = request.form['color']
+        estado = request.form['estado']
+        actualidad = request.form['actualidad']
+        fecha_registro = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        if not (codigo_barras and tamano and color and estado and actualidad):
+            flash('Todos los campos son obligatorios')
+        else:
+            try:
+                conn = obtener_conexion()
+                cursor = conn.cursor()
+                cursor.execute(''' 
+                    INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (codigo_barras, tamano, color, estado, fecha_registro, actualidad))
+                sumar_resumen_canastas(cursor, actualidad, 1)
+                incrementar_version(cursor)
+                conn.commit()
+                flash('Canasta registrada con éxito')
+                codigo_barras = ''  # Limpiar el campo después del registro
+            except sqlite3.Error as e:
+                flash(f'Error al registrar la canasta: {e}')
+
+    # La tabla de canastas se carga por páginas desde /api/canastas
+    return render_template('canastas.html',
+                           codigo_barras=codigo_barras,
+                           tamano=tamano,
+                           color=color,
+                           estado=estado,
+                           actualidad=actualidad,
+                           tamanos=TAMANOS_CANASTA,
+                           colores=COLORES_CANASTA,
+                           estados=ESTADOS_CANASTA,
+                           actualidades=ACTUALIDADES_CANASTA,
+                           tamanos_pagina=TAMANOS_PAGINA)
+
+# Consultar una página del inventario con filtros, orden y búsqueda por prefijo del código.
+# Devuelve (canastas, total), cada canasta como diccionario por columna.
+def consultar_pagina_canastas(cursor, filtros, orden, descendente, pagina, por_pagina):
+    condiciones = []
+    parametros = []
+    if filtros.get('buscar'):
+        # Rango en lugar de LIKE para que la búsqueda por prefijo use la llave primaria
+        condiciones.append('codigo_barras >= ? AND codigo_barras < ?')
+        parametros.extend([filtros['buscar'], filtros['buscar'] + '\U0010ffff'])
+    for columna in ('tamano', 'color', 'estado', 'actualidad'):
+        if filtros.get(columna):
+            condiciones.append(f'{columna} = ?')
+            parametros.append(filtros[columna])
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+
+    cursor.execute(f'SELECT COUNT(*) FROM canastas {where}', parametros)
+    total = cursor.fetchone()[0]
+
+    # La columna de orden viene de COLUMNAS_CANASTAS; el código desempata para que las páginas sean estables
+    direccion = 'DESC' if descendente else 'ASC'
+    desempate = '' if orden == 'codigo_barras' else f', codigo_barras {direccion}'
+    cursor.execute(f'''
+        SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad
+        FROM canastas
+        {where}
+        ORDER BY {orden} {direccion}{desempate}
+        LIMIT ? OFFSET ?
+    ''', parametros + [por_pagina, (pagina - 1) * por_pagina])
+    return list(iterar_diccionarios(cursor)), total
+
+# API del inventario de canastas para la tabla de la página de registro
+@bp.route('/api/canastas', methods=['GET'])
+@login_required
+@admin_required
+def api_canastas():
+    filtros = {clave: request.args.get(clave, '').strip()
+               for clave in ('buscar', 'tamano', 'color', 'estado', 'actualidad')}
+    orden = request.args.get('orden', 'codigo_barras')
+    if orden not in COLUMNAS_CANASTAS:
+        orden = 'codigo_barras'
+    descendente = request.args.get('direccion') == 'desc'
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    por_pagina = request.args.get('por_pagina', type=int)
+    if por_pagina not in TAMANOS_PAGINA:
+        por_pagina = TAMANO_PAGINA_DEFECTO
+
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    canastas, total = consultar_pagina_canastas(cursor, filtros, orden, descendente, pagina, por_pagina)
+
+    return {
+        'canastas': canastas,
+        'total': total,
+        'pagina': pagina,
+        'por_pagina': por_pagina,
+        'paginas': max((total + por_pagina - 1) // por_pagina, 1),
+    }
+
+# ===================== Importación de canastas =====================
+
+# Filas que se insertan en cada transacción al importar
+TAMANO_LOTE_IMPORTACION = 1000
+# Las canastas importadas llegan del proveedor y quedan disponibles
+ACTUALIDAD_IMPORTACION = 'Disponible'
+# Textos aceptados en la primera columna de la fila de encabezado
+ENCABEZADOS_CODIGO = ('codigo_barras', 'código de barras', 'codigo de barras', 'codigo', 'código')
+
+# Convertir un valor de una celda a texto (los códigos numéricos de Excel llegan como float)
+def texto_celda(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+# Leer las filas (codigo_barras, tamano, color, estado) de un archivo CSV o XLSX
+def leer_archivo_canastas(archivo, nombre_archivo):
+    extension = os.path.splitext(nombre_archivo)[1].lower()
+    if extension == '.xlsx':
+        return leer_filas_xlsx(archivo)
+    if extension == '.csv':
+        return leer_filas_csv(archivo)
+    raise ValueError('El archivo debe ser CSV o XLSX')
+
+def leer_filas_xlsx(archivo):
+    # openpyxl se carga solo al importar un archivo de Excel
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield [texto_celda(valor) for valor in fila]
+    finally:
+        libro.close()
+
+def leer_filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    # Los archivos guardados desde Excel en español suelen venir separados por punto y coma
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;')
+    except csv.Error:
+        dialecto = csv.excel
+    for fila in csv.reader(texto, dialecto):
+        yield [valor.strip() for valor in fila]
+
+# Validar las filas del archivo sin consultar la base de datos.
+# Devuelve (validas, errores); validas es una lista de (fila, codigo_barras, tamano, color, estado).
+def validar_filas_importacion(filas):
+    # Se aceptan los valores sin importar mayúsculas y se guardan con la forma de la lista
+    tamanos = {tamano.lower(): tamano for tamano in TAMANOS_CANASTA}
+    colores = {color.lower(): color for color in COLORES_CANASTA}
+    estados = {estado.lower(): estado for estado in ESTADOS_CANASTA}
+
+    validas = []
+    errores = []
+    codigos_vistos = set()
+    for numero, fila in enumerate(filas, start=1):
+        if not any(fila):
+            continue
+        if numero == 1 and fila[0].lower() in ENCABEZADOS_CODIGO:
+            continue
+
+        codigo_barras, tamano, color, estado = (list(fila) + [''] * 4)[:4]
+        if not codigo_barras:
+            error = 'Falta el código de barras'
+        elif len(codigo_barras) > 25:
+            error = 'El código de barras tiene más de 25 caracteres'
+        elif codigo_barras in codigos_vistos:
+            error = 'Código repetido en el archivo'
+        elif tamano.lower() not in tamanos:
+            error = f'Tamaño no válido: {tamano}'
+        elif color.lower() not in colores:
+            error = f'Color no válido: {color}'
+        elif estado.lower() not in estados:
+            error = f'Estado no válido: {estado}'
+        else:
+            codigos_vistos.add(codigo_barras)
+            validas.append((numero, codigo_barras, tamanos[tamano.lower()], colores[color.lower()], estados[estado.lower()]))
+            continue
+        errores.append({'fila': numero, 'codigo_barras': codigo_barras, 'mensaje': error})
+    return validas, errores
+
+# Buscar cuáles códigos ya están registrados con una sola consulta, cruzando una tabla temporal
+def codigos_registrados(cursor, codigos):
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS importacion_codigos (codigo_barras TEXT PRIMARY KEY)')
+    cursor.execute('DELETE FROM temp.importacion_codigos')
+    cursor.executemany('INSERT INTO temp.importacion_codigos (codigo_barras) VALUES (?)',
+                       ((codigo,) for codigo in codigos))
+    cursor.execute('''
+        SELECT i.codigo_barras
+        FROM temp.importacion_codigos i
+        JOIN canastas c ON c.codigo_barras = i.codigo_barras
+    ''')
+    registrados = {fila[0] for fila in cursor.fetchall()}
+    cursor.execute('DELETE FROM temp.importacion_codigos')
+    return registrados
+
+# Registrar las canastas de un archivo: valida todas las filas, descarta los códigos ya
+# registrados e inserta el resto por lotes, cada lote en su propia transacción.
+# Devuelve (insertadas, errores), con un error por fila rechazada.
+def registrar_canastas_importadas(conn, filas):
+    cursor = conn.cursor()
+    validas, errores = validar_filas_importacion(filas)
+
+    registrados = codigos_registrados(cursor, [fila[1] for fila in validas])
+    conn.commit()
+
+    nuevas = []
+    for fila in validas:
+        if fila[1] in registrados:
+            errores.append({'fila': fila[0], 'codigo_barras': fila[1], 'mensaje': 'La canasta ya está registrada'})
+        else:
+            nuevas.append(fila)
+
+    fecha_registro = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    insertadas = 0
+    for inicio in range(0, len(nuevas), TAMANO_LOTE_IMPORTACION):
+        lote = nuevas[inicio:inicio + TAMANO_LOTE_IMPORTACION]
+        try:
+            cursor.executemany('''
+                INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(codigo_barras, tamano, color, estado, fecha_registro, ACTUALIDAD_IMPORTACION)
+                  for _, codigo_barras, tamano, color, estado in lote])
+            sumar_resumen_canastas(cursor, ACTUALIDAD_IMPORTACION, len(lote))
+            incrementar_version(cursor)
+            conn.commit()
+            insertadas += len(lote)
+        except sqlite3.Error as e:
+            conn.rollback()
+            errores.extend({'fila': fila[0], 'codigo_barras': fila[1], 'mensaje': f'No se pudo registrar el lote: {e}'}
+                           for fila in lote)
+
+    errores.sort(key=lambda error: error['fila'])
+    return insertadas, errores
+
+# Ruta para importar canastas desde un archivo CSV o XLSX
+@bp.route('/canastas/importar', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def importar_canastas():
+    if request.method == 'GET':
+        return render_template('importar_canastas.html', insertadas=None, errores=[])
+
+    archivo = request.files.get('archivo')
+    if not archivo or not archivo.filename:
+        flash('Selecciona un archivo CSV o XLSX')
+        return render_template('importar_canastas.html', insertadas=None, errores=[])
+
+    try:
+        filas = leer_archivo_canastas(archivo.stream, archivo.filename)
+        insertadas, errores = registrar_canastas_importadas(obtener_conexion(), filas)
+    except Exception as e:
+        flash(f'Error al importar el archivo: {e}')
+        return render_template('importar_canastas.html', insertadas=None, errores=[])
+
+    flash(f'{insertadas} canastas registradas, {len(errores)} filas con errores')
+    return render_template('importar_canastas.html', insertadas=insertadas, errores=errores)
+
+#Ruta para exportar a excel las canastas
+@bp.route('/exportar_canastas', methods=['GET'])
+@login_required
+@admin_required
+def exportar_canastas():
+    try:
+        # El libro de Excel se genera en segundo plano y se descarga desde la página del trabajo
+        return encolar_informe('canastas_excel', {})
+
+    except Exception as e:
+        flash(f'Error al exportar las canastas a Excel: {e}')
+        return redirect(url_for('tablero.index'))
+
+# Libro de Excel con todas las canastas, generado en segundo plano
+@informe_segundo_plano('canastas_excel')
+def trabajo_canastas_excel(cursor, parametros):
+    cursor.execute('''
+        SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad
+        FROM canastas
+    ''')
+    return ('canastas.xlsx', TIPO_EXCEL, generar_excel,
+            ('Canastas', ["Código de Barras", "Tamaño", "Color", "Estado", "Fecha de Registro", "Actualidad"], cursor))
+
+@bp.route('/exportar_canastas_csv', methods=['GET'])
+@login_required
+@admin_required
+def exportar_canastas_csv():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Obtener todas las canastas
+        cursor.execute('''
+            SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad
+            FROM canastas
+        ''')
+
+        # Definir el encabezado de las columnas del CSV
+        header = ["Código de Barras", "Tamaño", "Color", "Estado", "Fecha de Registro", "Actualidad"]
+
+        # Enviar el archivo CSV mientras se leen las filas del cursor
+        return respuesta_csv('canastas.csv', header, cursor)
+
+    except Exception as e:
+        flash(f'Error al exportar las canastas a CSV: {e}')
+        return redirect(url_for('tablero.index'))
+
+# ===================== Canastas perdidas =====================
+
+# Momento del último barrido de canastas vencidas hecho por este proceso
+ultimo_barrido_vencidas = None
+
+# Avanzar el conjunto de canastas vencidas si pasó el intervalo configurado desde el último barrido
+def barrer_vencidas_si_corresponde(conn):
+    global ultimo_barrido_vencidas
+    ahora = time.monotonic()
+    if ultimo_barrido_vencidas is not None and ahora - ultimo_barrido_vencidas < current_app.config['VENCIMIENTOS_BARRIDO_SEGUNDOS']:
+        return
+    ultimo_barrido_vencidas = ahora
+    cursor = conn.cursor()
+    if barrer_vencidas(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S')):
+        # Solo cambió el conjunto de vencidas: los informes guardados de canastas perdidas dejan
+        # de valer, pero no el gráfico ni los demás informes que dependen de la versión del tablero
+        incrementar_version(cursor, 'vencidas')
+    # El INSERT abre la transacción de escritura aunque no agregue nada: se confirma siempre para
+    # no retener el bloqueo durante el resto de la petición
+    conn.commit()
+
+@bp.route('/canastas_perdidas')
+@login_required
+def canastas_perdidas():
+    conn = obtener_conexion()
+    barrer_vencidas_si_corresponde(conn)
+    cursor = conn.cursor()
+
+    # Los días prestada se calculan en la consulta; las filas pasan a la plantilla a medida que se leen
+    cursor.execute(CONSULTA_VENCIDAS, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+    return render_template('canastas_perdidas.html', canastas=iterar_diccionarios(cursor))
+
+@bp.route('/exportar_pdf_canastas_perdidas')
+@login_required
+def exportar_pdf_canastas_perdidas():
+    conn = obtener_conexion()
+    barrer_vencidas_si_corresponde(conn)
+    cursor = conn.cursor()
+
+    if not contar_vencidas(cursor):
+        flash("No hay canastas perdidas para exportar.", "info")
+        return redirect(url_for('canastas.canastas_perdidas'))
+
+    return encolar_informe('canastas_perdidas', {})
+
+# Filas del informe de canastas perdidas, con la fecha del préstamo hasta el minuto
+def filas_canastas_perdidas(cursor):
+    for codigo, fecha, vendedor, dias, vencimiento in iterar_filas(cursor):
+        yield codigo, fecha[:16], vendedor, dias, vencimiento
+
+# Informe de canastas perdidas en PDF, generado en segundo plano
+@informe_segundo_plano('canastas_perdidas', por_fecha=True)
+def trabajo_canastas_perdidas(cursor, parametros):
+    cursor.execute(CONSULTA_VENCIDAS, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+    return ('canastas_perdidas.pdf', TIPO_PDF, generar_pdf,
+            ('Canastas Perdidas (préstamo vencido)', ["Código", "Fecha Préstamo", "Vendedor", "Días Prestada", "Venció"],
+             filas_canastas_perdidas(cursor)))
@@ -0,0 +1,170 @@
+# Comandos de mantenimiento de la base de datos: flask --app app <comando>
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .archivo import adjuntar_archivos_rango, archivar_movimientos, carpeta_archivo, fecha_corte
+from .canastas import leer_archivo_canastas, registrar_canastas_importadas
+from .db import obtener_conexion
+from .esquema import (migrar, version_actual, reconstruir_resumen, reconstruir_resumen_diario, rellenar_portador_actual,
+                      revisar_planes)
+from .instantaneas import (MANUAL, instantanea_reinicio, leer_instantanea, reproducir_movimientos, tomar_instantanea,
+                           ultima_instantanea, ultimo_reinicio)
+from .vencimientos import recalcular_vencimientos, contar_vencidas
+
+# Comando: flask --app app reconstruir-resumen
+@click.command('reconstruir-resumen')
+@with_appcontext
+def reconstruir_resumen_comando():
+    """Recalcula los contadores del tablero desde canastas y movimientos."""
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    reconstruir_resumen(cursor, ultima_instantanea(cursor))
+    conn.commit()
+    print('Resumen de canastas reconstruido')
+
+# Comando: flask --app app reconstruir-resumen-diario [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+@click.command('reconstruir-resumen-diario')
+@click.option('--desde', default=None, help='Primer día a recalcular (AAAA-MM-DD)')
+@click.option('--hasta', default=None, help='Último día a recalcular (AAAA-MM-DD)')
+@with_appcontext
+def reconstruir_resumen_diario_comando(desde, hasta):
+    """Recalcula el resumen diario de movimientos de un rango de días (o de todos)."""
+    conn = obtener_conexion()
+    # Los días archivados se recalculan desde sus bases de archivo
+    esquemas = ['main'] + adjuntar_archivos_rango(conn, desde or '0000-01-01', hasta or '9999-12-31')
+    cursor = conn.cursor()
+    reconstruir_resumen_diario(cursor, desde, hasta, esquemas)
+    conn.commit()
+    print(f'Resumen diario reconstruido ({desde or "inicio"} a {hasta or "hoy"})')
+
+# Comando: flask --app app migrar-db
+@click.command('migrar-db')
+@with_appcontext
+def migrar_db_comando():
+    """Aplica las migraciones pendientes de la base de datos."""
+    aplicadas = migrar(obtener_conexion())
+    for version, descripcion in aplicadas:
+        print(f'Migración {version} aplicada: {descripcion}')
+    print(f'Base de datos en la versión {version_actual(obtener_conexion())}')
+
+# Comando: flask --app app plan-consultas
+@click.command('plan-consultas')
+@with_appcontext
+def plan_consultas_comando():
+    """Muestra el EXPLAIN QUERY PLAN de las consultas de cada ruta."""
+    con_recorridos = 0
+    for nombre, lineas, recorridos in revisar_planes(obtener_conexion()):
+        print(f'== {nombre}' + ('  <-- RECORRE LA TABLA COMPLETA' if recorridos else ''))
+        for linea in lineas:
+            print(f'   {linea}')
+        con_recorridos += bool(recorridos)
+    print(f'{con_recorridos} consultas recorren una tabla completa')
+
+# Comando: flask --app app rellenar-portador
+@click.command('rellenar-portador')
+@with_appcontext
+def rellenar_portador_comando():
+    """Recalcula el portador actual de cada canasta desde los movimientos."""
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    rellenar_portador_actual(cursor, ultimo_reinicio(cursor))
+    conn.commit()
+    print('Portador actual de las canastas recalculado')
+
+# Comando: flask --app app recalcular-vencimientos
+@click.command('recalcular-vencimientos')
+@with_appcontext
+def recalcular_vencimientos_comando():
+    """Recalcula el vencimiento de las canastas prestadas y el conjunto de canastas perdidas."""
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    recalcular_vencimientos(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    conn.commit()
+    print(f'{contar_vencidas(cursor)} canastas con el préstamo vencido')
+
+# Comando: flask --app app tomar-instantanea
+@click.command('tomar-instantanea')
+@with_appcontext
+def tomar_instantanea_comando():
+    """Guarda una instantánea del estado de las canastas y los vendedores."""
+    conn = obtener_conexion()
+    instantanea = tomar_instantanea(conn.cursor(), MANUAL, current_app.config['INSTANTANEAS_CONSERVAR'])
+    conn.commit()
+    print(f'Instantánea {instantanea[0]} tomada hasta el movimiento {instantanea[1]}')
+
+# Comando: flask --app app reproducir-movimientos [--instantanea ID] [--verificar]
+@click.command('reproducir-movimientos')
+@click.option('--instantanea', 'instantanea_id', type=int, default=None,
+              help='Instantánea desde la que reproducir (por defecto la última; 0 para todo el historial desde el último reinicio)')
+@click.option('--verificar', is_flag=True, help='Solo contar las diferencias, sin corregirlas')
+@with_appcontext
+def reproducir_movimientos_comando(instantanea_id, verificar):
+    """Reconstruye el estado de las canastas y los vendedores desde una instantánea y los movimientos posteriores."""
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    instantanea = None
+    reinicio = instantanea_reinicio(cursor)
+    if instantanea_id == 0:
+        # Todo el historial que cuenta: desde el último reinicio, o desde el principio si nunca
+        # se reiniciaron las canastas (el reinicio no es un movimiento y no se puede reproducir)
+        instantanea = reinicio or (None, 0)
+    elif instantanea_id:
+        instantanea = leer_instantanea(cursor, instantanea_id)
+        if not instantanea:
+            raise click.ClickException(f'No existe la instantánea {instantanea_id}')
+        # Reproducir desde antes de un reinicio desharía el reinicio: solo se permite verificar
+        if reinicio and instantanea[0] < reinicio[0] and not verificar:
+            raise click.ClickException(f'La instantánea {instantanea_id} es anterior al último reinicio de las '
+                                       'canastas; use una posterior o --verificar')
+
+    inicio = time.perf_counter()
+    instantanea, reproducidos, canastas, vendedores = reproducir_movimientos(cursor, instantanea, verificar)
+    conn.commit()
+
+    origen = f'la instantánea {instantanea[0]}' if instantanea[0] else 'el inicio del historial'
+    print(f'{reproducidos} movimientos reproducidos desde {origen} en {time.perf_counter() - inicio:.2f} s')
+    print(f'{canastas} canastas y {vendedores} vendedores con diferencias' + ('' if verificar else ', corregidos'))
+
+# Comando: flask --app app archivar-movimientos [--meses N]
+@click.command('archivar-movimientos')
+@click.option('--meses', type=int, default=None, help='Meses que se conservan en la tabla de movimientos')
+@with_appcontext
+def archivar_movimientos_comando(meses):
+    """Pasa los préstamos cerrados más antiguos a las bases de archivo por año."""
+    config = current_app.config
+    corte = fecha_corte(config['ARCHIVO_MESES'] if meses is None else meses)
+    carpeta = carpeta_archivo(current_app)
+    archivados = archivar_movimientos(obtener_conexion(), carpeta, corte, config['INSTANTANEAS_CONSERVAR'])
+    for anio, cantidad in archivados:
+        print(f'{anio}: {cantidad} movimientos archivados en {carpeta}')
+    print(f'{sum(cantidad for _, cantidad in archivados)} movimientos anteriores al {corte} archivados')
+
+# Comando: flask --app app importar-canastas archivo.csv
+@click.command('importar-canastas')
+@click.argument('ruta', type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def importar_canastas_comando(ruta):
+    """Registra las canastas de un archivo CSV o XLSX (codigo_barras, tamano, color, estado)."""
+    with open(ruta, 'rb') as archivo:
+        insertadas, errores = registrar_canastas_importadas(obtener_conexion(), leer_archivo_canastas(archivo, ruta))
+    for error in errores:
+        print(f"Fila {error['fila']} ({error['codigo_barras']}): {error['mensaje']}")
+    print(f'{insertadas} canastas registradas, {len(errores)} filas con errores')
+
+# Comandos que se registran en la aplicación
+COMANDOS = (
+    reconstruir_resumen_comando,
+    reconstruir_resumen_diario_comando,
+    migrar_db_comando,
+    plan_consultas_comando,
+    rellenar_portador_comando,
+    recalcular_vencimientos_comando,
+    importar_canastas_comando,
+    tomar_instantanea_comando,
+    reproducir_movimientos_comando,
+    archivar_movimientos_comando,
+)
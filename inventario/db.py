@@ -0,0 +1,131 @@
+# Conexiones a la base de datos SQLite: pool de conexiones por proceso, una conexión por
+# petición y preparación de la base al crear la aplicación.
+import atexit
+import queue
+import sqlite3
+import time
+from datetime import datetime
+
+from flask import current_app, g
+
+from .esquema import migrar
+from .metricas import ConexionMedida
+from .vencimientos import guardar_umbrales, recalcular_vencimientos
+
+# Configuración que se aplica una sola vez al abrir cada conexión del pool
+def configurar_conexion(conn, config):
+    conn.execute(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    conn.execute(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    conn.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    # Un valor negativo indica el tamaño de la caché en KiB en lugar de páginas
+    conn.execute(f"PRAGMA cache_size = -{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    conn.execute(f"PRAGMA temp_store = {config['SQLITE_TEMP_STORE']}")
+    # Las consultas que tardan más se escriben en el registro (ver metricas.py)
+    if config['METRICAS_CONSULTA_LENTA_MS']:
+        conn.umbral_consulta_lenta = config['METRICAS_CONSULTA_LENTA_MS'] / 1000
+
+# Pool de conexiones: cada petición toma una conexión libre y la devuelve al terminar
+class PoolConexiones:
+    def __init__(self, ruta, maximo, config):
+        self.ruta = ruta
+        self.config = config
+        self.libres = queue.LifoQueue(maxsize=maximo)
+
+    def tomar(self):
+        try:
+            return self.libres.get_nowait()
+        except queue.Empty:
+            # La conexión se usa en un solo hilo a la vez, pero puede volver al pool desde otro
+            conn = sqlite3.connect(self.ruta, check_same_thread=False, factory=ConexionMedida)
+            configurar_conexion(conn, self.config)
+            return conn
+
+    def devolver(self, conn):
+        # Descartar cualquier cambio que la petición no haya confirmado
+        if conn.in_transaction:
+            conn.rollback()
+        # Separar las bases de archivo que la petición haya adjuntado
+        try:
+            for _, nombre, _ in conn.execute('PRAGMA database_list').fetchall():
+                if nombre not in ('main', 'temp'):
+                    conn.execute(f'DETACH DATABASE {nombre}')
+        except sqlite3.Error:
+            conn.close()
+            return
+        try:
+            self.libres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def cerrar_todas(self):
+        while True:
+            try:
+                self.libres.get_nowait().close()
+            except queue.Empty:
+                break
+
+# Función para obtener la conexión con la base de datos. Se usa la misma conexión durante
+# toda la petición y se devuelve al pool automáticamente al terminar (no hay que cerrarla).
+def obtener_conexion():
+    if 'db' not in g:
+        g.db = current_app.extensions['pool_conexiones'].tomar()
+    return g.db
+
+# Momento del último checkpoint del WAL hecho por este proceso
+ultimo_checkpoint = time.monotonic()
+
+def liberar_conexion(error):
+    global ultimo_checkpoint
+    conn = g.pop('db', None)
+    if conn is None:
+        return
+
+    # Cada cierto tiempo se pasa el contenido del WAL a la base de datos para que no crezca sin límite
+    intervalo = current_app.config['SQLITE_CHECKPOINT_SEGUNDOS']
+    if intervalo and time.monotonic() - ultimo_checkpoint > intervalo:
+        ultimo_checkpoint = time.monotonic()
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        except sqlite3.Error:
+            pass
+
+    current_app.extensions['pool_conexiones'].devolver(conn)
+
+# Al apagar el proceso: actualizar estadísticas del planificador, vaciar el WAL y cerrar conexiones
+def cerrar_base_datos(pool_conexiones):
+    try:
+        conn = pool_conexiones.tomar()
+        conn.execute('PRAGMA optimize')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+    except sqlite3.Error:
+        pass
+    pool_conexiones.cerrar_todas()
+
+# Al iniciar la aplicación: aplicar las migraciones pendientes y, si cambiaron los días de
+# préstamo configurados, recalcular los vencimientos
+def preparar_base_datos():
+    conn = obtener_conexion()
+    migrar(conn)
+    cursor = conn.cursor()
+    if guardar_umbrales(cursor, current_app.config['DIAS_VENCIMIENTO'], current_app.config['DIAS_VENCIMIENTO_CANASTAS']):
+        recalcular_vencimientos(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    conn.commit()
+
+# Crear el pool de la aplicación, devolver la conexión al terminar cada petición y preparar la base
+def iniciar_base_datos(app):
+    pool_conexiones = PoolConexiones(app.config['BASE_DATOS'], app.config['TAMANO_POOL_CONEXIONES'], app.config)
+    app.extensions['pool_conexiones'] = pool_conexiones
+    app.teardown_appcontext(liberar_conexion)
+    atexit.register(cerrar_base_datos, pool_conexiones)
+
+    with app.app_context():
+        preparar_base_datos()
+
+    # Con gunicorn y preload_app la aplicación se crea en el proceso maestro antes de crear los
+    # workers. Una conexión de SQLite no debe pasar abierta a un proceso hijo, así que se cierran
+    # las del pool: cada worker abre las suyas en su primera petición.
+    pool_conexiones.cerrar_todas()
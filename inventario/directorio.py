@@ -0,0 +1,50 @@
+# Directorio de vendedores en memoria.
+#
+# Cada escaneo busca el código del vendedor por su nombre y cada formulario de movimientos e
+# informes lista los vendedores ordenados. Los vendedores cambian pocas veces al mes, así que cada
+# proceso guarda una copia y solo la vuelve a leer cuando cambia la versión 'vendedores' de la
+# tabla versiones, que se incrementa en la misma transacción que cada escritura sobre vendedores.
+# Leer la versión es una consulta por clave primaria, y así los demás workers ven el cambio
+# en su siguiente petición.
+from .resumen import incrementar_version, leer_version
+
+# Última copia leída: versión, (codigo, nombre) ordenados por nombre y código por nombre.
+# Se reemplaza completa al cambiar (sin modificarla), así quien ya la obtuvo la sigue leyendo sin bloqueo.
+directorio_cache = {'version': None, 'vendedores': [], 'codigos': {}}
+
+# Marcar el directorio como cambiado en la transacción abierta
+def invalidar_directorio(cursor):
+    incrementar_version(cursor, 'vendedores')
+
+# Obtener el directorio vigente, leyéndolo de la base solo si cambió su versión
+def obtener_directorio(cursor):
+    global directorio_cache
+    # La versión se lee antes que los vendedores: si cambian entre las dos consultas, la copia
+    # guardada es más nueva que su versión y se vuelve a leer en la siguiente petición
+    version = leer_version(cursor, 'vendedores')
+    directorio = directorio_cache
+    if directorio['version'] == version:
+        return directorio
+
+    cursor.execute('SELECT codigo, nombre FROM vendedores ORDER BY nombre')
+    vendedores = cursor.fetchall()
+    directorio = {
+        'version': version,
+        'vendedores': vendedores,
+        'codigos': {nombre: codigo for codigo, nombre in vendedores},
+    }
+
+    directorio_cache = directorio
+    return directorio
+
+# Lista de (codigo, nombre) ordenada por nombre
+def listar_vendedores(cursor):
+    return obtener_directorio(cursor)['vendedores']
+
+# Nombres de los vendedores ordenados, para las listas de selección de los formularios
+def nombres_vendedores(cursor):
+    return [nombre for _, nombre in listar_vendedores(cursor)]
+
+# Código del vendedor con ese nombre, o None si no existe
+def codigo_vendedor(cursor, nombre):
+    return obtener_directorio(cursor)['codigos'].get(nombre)
@@ -0,0 +1,547 @@
+# Estructura de la base de datos: migraciones versionadas, reconstrucción de las tablas
+# derivadas y revisión de los planes de consulta de las rutas más usadas.
+#
+# La versión aplicada se guarda en PRAGMA user_version. Cada migración se ejecuta una sola
+# vez, en orden, y todas usan IF NOT EXISTS para que correrlas sobre una base existente
+# no cause errores. Las que llenan datos llevan su propio SQL, escrito para el esquema de su
+# versión, en lugar de llamar a las funciones de reconstrucción de la aplicación: esas cambian
+# con el esquema y una base que se actualiza desde una versión antigua debe quedar igual
+# que una creada de cero.
+from datetime import datetime
+
+
+# ===================== Tablas derivadas =====================
+
+# Recalcular los contadores del tablero desde cero (comando de consistencia). Los préstamos
+# activos por vendedor se suman desde la instantánea indicada, (id, último movimiento incluido),
+# más los movimientos posteriores, o desde todos los movimientos si no se indica.
+def reconstruir_resumen(cursor, instantanea=None):
+    cursor.execute('DELETE FROM resumen_canastas')
+    cursor.execute('''
+        INSERT INTO resumen_canastas (actualidad, cantidad)
+        SELECT actualidad, COUNT(*) FROM canastas GROUP BY actualidad
+    ''')
+
+    cursor.execute('DELETE FROM resumen_vendedores')
+    instantanea_id, ultimo_movimiento = instantanea or (None, 0)
+    if instantanea_id:
+        cursor.execute('''
+            INSERT INTO resumen_vendedores (vendedor_codigo, prestadas_activas)
+            SELECT vendedor_codigo, prestadas_activas FROM instantaneas_vendedores WHERE instantanea_id = ?
+        ''', (instantanea_id,))
+    cursor.execute('''
+        INSERT INTO resumen_vendedores (vendedor_codigo, prestadas_activas)
+        SELECT vendedor_codigo,
+               SUM(CASE WHEN tipo = 'Sale' THEN 1 ELSE 0 END) -
+               SUM(CASE WHEN tipo = 'Entra' THEN 1 ELSE 0 END)
+        FROM movimientos
+        WHERE id > ?
+        GROUP BY vendedor_codigo
+        ON CONFLICT(vendedor_codigo) DO UPDATE SET prestadas_activas = prestadas_activas + excluded.prestadas_activas
+    ''', (ultimo_movimiento,))
+
+# Recalcular el resumen diario de movimientos de un rango de días (YYYY-MM-DD, ambos incluidos),
+# o de todos los días si no se indica. Tamaño y color son los actuales de cada canasta.
+# 'esquemas' son las bases de las que se leen los movimientos: main y las bases de archivo ya
+# adjuntadas que cubren el rango (ver archivo.py), para no perder los días archivados.
+def reconstruir_resumen_diario(cursor, desde=None, hasta=None, esquemas=('main',)):
+    dias, fechas, parametros = ['1'], ['1'], []
+    if desde:
+        dias.append('dia >= ?')
+        fechas.append('m.fecha >= ?')
+        parametros.append(desde)
+    if hasta:
+        dias.append('dia <= ?')
+        fechas.append("m.fecha < date(?, '+1 day')")
+        parametros.append(hasta)
+
+    movimientos = ' UNION ALL '.join(f'''
+        SELECT m.vendedor_codigo, m.tipo, m.codigo_barras, m.fecha
+        FROM {esquema}.movimientos m
+        WHERE {" AND ".join(fechas)}
+    ''' for esquema in esquemas)
+
+    cursor.execute(f'DELETE FROM resumen_diario WHERE {" AND ".join(dias)}', parametros)
+    cursor.execute(f'''
+        INSERT INTO resumen_diario (dia, vendedor_codigo, tipo, tamano, color, cantidad)
+        SELECT substr(m.fecha, 1, 10), m.vendedor_codigo, m.tipo,
+               COALESCE(c.tamano, ''), COALESCE(c.color, ''), COUNT(*)
+        FROM ({movimientos}) m
+        LEFT JOIN main.canastas c ON c.codigo_barras = m.codigo_barras
+        GROUP BY 1, 2, 3, 4, 5
+    ''', parametros * len(esquemas))
+
+# Calcular el portador actual de cada canasta (backfill): el vendedor de su última salida
+# si sigue prestada, y la fecha de su último movimiento. Solo cuentan los movimientos posteriores
+# a 'desde_movimiento' (el último reinicio de las canastas).
+def rellenar_portador_actual(cursor, desde_movimiento=0):
+    cursor.execute('''
+        UPDATE canastas SET
+            fecha_ultimo_movimiento = (
+                SELECT MAX(m.fecha) FROM movimientos m
+                WHERE m.codigo_barras = canastas.codigo_barras AND m.id > ?
+            ),
+            vendedor_actual = (
+                SELECT CASE WHEN m.tipo = 'Sale' THEN m.vendedor_codigo END
+                FROM movimientos m
+                WHERE m.codigo_barras = canastas.codigo_barras AND m.id > ?
+                ORDER BY m.fecha DESC, m.id DESC
+                LIMIT 1
+            )
+    ''', (desde_movimiento, desde_movimiento))
+
+
+# ===================== Migraciones =====================
+
+def columnas_tabla(cursor, tabla):
+    cursor.execute(f'PRAGMA table_info({tabla})')
+    return {fila[1] for fila in cursor.fetchall()}
+
+# 1: tablas principales de la aplicación
+def crear_tablas_principales(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS canastas (
+            codigo_barras TEXT PRIMARY KEY,
+            tamano TEXT,
+            color TEXT,
+            estado TEXT,
+            fecha_registro TEXT,
+            actualidad TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vendedores (
+            codigo TEXT PRIMARY KEY,
+            nombre TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS movimientos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vendedor_codigo TEXT,
+            tipo TEXT,
+            codigo_barras TEXT,
+            fecha TEXT,
+            FOREIGN KEY (vendedor_codigo) REFERENCES vendedores(codigo),
+            FOREIGN KEY (codigo_barras) REFERENCES canastas(codigo_barras)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL
+        )
+    ''')
+
+# 2: contadores del tablero y versión de los datos
+def crear_tablas_resumen(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_canastas (
+            actualidad TEXT PRIMARY KEY,
+            cantidad INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_vendedores (
+            vendedor_codigo TEXT PRIMARY KEY,
+            prestadas_activas INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Versión de los datos del tablero, se incrementa con cada escritura que lo afecta
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versiones (
+            nombre TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO versiones (nombre, valor) VALUES ('tablero', 0)")
+
+    # Llenar los contadores a partir de los datos existentes
+    cursor.execute('DELETE FROM resumen_canastas')
+    cursor.execute('''
+        INSERT INTO resumen_canastas (actualidad, cantidad)
+        SELECT actualidad, COUNT(*) FROM canastas GROUP BY actualidad
+    ''')
+    cursor.execute('DELETE FROM resumen_vendedores')
+    cursor.execute('''
+        INSERT INTO resumen_vendedores (vendedor_codigo, prestadas_activas)
+        SELECT vendedor_codigo,
+               SUM(CASE WHEN tipo = 'Sale' THEN 1 ELSE 0 END) -
+               SUM(CASE WHEN tipo = 'Entra' THEN 1 ELSE 0 END)
+        FROM movimientos
+        GROUP BY vendedor_codigo
+    ''')
+
+# 3: índices para las consultas de las rutas más usadas
+def crear_indices_consultas(cursor):
+    # Última transacción e historial de una canasta
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_movimientos_canasta_fecha ON movimientos (codigo_barras, fecha DESC)')
+    # Movimientos de un vendedor por tipo y fecha
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_movimientos_vendedor_tipo_fecha ON movimientos (vendedor_codigo, tipo, fecha)')
+    # Rangos de fechas y movimientos más recientes
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_movimientos_fecha ON movimientos (fecha)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_actualidad ON canastas (actualidad)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_tamano_color ON canastas (tamano, color)')
+    # El vendedor se busca por nombre en cada escaneo
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_vendedores_nombre ON vendedores (nombre)')
+    cursor.execute('ANALYZE')
+
+# 4: portador actual de cada canasta, mantenido con cada movimiento
+def agregar_portador_actual(cursor):
+    columnas = columnas_tabla(cursor, 'canastas')
+    if 'vendedor_actual' not in columnas:
+        cursor.execute('ALTER TABLE canastas ADD COLUMN vendedor_actual TEXT')
+    if 'fecha_ultimo_movimiento' not in columnas:
+        cursor.execute('ALTER TABLE canastas ADD COLUMN fecha_ultimo_movimiento TEXT')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_vendedor_actual ON canastas (vendedor_actual, actualidad)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_actualidad_fecha ON canastas (actualidad, fecha_ultimo_movimiento)')
+
+    # Portador de los datos existentes: el vendedor de la última salida si sigue prestada, y
+    # la fecha del último movimiento
+    cursor.execute('''
+        UPDATE canastas SET
+            fecha_ultimo_movimiento = (
+                SELECT MAX(m.fecha) FROM movimientos m
+                WHERE m.codigo_barras = canastas.codigo_barras
+            ),
+            vendedor_actual = (
+                SELECT CASE WHEN m.tipo = 'Sale' THEN m.vendedor_codigo END
+                FROM movimientos m
+                WHERE m.codigo_barras = canastas.codigo_barras
+                ORDER BY m.fecha DESC, m.id DESC
+                LIMIT 1
+            )
+    ''')
+
+# 5: vencimiento de los préstamos y conjunto de canastas vencidas (perdidas)
+def agregar_vencimientos(cursor):
+    if 'fecha_vencimiento' not in columnas_tabla(cursor, 'canastas'):
+        cursor.execute('ALTER TABLE canastas ADD COLUMN fecha_vencimiento TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_vencimiento ON canastas (fecha_vencimiento)')
+
+    # Días permitidos de préstamo; tamano y color vacíos significan "cualquiera"
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS umbrales_vencimiento (
+            tamano TEXT NOT NULL DEFAULT '',
+            color TEXT NOT NULL DEFAULT '',
+            dias INTEGER NOT NULL,
+            PRIMARY KEY (tamano, color)
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO umbrales_vencimiento (tamano, color, dias) VALUES ('', '', 7)")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS canastas_vencidas (
+            codigo_barras TEXT PRIMARY KEY,
+            vendedor_codigo TEXT,
+            fecha_prestamo TEXT,
+            fecha_vencimiento TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_canastas_vencidas_vencimiento ON canastas_vencidas (fecha_vencimiento)')
+
+    # Vencimiento de las canastas prestadas (umbral de su tamaño y color, de su tamaño o el
+    # general) y las que ya vencieron
+    cursor.execute('''
+        UPDATE canastas SET fecha_vencimiento = CASE
+            WHEN actualidad = 'Prestada' AND vendedor_actual IS NOT NULL AND fecha_ultimo_movimiento IS NOT NULL
+            THEN datetime(fecha_ultimo_movimiento, '+' || COALESCE(
+                (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = canastas.tamano AND u.color = canastas.color),
+                (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = canastas.tamano AND u.color = ''),
+                (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = '' AND u.color = '')
+            ) || ' days')
+        END
+    ''')
+    cursor.execute('DELETE FROM canastas_vencidas')
+    cursor.execute('''
+        INSERT INTO canastas_vencidas (codigo_barras, vendedor_codigo, fecha_prestamo, fecha_vencimiento)
+        SELECT codigo_barras, vendedor_actual, fecha_ultimo_movimiento, fecha_vencimiento
+        FROM canastas
+        WHERE fecha_vencimiento <= ?
+    ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+
+# 6: trabajos en segundo plano de los informes pesados
+def crear_tabla_trabajos(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trabajos (
+            id TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL,
+            clave TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            usuario_id INTEGER,
+            archivo TEXT,
+            nombre_descarga TEXT,
+            tipo_mime TEXT,
+            error TEXT,
+            creado TEXT NOT NULL,
+            terminado TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trabajos_clave ON trabajos (clave, estado)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trabajos_creado ON trabajos (creado)')
+
+# 7: resumen diario de movimientos por vendedor, tipo, tamaño y color
+def crear_resumen_diario(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_diario (
+            dia TEXT NOT NULL,
+            vendedor_codigo TEXT,
+            tipo TEXT,
+            tamano TEXT NOT NULL DEFAULT '',
+            color TEXT NOT NULL DEFAULT '',
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, vendedor_codigo, tipo, tamano, color)
+        )
+    ''')
+
+    # Resumen de los movimientos existentes, con el tamaño y color actuales de cada canasta
+    cursor.execute('DELETE FROM resumen_diario')
+    cursor.execute('''
+        INSERT INTO resumen_diario (dia, vendedor_codigo, tipo, tamano, color, cantidad)
+        SELECT substr(m.fecha, 1, 10), m.vendedor_codigo, m.tipo,
+               COALESCE(c.tamano, ''), COALESCE(c.color, ''), COUNT(*)
+        FROM movimientos m
+        LEFT JOIN canastas c ON c.codigo_barras = m.codigo_barras
+        GROUP BY 1, 2, 3, 4, 5
+    ''')
+
+# 8: instantáneas del estado y movimientos de solo agregar
+def crear_instantaneas(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS instantaneas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movimiento_id INTEGER NOT NULL,
+            motivo TEXT NOT NULL,
+            creado TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS instantaneas_canastas (
+            instantanea_id INTEGER NOT NULL,
+            codigo_barras TEXT NOT NULL,
+            actualidad TEXT,
+            vendedor_actual TEXT,
+            fecha_ultimo_movimiento TEXT,
+            PRIMARY KEY (instantanea_id, codigo_barras)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS instantaneas_vendedores (
+            instantanea_id INTEGER NOT NULL,
+            vendedor_codigo TEXT NOT NULL,
+            prestadas_activas INTEGER NOT NULL,
+            PRIMARY KEY (instantanea_id, vendedor_codigo)
+        )
+    ''')
+
+    # Los movimientos no se modifican, y solo se pueden borrar (archivar) los que ya cubre la
+    # instantánea más antigua, porque el estado se puede reconstruir sin ellos
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS movimientos_sin_modificar
+        BEFORE UPDATE ON movimientos
+        BEGIN
+            SELECT RAISE(ABORT, 'Los movimientos no se pueden modificar');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS movimientos_sin_borrar
+        BEFORE DELETE ON movimientos
+        WHEN OLD.id > (SELECT COALESCE(MIN(movimiento_id), 0) FROM instantaneas)
+        BEGIN
+            SELECT RAISE(ABORT, 'Solo se pueden borrar movimientos anteriores a la instantánea más antigua');
+        END
+    ''')
+
+# 9: catálogo de los archivos de movimientos por año. Los movimientos que cubre la última
+# instantánea se pueden archivar: el estado se reproduce desde ella sin necesitarlos.
+def crear_catalogo_archivo(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archivos_movimientos (
+            anio TEXT PRIMARY KEY,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            desde TEXT,
+            hasta TEXT,
+            actualizado TEXT
+        )
+    ''')
+    cursor.execute('DROP TRIGGER IF EXISTS movimientos_sin_borrar')
+    cursor.execute('''
+        CREATE TRIGGER movimientos_sin_borrar
+        BEFORE DELETE ON movimientos
+        WHEN OLD.id > (SELECT COALESCE(MAX(movimiento_id), 0) FROM instantaneas)
+        BEGIN
+            SELECT RAISE(ABORT, 'Solo se pueden archivar movimientos anteriores a la última instantánea');
+        END
+    ''')
+
+# 10: métricas compartidas entre los procesos (ver metricas.py). Cada proceso suma aquí
+# periódicamente lo que midió desde su último volcado. 'campo' es '' en los contadores y, en los
+# histogramas, 'suma', 'cantidad' o el límite de cada intervalo (sin acumular).
+def crear_tabla_metricas(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metricas (
+            metrica TEXT NOT NULL,
+            etiquetas TEXT NOT NULL,
+            campo TEXT NOT NULL,
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (metrica, etiquetas, campo)
+        )
+    ''')
+
+# Lista de migraciones en orden: (versión, descripción, función)
+MIGRACIONES = [
+    (1, 'Tablas principales', crear_tablas_principales),
+    (2, 'Contadores del tablero', crear_tablas_resumen),
+    (3, 'Índices de consultas', crear_indices_consultas),
+    (4, 'Portador actual de las canastas', agregar_portador_actual),
+    (5, 'Vencimiento de préstamos', agregar_vencimientos),
+    (6, 'Trabajos en segundo plano', crear_tabla_trabajos),
+    (7, 'Resumen diario de movimientos', crear_resumen_diario),
+    (8, 'Instantáneas y movimientos de solo agregar', crear_instantaneas),
+    (9, 'Archivo de movimientos por año', crear_catalogo_archivo),
+    (10, 'Métricas compartidas entre procesos', crear_tabla_metricas),
+]
+
+def version_actual(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+# Aplicar las migraciones pendientes, cada una en su propia transacción.
+# Devuelve la lista de versiones aplicadas.
+def migrar(conn):
+    aplicadas = []
+    for version, descripcion, funcion in MIGRACIONES:
+        if version <= version_actual(conn):
+            continue
+        cursor = conn.cursor()
+        try:
+            # BEGIN explícito para que también los CREATE y ALTER queden dentro de la transacción
+            cursor.execute('BEGIN')
+            funcion(cursor)
+            # PRAGMA no acepta parámetros; la versión es un entero de la lista de migraciones
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        aplicadas.append((version, descripcion))
+    return aplicadas
+
+
+# ===================== Planes de consulta =====================
+
+# Consultas de las rutas más usadas, con parámetros de ejemplo, para revisar con
+# EXPLAIN QUERY PLAN que ninguna recorra una tabla completa.
+CONSULTAS_RUTAS = [
+    ('movimientos: vendedor por nombre',
+     'SELECT codigo FROM vendedores WHERE nombre = ?', ('x',)),
+    ('movimientos: estado y portador de la canasta', '''
+        SELECT actualidad, vendedor_actual, fecha_ultimo_movimiento
+        FROM canastas WHERE codigo_barras = ?
+    ''', ('x',)),
+    ('movimientos: últimos 100 movimientos', '''
+        SELECT m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        ORDER BY m.fecha DESC
+        LIMIT 100
+    ''', ()),
+    ('movimientos_lote: estado y portador de las canastas del lote', '''
+        SELECT codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento
+        FROM canastas
+        WHERE codigo_barras IN (?, ?)
+    ''', ('x', 'y')),
+    ('ver_movimientos: página siguiente del historial', '''
+        SELECT m.id, m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE (m.fecha, m.id) < (?, ?)
+        ORDER BY m.fecha DESC, m.id DESC
+        LIMIT 51
+    ''', ('2025-01-01 00:00:00', 1)),
+    ('ver_movimientos: historial de una canasta', '''
+        SELECT m.id, m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.codigo_barras = ?
+        ORDER BY m.fecha DESC, m.id DESC
+        LIMIT 51
+    ''', ('x',)),
+    ('api_canastas: búsqueda por prefijo del código', '''
+        SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad
+        FROM canastas
+        WHERE codigo_barras >= ? AND codigo_barras < ?
+        ORDER BY codigo_barras ASC
+        LIMIT 50 OFFSET 0
+    ''', ('CAN', 'CAN\U0010ffff')),
+    ('api_canastas: canastas por actualidad', '''
+        SELECT codigo_barras, tamano, color, estado, fecha_registro, actualidad
+        FROM canastas
+        WHERE actualidad = ?
+        ORDER BY codigo_barras ASC
+        LIMIT 50 OFFSET 0
+    ''', ('Disponible',)),
+    ('informe_movimientos: página siguiente del rango de fechas', '''
+        SELECT m.id, m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM main.movimientos m
+        JOIN main.vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.fecha >= ? AND m.fecha < date(?, '+1 day') AND (m.fecha, m.id) < (?, ?)
+        ORDER BY fecha DESC, id DESC
+        LIMIT 51
+    ''', ('2025-01-01', '2025-01-31', '2025-01-15 00:00:00', 1)),
+    ('informe_vendedores: días cerrados desde el resumen diario', '''
+        SELECT vendedor_codigo, tipo, SUM(cantidad)
+        FROM resumen_diario
+        WHERE dia >= ? AND dia <= ? AND dia < ?
+        GROUP BY vendedor_codigo, tipo
+    ''', ('2025-01-01', '2025-12-31', '2025-06-01')),
+    ('informe_vendedores: movimientos del día en curso', '''
+        SELECT m.vendedor_codigo, m.tipo, COALESCE(c.tamano, ''), COALESCE(c.color, '')
+        FROM movimientos m
+        LEFT JOIN canastas c ON c.codigo_barras = m.codigo_barras
+        WHERE m.fecha >= ? AND m.fecha < date(?, '+1 day')
+    ''', ('2025-06-01', '2025-06-01')),
+    ('informe_buscar_canasta: últimos 30 movimientos', '''
+        SELECT m.fecha, v.nombre, m.tipo
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.codigo_barras = ?
+        ORDER BY m.fecha DESC
+        LIMIT 30
+    ''', ('x',)),
+    ('canastas_perdidas: barrido de préstamos vencidos', '''
+        SELECT codigo_barras, vendedor_actual, fecha_ultimo_movimiento, fecha_vencimiento
+        FROM canastas
+        WHERE fecha_vencimiento > COALESCE((SELECT MAX(fecha_vencimiento) FROM canastas_vencidas), '')
+        AND fecha_vencimiento <= ?
+    ''', ('2025-01-01 00:00:00',)),
+    ('informe_canastas_por_vendedor: canastas prestadas del vendedor', '''
+        SELECT codigo_barras, tamano, color, fecha_ultimo_movimiento
+        FROM canastas
+        WHERE vendedor_actual = ? AND actualidad = 'Prestada'
+        ORDER BY fecha_ultimo_movimiento DESC
+    ''', ('x',)),
+]
+
+# Tablas pequeñas (una fila por estado o por vendedor) que se pueden recorrer completas
+TABLAS_PEQUENAS = ('resumen_canastas', 'resumen_vendedores', 'versiones', 'vendedores', 'umbrales_vencimiento',
+                   'instantaneas', 'archivos_movimientos')
+
+# Obtener el plan de cada consulta. Devuelve (nombre, lineas_del_plan, recorridos_completos).
+def revisar_planes(conn):
+    reporte = []
+    for nombre, sql, parametros in CONSULTAS_RUTAS:
+        filas = conn.execute(f'EXPLAIN QUERY PLAN {sql}', parametros).fetchall()
+        lineas = [fila[3] for fila in filas]
+        recorridos = [
+            linea for linea in lineas
+            if linea.startswith('SCAN')
+            and 'USING' not in linea
+            and not any(f'SCAN {tabla}' in linea for tabla in TABLAS_PEQUENAS)
+        ]
+        reporte.append((nombre, lineas, recorridos))
+    return reporte
@@ -0,0 +1,194 @@
+# Actualización del tablero y de la página de movimientos en tiempo real (Server-Sent Events).
+#
+# Las páginas se suscriben a /eventos en lugar de recargarse. En cada proceso un solo hilo (el
+# vigilante) lee los contadores y los movimientos nuevos cuando cambia la versión del tablero (o
+# la de las canastas vencidas) y envía el mismo evento a todas las pantallas conectadas a ese
+# proceso: una consulta por cambio y no una por pantalla. Las escrituras de movimientos de este proceso lo despiertan en cuanto se
+# confirman (avisar); los cambios hechos en otros workers se notan al revisar la versión
+# cada EVENTOS_REVISION_SEGUNDOS. Cada pantalla conectada ocupa un hilo del servidor, por eso
+# cada proceso atiende como mucho EVENTOS_MAXIMO_PANTALLAS a la vez; las que sobran reciben una
+# respuesta vacía que les indica volver a intentar más tarde.
+import json
+import queue
+import random
+import threading
+import time
+
+from flask import Blueprint, Response, current_app
+
+from .autenticacion import login_required
+from .canastas import barrer_vencidas_si_corresponde
+from .db import obtener_conexion
+from .resumen import leer_resumen_canastas, leer_resumen_vendedores, leer_version
+from .vencimientos import contar_vencidas
+
+bp = Blueprint('eventos', __name__)
+
+# Eventos pendientes por pantalla; si una pantalla no los lee, los siguientes se descartan
+# (cada evento del tablero trae el estado completo, así que el próximo la pone al día)
+EVENTOS_POR_PANTALLA = 50
+# Movimientos nuevos que se envían como mucho en un evento (los que muestra la página)
+MOVIMIENTOS_POR_EVENTO = 100
+# Espera del navegador antes de reconectarse cuando se corta la conexión
+RECONEXION_MS = 3000
+# Espera antes de reintentar cuando el proceso ya tiene todas las pantallas que admite; se
+# reparte al azar para que las pantallas rechazadas no vuelvan todas a la vez
+RECONEXION_OCUPADO_MS = (15000, 45000)
+
+# Texto de un evento tal como se envía: se arma una vez y se reparte a todas las pantallas
+def formatear_evento(nombre, datos):
+    return f'event: {nombre}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n'
+
+# Contadores del tablero: total, disponibles, prestadas, perdidas y prestadas por vendedor
+def leer_tablero(cursor, version):
+    total_canastas, disponibles, prestadas = leer_resumen_canastas(cursor)
+    return {
+        'version': version,
+        'total_canastas': total_canastas,
+        'disponibles': disponibles,
+        'prestadas': prestadas,
+        'canastas_perdidas': contar_vencidas(cursor),
+        'vendedores': [{'nombre': nombre, 'prestadas': cantidad}
+                       for nombre, cantidad in leer_resumen_vendedores(cursor)],
+    }
+
+# Movimientos posteriores al indicado, del más antiguo al más reciente (solo los últimos)
+def leer_movimientos_nuevos(cursor, ultimo_movimiento):
+    cursor.execute('''
+        SELECT m.id, m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.id > ?
+        ORDER BY m.id DESC
+        LIMIT ?
+    ''', (ultimo_movimiento, MOVIMIENTOS_POR_EVENTO))
+    columnas = ('id', 'fecha', 'vendedor', 'tipo', 'codigo_barras')
+    return [dict(zip(columnas, fila)) for fila in reversed(cursor.fetchall())]
+
+class DifusorEventos:
+    def __init__(self, app):
+        self.app = app
+        self.pantallas = set()
+        self.lock = threading.Lock()
+        self.cambio = threading.Event()
+        self.vigilante = None
+        # Último evento del tablero, para las pantallas que se conectan después
+        self.ultimo_tablero = None
+
+    # Registrar una pantalla. Devuelve su cola de eventos, o None si ya hay demasiadas conectadas.
+    def suscribir(self):
+        with self.lock:
+            if len(self.pantallas) >= self.app.config['EVENTOS_MAXIMO_PANTALLAS']:
+                return None
+            cola = queue.Queue(maxsize=EVENTOS_POR_PANTALLA)
+            if self.ultimo_tablero:
+                cola.put_nowait(self.ultimo_tablero)
+            self.pantallas.add(cola)
+
+            # El vigilante se inicia con la primera pantalla del proceso: con preload_app los
+            # hilos creados en el maestro no pasan a los workers
+            if self.vigilante is None:
+                self.vigilante = threading.Thread(target=self.vigilar, name='eventos', daemon=True)
+                self.vigilante.start()
+        return cola
+
+    def cancelar(self, cola):
+        with self.lock:
+            self.pantallas.discard(cola)
+
+    # Despertar al vigilante después de confirmar una escritura de movimientos
+    def avisar(self):
+        self.cambio.set()
+
+    def publicar(self, evento):
+        with self.lock:
+            for cola in self.pantallas:
+                try:
+                    cola.put_nowait(evento)
+                except queue.Full:
+                    pass
+
+    # Hilo vigilante: revisa la versión del tablero al recibir un aviso o cada intervalo y
+    # termina cuando no queda ninguna pantalla conectada
+    def vigilar(self):
+        version = ultimo_movimiento = None
+        while True:
+            with self.lock:
+                if not self.pantallas:
+                    self.vigilante = None
+                    self.ultimo_tablero = None
+                    return
+            try:
+                with self.app.app_context():
+                    version, ultimo_movimiento = self.revisar(version, ultimo_movimiento)
+            except Exception:
+                self.app.logger.exception('Error al leer los cambios del tablero')
+
+            self.cambio.wait(self.app.config['EVENTOS_REVISION_SEGUNDOS'])
+            self.cambio.clear()
+
+    # Publicar los movimientos nuevos y los contadores si cambió la versión del tablero o el
+    # conjunto de canastas vencidas. Devuelve las versiones y el último movimiento ya publicados.
+    def revisar(self, version, ultimo_movimiento):
+        conn = obtener_conexion()
+        barrer_vencidas_si_corresponde(conn)
+        cursor = conn.cursor()
+
+        version_actual = (leer_version(cursor), leer_version(cursor, 'vencidas'))
+        if version_actual == version:
+            return version, ultimo_movimiento
+
+        # La primera revisión solo marca desde dónde se publican los movimientos: las
+        # páginas ya traen los anteriores
+        if ultimo_movimiento is None:
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM movimientos')
+            ultimo_movimiento = cursor.fetchone()[0]
+        else:
+            movimientos = leer_movimientos_nuevos(cursor, ultimo_movimiento)
+            if movimientos:
+                ultimo_movimiento = movimientos[-1]['id']
+                self.publicar(formatear_evento('movimientos', movimientos))
+
+        evento = formatear_evento('tablero', leer_tablero(cursor, version_actual[0]))
+        with self.lock:
+            self.ultimo_tablero = evento
+        self.publicar(evento)
+        return version_actual, ultimo_movimiento
+
+# Enviar los eventos de una pantalla hasta que se desconecta o pasa EVENTOS_DURACION_SEGUNDOS;
+# al cerrarse la conexión el navegador se vuelve a conectar solo y libera el hilo mientras tanto
+def transmitir(difusor, cola, duracion, ping):
+    try:
+        yield f'retry: {RECONEXION_MS}\n\n'
+        fin = time.monotonic() + duracion
+        while (restante := fin - time.monotonic()) > 0:
+            try:
+                yield cola.get(timeout=min(ping, restante))
+            except queue.Empty:
+                # Comentario para mantener viva la conexión y notar las pantallas que se cerraron
+                yield ': ping\n\n'
+    finally:
+        difusor.cancelar(cola)
+
+# Respuesta para una pantalla que no cabe en el proceso. Un error (503) haría que el navegador
+# dejara de reconectarse para siempre; un flujo que solo trae 'retry' y se cierra hace que lo
+# vuelva a intentar pasado ese tiempo, quizá en otro worker.
+def rechazar():
+    yield f'retry: {random.randint(*RECONEXION_OCUPADO_MS)}\n: demasiadas pantallas conectadas\n\n'
+
+@bp.route('/eventos')
+@login_required
+def eventos():
+    config = current_app.config
+    difusor = current_app.extensions['difusor_eventos']
+    cola = difusor.suscribir()
+    if cola is None:
+        flujo = rechazar()
+    else:
+        flujo = transmitir(difusor, cola, config['EVENTOS_DURACION_SEGUNDOS'], config['EVENTOS_PING_SEGUNDOS'])
+
+    respuesta = Response(flujo, mimetype='text/event-stream')
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    # Que un proxy (nginx) no guarde los eventos en su búfer
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
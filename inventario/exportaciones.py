@@ -0,0 +1,99 @@
+# Exportación de informes. Las filas se leen del cursor por lotes y el archivo se envía
+# a medida que se genera, así la memoria usada no depende de la cantidad de filas.
+import csv
+import io
+import tempfile
+
+from flask import Response, send_file, stream_with_context
+
+# Cantidad de filas que se leen del cursor en cada lote
+FILAS_POR_LOTE = 1000
+
+TIPO_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+TIPO_PDF = 'application/pdf'
+
+# Recorrer las filas de un cursor por lotes con fetchmany (o cualquier lista de filas)
+def iterar_filas(filas, tamano=FILAS_POR_LOTE):
+    if not hasattr(filas, 'fetchmany'):
+        yield from filas
+        return
+    while True:
+        lote = filas.fetchmany(tamano)
+        if not lote:
+            break
+        yield from lote
+
+# Recorrer las filas de un cursor como diccionarios con el nombre de cada columna, para las
+# plantillas y respuestas JSON que leen las columnas por nombre
+def iterar_diccionarios(cursor, tamano=FILAS_POR_LOTE):
+    columnas = [columna[0] for columna in cursor.description]
+    for fila in iterar_filas(cursor, tamano):
+        yield dict(zip(columnas, fila))
+
+# Generar el CSV línea por línea, enviando un bloque cada FILAS_POR_LOTE filas
+def generar_csv(encabezado, filas):
+    salida = io.StringIO()
+    writer = csv.writer(salida)
+    writer.writerow(encabezado)
+
+    for numero, fila in enumerate(iterar_filas(filas), start=1):
+        writer.writerow(fila)
+        if numero % FILAS_POR_LOTE == 0:
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+
+    yield salida.getvalue()
+
+# Escribir el CSV en un archivo abierto en modo binario
+def escribir_csv(archivo, encabezado, filas):
+    for bloque in generar_csv(encabezado, filas):
+        archivo.write(bloque.encode('utf-8'))
+
+# Respuesta de descarga CSV que se genera mientras se envía. La consulta ya debe estar
+# ejecutada en el cursor; stream_with_context mantiene abierta la conexión de la petición
+# hasta enviar la última fila.
+def respuesta_csv(nombre_archivo, encabezado, filas):
+    return Response(stream_with_context(generar_csv(encabezado, filas)), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename={nombre_archivo}'
+    })
+
+# Escribir un libro de Excel en modo de solo escritura: cada fila se guarda en disco al
+# agregarla, sin construir el libro completo (ni un DataFrame) en memoria
+def generar_excel(archivo, hoja, encabezado, filas):
+    # openpyxl se carga al generar el primer libro y no al iniciar la aplicación
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja_excel = libro.create_sheet(title=hoja)
+    hoja_excel.append(encabezado)
+    for fila in iterar_filas(filas):
+        hoja_excel.append(fila)
+    libro.save(archivo)
+
+# Generar el archivo en un temporal (en disco, no en memoria) y enviarlo como descarga.
+# El temporal se borra al terminar de enviarlo.
+def respuesta_archivo_temporal(nombre_archivo, tipo, generar, *argumentos):
+    archivo = tempfile.TemporaryFile()
+    try:
+        generar(archivo, *argumentos)
+        archivo.seek(0)
+    except Exception:
+        archivo.close()
+        raise
+    return send_file(archivo, mimetype=tipo, as_attachment=True, download_name=nombre_archivo)
+
+# Respuesta de descarga Excel
+def respuesta_excel(nombre_archivo, hoja, encabezado, filas):
+    return respuesta_archivo_temporal(nombre_archivo, TIPO_EXCEL, generar_excel, hoja, encabezado, filas)
+
+# Escribir un informe PDF paginado (ver pdf.py). reportlab se carga al generar el primer PDF
+# y no al iniciar la aplicación.
+def generar_pdf(archivo, titulo, encabezado, filas, anchos=None):
+    from . import pdf
+
+    pdf.generar_pdf(archivo, titulo, encabezado, filas, anchos)
+
+# Respuesta de descarga PDF
+def respuesta_pdf(nombre_archivo, titulo, encabezado, filas, anchos=None):
+    return respuesta_archivo_temporal(nombre_archivo, TIPO_PDF, generar_pdf, titulo, encabezado, filas, anchos)
@@ -0,0 +1,622 @@
+# Informes, sus exportaciones, descarga de los informes generados en segundo plano y
+# reinicio, archivo de movimientos antiguos y borrado de canastas
+import os
+from datetime import date
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, send_file, session, url_for
+
+from .archivo import adjuntar_archivos_rango, archivar_movimientos, carpeta_archivo, fecha_corte
+from .autenticacion import admin_required, login_required
+from .db import obtener_conexion
+from .directorio import codigo_vendedor, nombres_vendedores
+from .esquema import reconstruir_resumen
+from .exportaciones import (TIPO_EXCEL, TIPO_PDF, escribir_csv, generar_excel, generar_pdf, respuesta_csv,
+                            respuesta_excel, respuesta_pdf)
+from .instantaneas import REINICIO, tomar_instantanea
+from .movimientos import (TAMANO_PAGINA_DEFECTO, TAMANOS_PAGINA, consultar_pagina_movimientos, leer_filtros_movimientos,
+                          leer_posicion, pagina_movimientos)
+from .resumen import (incrementar_version, leer_resumen_canastas, leer_resumen_vendedores,
+                      subconsulta_movimientos_dias)
+from .trabajos import (TERMINADO, encolar_informe, informe_segundo_plano, leer_trabajo, marcar_interrumpidos,
+                       trabajos_recientes)
+
+bp = Blueprint('informes', __name__)
+
+# ===================== Informes en segundo plano =====================
+
+@bp.route('/trabajos/<id_trabajo>')
+@login_required
+def ver_trabajo(id_trabajo):
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    trabajo = leer_trabajo(cursor, id_trabajo)
+    if trabajo is None:
+        flash('El informe no existe o ya fue borrado')
+        return redirect(url_for('tablero.index'))
+
+    return render_template('trabajo.html', trabajo=trabajo, recientes=trabajos_recientes(cursor))
+
+# Estado del trabajo en JSON, consultado periódicamente desde la página del trabajo
+@bp.route('/trabajos/<id_trabajo>/estado')
+@login_required
+def estado_trabajo(id_trabajo):
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    marcar_interrumpidos(cursor, current_app.config['TRABAJOS_MINUTOS_MAXIMOS'])
+    conn.commit()
+
+    trabajo = leer_trabajo(cursor, id_trabajo)
+    if trabajo is None:
+        return {'error': 'El informe no existe o ya fue borrado'}, 404
+
+    return {
+        'estado': trabajo['estado'],
+        'error': trabajo['error'],
+        'descarga': url_for('informes.descargar_trabajo', id_trabajo=id_trabajo) if trabajo['estado'] == TERMINADO else None,
+    }
+
+@bp.route('/trabajos/<id_trabajo>/descargar')
+@login_required
+def descargar_trabajo(id_trabajo):
+    conn = obtener_conexion()
+    trabajo = leer_trabajo(conn.cursor(), id_trabajo)
+    if trabajo is None or trabajo['estado'] != TERMINADO or not os.path.exists(trabajo['archivo']):
+        flash('El archivo del informe no está disponible, vuelve a solicitarlo')
+        return redirect(url_for('tablero.index'))
+
+    return send_file(trabajo['archivo'], mimetype=trabajo['tipo_mime'], as_attachment=True,
+                     download_name=trabajo['nombre_descarga'])
+
+# ===================== Reportes =====================
+
+# Función para generar el informe de canastas
+@bp.route('/generar_informe_canastas')
+@login_required
+def generar_informe_canastas():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    
+    # Obtener el número de canastas disponibles y prestadas
+    total_canastas, disponibles, prestadas = leer_resumen_canastas(cursor)
+    
+    # Renderizar el informe en la plantilla
+    return render_template('informe_canastas.html', disponibles=disponibles, prestadas=prestadas, total_canastas=total_canastas)
+
+# Función para generar el informe de movimientos
+@bp.route('/generar_informe_movimientos')
+@login_required
+def generar_informe_movimientos():
+    return pagina_movimientos('Informe de Movimientos')
+
+
+# Ruta para generar el informe de canastas
+@bp.route('/informe_canastas', methods=['GET'])
+@login_required
+def informe_canastas():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Consulta para obtener el tamaño, color y disponibilidad de las canastas
+        cursor.execute('''
+            SELECT tamano, color,
+                SUM(CASE WHEN actualidad = 'Disponible' THEN 1 ELSE 0 END) AS disponibles,
+                SUM(CASE WHEN actualidad = 'Prestada' THEN 1 ELSE 0 END) AS prestadas,
+                COUNT(*) AS total
+            FROM canastas
+            GROUP BY tamano, color
+        ''')
+
+        canastas = cursor.fetchall()
+
+        # Verificar si no se obtuvieron datos
+        if not canastas:
+            flash('No se encontraron canastas en el informe')
+            return render_template('informe_canastas.html', canastas=canastas)
+
+        # Almacenar los datos de las canastas en la sesión
+        session['canastas'] = canastas
+    
+        # Si se hace una solicitud para exportar el informe a CSV
+        if 'export' in request.args:
+            flash("Exportación a CSV activada")
+            return exportar_a_csv_canastas()
+
+        # Mostrar el informe en una página HTML
+        return render_template('informe_canastas.html', canastas=canastas)
+
+    except Exception as e:
+        flash(f'Ocurrió un error al generar el informe: {e}')
+        return render_template('informe_canastas.html', canastas=[])
+
+def exportar_a_csv_canastas():
+    # Recuperar los datos de las canastas desde la sesión
+    canastas = session.get('canastas', [])
+
+    # Verificar si se recuperaron datos de la sesión
+    if not canastas:
+        flash('No se encontraron datos para exportar')
+        return redirect(url_for('informes.informe_canastas'))
+
+    flash(f"Datos que se exportarán a CSV: {canastas}")
+
+    # Enviar el archivo CSV como respuesta de descarga
+    return respuesta_csv('informe_canastas.csv',
+                         ['Tamaño', 'Color', 'Canastas Disponibles', 'Canastas Prestadas', 'Total Canastas'],
+                         canastas)
+
+
+# Ruta para generar el informe de movimientos
+@bp.route('/informe_movimientos', methods=['GET'])
+@login_required
+def informe_movimientos():
+    try:
+        # Obtener las fechas de inicio y fin del rango desde la URL
+        fecha_inicio = request.args.get('fecha_inicio')
+        fecha_fin = request.args.get('fecha_fin')
+
+        # Verificar si las fechas están presentes en la URL, si no las tomamos de la sesión
+        if not fecha_inicio or not fecha_fin:
+            fecha_inicio = session.get('fecha_inicio')
+            fecha_fin = session.get('fecha_fin')
+
+            if not fecha_inicio or not fecha_fin:
+                flash('Por favor, selecciona un rango de fechas')
+                return render_template('informe_movimientos.html', movimientos=[])
+
+        # Almacenar las fechas en la sesión para su uso en la exportación
+        session['fecha_inicio'] = fecha_inicio
+        session['fecha_fin'] = fecha_fin
+
+        # Las exportaciones se generan en segundo plano (CSV si no se pide Excel o PDF)
+        if 'export' in request.args:
+            formato = request.args.get('export')
+            if formato not in ('excel', 'pdf'):
+                formato = 'csv'
+            return encolar_informe('movimientos', {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin, 'formato': formato})
+
+        # Conectar a la base de datos y realizar la consulta
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        # Totales del rango por tamaño y color (desde el resumen diario)
+        totales = consultar_totales_por_canasta(cursor, fecha_inicio, fecha_fin)
+
+        # Los movimientos se muestran por páginas, como en el historial; el informe completo
+        # está en las exportaciones
+        por_pagina = request.args.get('por_pagina', type=int)
+        if por_pagina not in TAMANOS_PAGINA:
+            por_pagina = TAMANO_PAGINA_DEFECTO
+        despues = leer_posicion(request.args.get('despues'))
+        antes = None if despues else leer_posicion(request.args.get('antes'))
+        filtros = leer_filtros_movimientos({'fecha_desde': fecha_inicio, 'fecha_hasta': fecha_fin})
+        esquemas = ['main'] + adjuntar_archivos_rango(conn, fecha_inicio, fecha_fin)
+        movimientos, hay_anterior, hay_siguiente = consultar_pagina_movimientos(cursor, filtros, por_pagina,
+                                                                                despues, antes, esquemas)
+
+        # Renderizar la plantilla HTML con los movimientos filtrados
+        return render_template('informe_movimientos.html',
+                               movimientos=movimientos,
+                               totales=totales,
+                               total=sum(prestadas + devueltas for _, _, prestadas, devueltas in totales),
+                               hay_anterior=hay_anterior,
+                               hay_siguiente=hay_siguiente,
+                               parametros_pagina={'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin,
+                                                  'por_pagina': por_pagina})
+
+    except Exception as e:
+        flash(f'Ocurrió un error al generar el informe: {e}')
+        return render_template('informe_movimientos.html', movimientos=[])
+
+# Movimientos del rango de fechas (días completos), del más reciente al más antiguo. Si el rango
+# incluye años archivados, se adjuntan sus bases y se consultan junto a la tabla de movimientos.
+def consultar_movimientos_rango(cursor, fecha_inicio, fecha_fin):
+    esquemas = ['main'] + adjuntar_archivos_rango(cursor.connection, fecha_inicio, fecha_fin)
+    consulta = ' UNION ALL '.join(f'''
+        SELECT m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM {esquema}.movimientos m
+        JOIN main.vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.fecha BETWEEN ? AND ?
+    ''' for esquema in esquemas)
+
+    # Ajustar la hora para fecha_inicio a las 12:00 AM y fecha_fin a las 11:59 PM
+    cursor.execute(consulta + ' ORDER BY 1 DESC',
+                   (f"{fecha_inicio} 00:00:00", f"{fecha_fin} 23:59:59") * len(esquemas))
+
+# Informe de movimientos del rango de fechas en CSV, Excel o PDF, generado en segundo plano
+@informe_segundo_plano('movimientos')
+def trabajo_movimientos(cursor, parametros):
+    fecha_inicio = parametros['fecha_inicio']
+    fecha_fin = parametros['fecha_fin']
+    consultar_movimientos_rango(cursor, fecha_inicio, fecha_fin)
+
+    encabezado = ['Fecha', 'Vendedor', 'Tipo', 'Código de Barras']
+    nombre = f'informe_movimientos_{fecha_inicio}_{fecha_fin}'
+    if parametros['formato'] == 'excel':
+        return f'{nombre}.xlsx', TIPO_EXCEL, generar_excel, ('Movimientos', encabezado, cursor)
+    if parametros['formato'] == 'pdf':
+        return (f'{nombre}.pdf', TIPO_PDF, generar_pdf,
+                (f'Movimientos del {fecha_inicio} al {fecha_fin}', encabezado, cursor))
+    return f'{nombre}.csv', 'text/csv', escribir_csv, (encabezado, cursor)
+
+
+# Ruta para generar el informe de movimientos por vendedor de un día o de un rango de días
+@bp.route('/informe_vendedores', methods=['GET'])
+@login_required
+def informe_vendedores():
+    try:
+        # Obtener la fecha de la solicitud y, si se pide un rango, la fecha final
+        fecha = request.args.get('fecha')
+        fecha_fin = request.args.get('fecha_fin') or fecha
+
+        # Verificar si la fecha está presente
+        if not fecha:
+            flash('Por favor, selecciona una fecha')
+            return render_template('informe_vendedores.html', vendedores=[])
+
+        # Conectar a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Número de canastas prestadas y devueltas por vendedor en esas fechas (desde el resumen diario)
+        vendedores = consultar_movimientos_por_vendedor(cursor, fecha, fecha_fin)
+
+        # Si no hay vendedores, devolver un mensaje de error
+        if not vendedores:
+            flash('No se encontraron movimientos para esta fecha')
+            return render_template('informe_vendedores.html', vendedores=[])
+
+        # Nombre de los archivos y título de las exportaciones: el día o el rango
+        if fecha_fin == fecha:
+            periodo, titulo = fecha, f'Movimientos por vendedor del {fecha}'
+        else:
+            periodo, titulo = f'{fecha}_{fecha_fin}', f'Movimientos por vendedor del {fecha} al {fecha_fin}'
+
+        # Si se hace una solicitud para exportar el informe a Excel o CSV
+        if request.args.get('export') == 'excel':
+            return respuesta_excel(f'informe_vendedores_{periodo}.xlsx', 'Vendedores',
+                                   ['Vendedor', 'Canastas Prestadas', 'Canastas Devueltas'],
+                                   vendedores)
+        if request.args.get('export') == 'pdf':
+            return respuesta_pdf(f'informe_vendedores_{periodo}.pdf', titulo,
+                                 ['Vendedor', 'Canastas Prestadas', 'Canastas Devueltas'],
+                                 vendedores)
+        if 'export' in request.args:
+            return exportar_a_csv(vendedores, periodo)
+
+        return render_template('informe_vendedores.html', vendedores=vendedores)
+
+    except Exception as e:
+        flash(f'Ocurrió un error al generar el informe: {e}')
+        return render_template('informe_vendedores.html', vendedores=[])
+
+# Canastas prestadas y devueltas por vendedor entre dos fechas (días completos)
+def consultar_movimientos_por_vendedor(cursor, fecha_inicio, fecha_fin):
+    movimientos_dias, parametros = subconsulta_movimientos_dias(fecha_inicio, fecha_fin, date.today().isoformat())
+    cursor.execute(f'''
+        SELECT v.nombre,
+               SUM(CASE WHEN r.tipo = 'Sale' THEN r.cantidad ELSE 0 END) AS canastas_prestadas,
+               SUM(CASE WHEN r.tipo = 'Entra' THEN r.cantidad ELSE 0 END) AS canastas_devueltas
+        FROM ({movimientos_dias}) r
+        JOIN vendedores v ON r.vendedor_codigo = v.codigo
+        GROUP BY v.nombre
+    ''', parametros)
+    return cursor.fetchall()
+
+# Canastas prestadas y devueltas por tamaño y color entre dos fechas (días completos)
+def consultar_totales_por_canasta(cursor, fecha_inicio, fecha_fin):
+    movimientos_dias, parametros = subconsulta_movimientos_dias(fecha_inicio, fecha_fin, date.today().isoformat())
+    cursor.execute(f'''
+        SELECT r.tamano, r.color,
+               SUM(CASE WHEN r.tipo = 'Sale' THEN r.cantidad ELSE 0 END),
+               SUM(CASE WHEN r.tipo = 'Entra' THEN r.cantidad ELSE 0 END)
+        FROM ({movimientos_dias}) r
+        GROUP BY r.tamano, r.color
+    ''', parametros)
+    return cursor.fetchall()
+
+def exportar_a_csv(vendedores, fecha):
+    # Enviar el archivo CSV como respuesta de descarga
+    return respuesta_csv(f'informe_vendedores_{fecha}.csv',
+                         ['Vendedor', 'Canastas Prestadas', 'Canastas Devueltas'],
+                         vendedores)
+   
+   
+# Ruta para generar el informe de busqueda de canasta
+@bp.route('/informe_buscar_canasta', methods=['GET', 'POST'])
+@login_required
+def informe_buscar_canasta():
+    if request.method == 'POST':
+        # Obtener el código de barras de la canasta ingresado por el usuario
+        codigo_barras = request.form['codigo_barras']
+
+        # Validar que el código de barras no esté vacío
+        if not codigo_barras:
+            flash('Por favor ingrese un código de barras')
+            return render_template('informe_buscar_canasta.html', canasta=None, movimientos=[])
+
+        # Conectar a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Consultar detalles de la canasta (tamaño y color)
+        cursor.execute('''
+            SELECT tamano, color
+            FROM canastas
+            WHERE codigo_barras = ?
+        ''', (codigo_barras,))
+
+        canasta = cursor.fetchone()
+
+        if not canasta:
+            flash('Canasta no encontrada')
+            return render_template('informe_buscar_canasta.html', canasta=None, movimientos=[])
+
+        # Consultar los últimos 30 movimientos de la canasta
+        cursor.execute('''
+            SELECT m.fecha, v.nombre, m.tipo
+            FROM movimientos m
+            JOIN vendedores v ON m.vendedor_codigo = v.codigo
+            WHERE m.codigo_barras = ?
+            ORDER BY m.fecha DESC
+            LIMIT 30
+        ''', (codigo_barras,))
+
+        movimientos = cursor.fetchall()
+
+        # Devolver los resultados de la búsqueda
+        return render_template('informe_buscar_canasta.html', canasta=canasta, movimientos=movimientos)
+
+    return render_template('informe_buscar_canasta.html', canasta=None, movimientos=[])
+
+# Consultar los últimos 30 movimientos de una canasta para exportarlos.
+# Devuelve la canasta (tamaño y color) o None si no existe; los movimientos quedan en el cursor.
+def consultar_movimientos_canasta(cursor, codigo_barras):
+    # Consultar detalles de la canasta (tamaño y color)
+    cursor.execute('''
+        SELECT tamano, color
+        FROM canastas
+        WHERE codigo_barras = ?
+    ''', (codigo_barras,))
+
+    canasta = cursor.fetchone()
+    if not canasta:
+        return None
+
+    cursor.execute('''
+        SELECT m.fecha, v.nombre, m.tipo
+        FROM movimientos m
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo
+        WHERE m.codigo_barras = ?
+        ORDER BY m.fecha DESC
+        LIMIT 30
+    ''', (codigo_barras,))
+    return canasta
+
+@bp.route('/exportar_csv_canasta', methods=['GET'])
+@login_required
+def exportar_csv_canasta():
+    # Recuperar el código de barras de la URL
+    codigo_barras = request.args.get('codigo_barras')
+
+    # Conectar a la base de datos
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    if not consultar_movimientos_canasta(cursor, codigo_barras):
+        flash('Canasta no encontrada')
+        return redirect(url_for('informes.informe_buscar_canasta'))
+
+    # Enviar el archivo CSV mientras se leen las filas del cursor
+    return respuesta_csv(f'movimientos_canasta_{codigo_barras}.csv',
+                         ['Fecha y Hora', 'Vendedor', 'Tipo de Movimiento'],
+                         cursor)
+
+@bp.route('/exportar_pdf_canasta', methods=['GET'])
+@login_required
+def exportar_pdf_canasta():
+    codigo_barras = request.args.get('codigo_barras')
+
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    canasta = consultar_movimientos_canasta(cursor, codigo_barras)
+    if not canasta:
+        flash('Canasta no encontrada')
+        return redirect(url_for('informes.informe_buscar_canasta'))
+
+    return respuesta_pdf(f'movimientos_canasta_{codigo_barras}.pdf',
+                         f'Movimientos de la canasta {codigo_barras} ({canasta[0]}, {canasta[1]})',
+                         ['Fecha y Hora', 'Vendedor', 'Tipo de Movimiento'],
+                         cursor)
+
+
+# Ruta para generar el informe de cuantas y cuales canastas tiene prestadas un vendedor
+@bp.route('/informe_canastas_por_vendedor', methods=['GET', 'POST'])
+@login_required
+def informe_canastas_por_vendedor():
+    # Obtener la lista de vendedores para mostrarla en el formulario
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    vendedores = nombres_vendedores(cursor)
+
+    # Exportar a PDF las canastas prestadas del vendedor indicado en la URL
+    if request.args.get('export') == 'pdf':
+        return exportar_pdf_canastas_vendedor(cursor, request.args.get('vendedor', ''))
+
+    # Si el formulario se envía
+    if request.method == 'POST':
+        # Obtener el vendedor seleccionado
+        vendedor_nombre = request.form['vendedor']
+
+        # Consultar el código del vendedor
+        vendedor_codigo = codigo_vendedor(cursor, vendedor_nombre)
+
+        if not vendedor_codigo:
+            flash('Vendedor no encontrado')
+            return render_template('informe_canastas_por_vendedor.html', vendedores=vendedores, canastas=[], resumen={})
+
+        # Obtener las canastas prestadas activas (no devueltas) según su portador actual
+        cursor.execute('''
+            SELECT tamano, color, COUNT(*) 
+            FROM canastas
+            WHERE vendedor_actual = ? AND actualidad = 'Prestada'
+            GROUP BY tamano, color
+        ''', (vendedor_codigo,))
+
+        resumen = cursor.fetchall()
+
+        # Obtener los detalles de las canastas prestadas y no devueltas
+        cursor.execute('''
+            SELECT codigo_barras, tamano, color, fecha_ultimo_movimiento 
+            FROM canastas
+            WHERE vendedor_actual = ? AND actualidad = 'Prestada'
+            ORDER BY fecha_ultimo_movimiento DESC
+        ''', (vendedor_codigo,))
+
+        canastas = cursor.fetchall()
+
+        # Devolver los resultados del informe
+        return render_template('informe_canastas_por_vendedor.html', vendedores=vendedores, canastas=canastas, resumen=resumen)
+
+    # Si el formulario no se envía, mostrar la lista de vendedores
+    return render_template('informe_canastas_por_vendedor.html', vendedores=vendedores, canastas=[], resumen={})
+
+def exportar_pdf_canastas_vendedor(cursor, vendedor_nombre):
+    vendedor_codigo = codigo_vendedor(cursor, vendedor_nombre)
+    if not vendedor_codigo:
+        flash('Vendedor no encontrado')
+        return redirect(url_for('informes.informe_canastas_por_vendedor'))
+
+    cursor.execute('''
+        SELECT codigo_barras, tamano, color, fecha_ultimo_movimiento
+        FROM canastas
+        WHERE vendedor_actual = ? AND actualidad = 'Prestada'
+        ORDER BY fecha_ultimo_movimiento DESC
+    ''', (vendedor_codigo,))
+
+    return respuesta_pdf(f'canastas_prestadas_{vendedor_nombre}.pdf', f'Canastas prestadas a {vendedor_nombre}',
+                         ['Código de Barras', 'Tamaño', 'Color', 'Fecha de Préstamo'],
+                         cursor)
+
+
+# Ruta para generar el informe de cuantas canastas tiene prestadas por vendedor
+@bp.route('/informe_canastas_prestadas_por_vendedor', methods=['GET'])
+@login_required
+def informe_canastas_prestadas_por_vendedor():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Si se hace una solicitud para exportar el informe a CSV
+        if 'export' in request.args and request.args.get('export') not in ('excel', 'pdf'):
+            return exportar_a_csv_canastas_prestadas()
+
+        # Contar cuántas canastas tiene prestadas cada vendedor (desde el resumen)
+        canastas_prestadas = leer_resumen_vendedores(cursor, orden='r.prestadas_activas DESC')
+
+        if request.args.get('export') == 'excel':
+            return respuesta_excel('canastas_prestadas_por_vendedor.xlsx', 'Canastas prestadas',
+                                   ['Vendedor', 'Canastas Prestadas'],
+                                   canastas_prestadas)
+        if request.args.get('export') == 'pdf':
+            return respuesta_pdf('canastas_prestadas_por_vendedor.pdf', 'Canastas prestadas por vendedor',
+                                 ['Vendedor', 'Canastas Prestadas'],
+                                 canastas_prestadas)
+
+        # Renderizar el informe en una página HTML
+        return render_template('informe_canastas_prestadas_por_vendedor.html', canastas_prestadas=canastas_prestadas)
+
+    except Exception as e:
+        flash(f'Ocurrió un error al generar el informe: {e}')
+        return render_template('informe_canastas_prestadas_por_vendedor.html', canastas_prestadas=[])
+
+
+# Función para exportar el informe de canastas prestadas a CSV
+@bp.route('/exportar_csv_canastas_prestadas', methods=['GET'])
+@login_required
+def exportar_a_csv_canastas_prestadas():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    # Cantidad de canastas prestadas por vendedor, leída del resumen (una fila por vendedor)
+    canastas_prestadas = leer_resumen_vendedores(cursor, orden='r.prestadas_activas DESC')
+
+    # Enviar el archivo CSV como respuesta de descarga
+    return respuesta_csv('canastas_prestadas_por_vendedor.csv',
+                         ['Vendedor', 'Canastas Prestadas'],
+                         canastas_prestadas)
+
+
+# Función para reiniciar las canastas a disponibles. El historial de movimientos se conserva:
+# el reinicio queda guardado como una instantánea y el estado se reconstruye desde ella.
+@bp.route('/borrar_movimientos', methods=['POST'])
+@login_required
+@admin_required
+def borrar_movimientos():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Actualizar la actualidad de todas las canastas a 'Disponible' y quitar su portador
+        cursor.execute('''
+            UPDATE canastas SET actualidad = 'Disponible', vendedor_actual = NULL,
+                fecha_ultimo_movimiento = NULL, fecha_vencimiento = NULL
+        ''')
+        cursor.execute('DELETE FROM canastas_vencidas')
+        cursor.execute('DELETE FROM resumen_vendedores')
+
+        # Guardar el reinicio y recalcular los contadores del tablero desde él
+        instantanea = tomar_instantanea(cursor, REINICIO, current_app.config['INSTANTANEAS_CONSERVAR'])
+        reconstruir_resumen(cursor, instantanea)
+        incrementar_version(cursor)
+
+        conn.commit()
+
+        flash('Las canastas han sido actualizadas a "Disponible"; el historial de movimientos se conserva')
+    except Exception as e:
+        flash(f'Ocurrió un error al reiniciar las canastas: {e}')
+    return redirect(url_for('tablero.index'))
+
+
+# Pasar al archivo por año los préstamos cerrados con más de ARCHIVO_MESES meses
+@bp.route('/archivar_movimientos', methods=['POST'])
+@login_required
+@admin_required
+def archivar_movimientos_antiguos():
+    try:
+        conn = obtener_conexion()
+        corte = fecha_corte(current_app.config['ARCHIVO_MESES'])
+        archivados = archivar_movimientos(conn, carpeta_archivo(current_app), corte,
+                                          current_app.config['INSTANTANEAS_CONSERVAR'])
+        total = sum(cantidad for _, cantidad in archivados)
+        flash(f'{total} movimientos anteriores al {corte} archivados')
+    except Exception as e:
+        flash(f'Ocurrió un error al archivar los movimientos: {e}')
+    return redirect(url_for('tablero.index'))
+
+
+# Función borrar todas las canastas
+@bp.route('/borrar_canastas', methods=['POST'])
+@login_required
+@admin_required
+def borrar_canastas():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Borrar todas las canastas y sus contadores
+        cursor.execute('DELETE FROM canastas')
+        cursor.execute('DELETE FROM resumen_canastas')
+        cursor.execute('DELETE FROM canastas_vencidas')
+        incrementar_version(cursor)
+
+        conn.commit()
+
+        flash('Todas las canastas han sido borradas')
+    except Exception as e:
+        flash(f'Ocurrió un error al borrar las canastas: {e}')
+    return redirect(url_for('tablero.index'))
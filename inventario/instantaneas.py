@@ -0,0 +1,217 @@
+# Instantáneas del estado y reproducción de movimientos.
+#
+# La tabla movimientos es el registro de todo lo que pasó: solo se agregan filas y su id es el
+# número de secuencia. Una instantánea guarda el estado de cada canasta (actualidad, portador y
+# fecha del último movimiento) y los préstamos activos por vendedor hasta un movimiento. El
+# estado se puede reconstruir desde la última instantánea más los movimientos posteriores, y
+# reiniciar las canastas (borrar_movimientos) es una instantánea más, sin borrar el historial.
+# Solo se pueden sacar de movimientos (archivar) los que ya cubre la última instantánea.
+# Las tablas y los triggers que impiden modificar movimientos se crean en esquema.py.
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from .db import obtener_conexion
+from .esquema import reconstruir_resumen
+from .resumen import incrementar_version
+from .vencimientos import recalcular_vencimientos
+
+# Motivos de una instantánea
+PERIODICA = 'periodica'
+MANUAL = 'manual'
+REINICIO = 'reinicio'
+ARCHIVO = 'archivo'
+
+# Última instantánea como (id, último movimiento incluido), o None si no hay ninguna
+def ultima_instantanea(cursor):
+    cursor.execute('SELECT id, movimiento_id FROM instantaneas ORDER BY id DESC LIMIT 1')
+    return cursor.fetchone()
+
+# Último movimiento incluido en el último reinicio de las canastas, o 0 si nunca se reiniciaron
+def ultimo_reinicio(cursor):
+    cursor.execute('SELECT COALESCE(MAX(movimiento_id), 0) FROM instantaneas WHERE motivo = ?', (REINICIO,))
+    return cursor.fetchone()[0]
+
+# Instantánea del último reinicio de las canastas como (id, último movimiento incluido), o None
+def instantanea_reinicio(cursor):
+    cursor.execute('SELECT id, movimiento_id FROM instantaneas WHERE motivo = ? ORDER BY id DESC LIMIT 1', (REINICIO,))
+    return cursor.fetchone()
+
+def leer_instantanea(cursor, instantanea_id):
+    cursor.execute('SELECT id, movimiento_id FROM instantaneas WHERE id = ?', (instantanea_id,))
+    return cursor.fetchone()
+
+# Guardar el estado actual de las canastas y de los vendedores en la transacción abierta.
+# Conserva solo las 'conservar' más recientes. Devuelve (id, último movimiento incluido).
+def tomar_instantanea(cursor, motivo, conservar=None):
+    # El INSERT abre la transacción de escritura: ningún movimiento nuevo entra hasta el commit
+    cursor.execute('''
+        INSERT INTO instantaneas (movimiento_id, motivo, creado)
+        SELECT COALESCE(MAX(id), 0), ?, ? FROM movimientos
+    ''', (motivo, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    instantanea_id = cursor.lastrowid
+
+    cursor.execute('''
+        INSERT INTO instantaneas_canastas (instantanea_id, codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento)
+        SELECT ?, codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento FROM canastas
+    ''', (instantanea_id,))
+    cursor.execute('''
+        INSERT INTO instantaneas_vendedores (instantanea_id, vendedor_codigo, prestadas_activas)
+        SELECT ?, vendedor_codigo, prestadas_activas FROM resumen_vendedores WHERE prestadas_activas != 0
+    ''', (instantanea_id,))
+
+    # El último reinicio se conserva siempre: marca desde dónde cuentan los movimientos
+    if conservar:
+        cursor.execute('SELECT id FROM instantaneas ORDER BY id DESC LIMIT 1 OFFSET ?', (conservar - 1,))
+        mas_antigua = cursor.fetchone()
+        if mas_antigua:
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM instantaneas WHERE motivo = ?', (REINICIO,))
+            reinicio = cursor.fetchone()[0]
+            for tabla in ('instantaneas_canastas', 'instantaneas_vendedores'):
+                cursor.execute(f'DELETE FROM {tabla} WHERE instantanea_id < ? AND instantanea_id != ?',
+                               (mas_antigua[0], reinicio))
+            cursor.execute('DELETE FROM instantaneas WHERE id < ? AND id != ?', (mas_antigua[0], reinicio))
+
+    return leer_instantanea(cursor, instantanea_id)
+
+# Movimientos registrados después de la última instantánea
+def movimientos_sin_instantanea(cursor):
+    cursor.execute('''
+        SELECT COALESCE(MAX(id), 0) - COALESCE((SELECT MAX(movimiento_id) FROM instantaneas), 0)
+        FROM movimientos
+    ''')
+    return cursor.fetchone()[0]
+
+# Momento de la última revisión de instantáneas hecha por este proceso
+ultima_revision_instantaneas = None
+
+# Pedir una instantánea periódica si desde la última se registraron suficientes movimientos.
+# Se revisa como mucho una vez por intervalo en cada proceso, y la instantánea se toma en el
+# ejecutor de trabajos: la petición que la detecta no paga la copia de las canastas.
+def tomar_instantanea_si_corresponde(conn):
+    global ultima_revision_instantaneas
+    config = current_app.config
+    ahora = time.monotonic()
+    if ultima_revision_instantaneas is not None and ahora - ultima_revision_instantaneas < config['INSTANTANEAS_REVISION_SEGUNDOS']:
+        return
+    ultima_revision_instantaneas = ahora
+
+    if movimientos_sin_instantanea(conn.cursor()) >= config['INSTANTANEAS_CADA_MOVIMIENTOS']:
+        current_app.extensions['ejecutor_trabajos'].submit(tomar_instantanea_periodica, current_app._get_current_object())
+
+# Se ejecuta en un hilo del ejecutor, con su propia conexión del pool
+def tomar_instantanea_periodica(app):
+    with app.app_context():
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        try:
+            # Se vuelve a contar con el bloqueo de escritura tomado: otro worker pudo tomarla antes
+            cursor.execute('BEGIN IMMEDIATE')
+            if movimientos_sin_instantanea(cursor) >= app.config['INSTANTANEAS_CADA_MOVIMIENTOS']:
+                tomar_instantanea(cursor, PERIODICA, app.config['INSTANTANEAS_CONSERVAR'])
+            conn.commit()
+        except Exception:
+            app.logger.exception('Error al tomar la instantánea periódica')
+
+# Calcular en la tabla temporal estado_reproducido el estado de cada canasta según la instantánea
+# (o el estado actual si no está en ella) y su último movimiento posterior. Como en
+# aplicar_movimientos, solo cambian de actualidad las canastas disponibles o prestadas.
+def reproducir_canastas(cursor, instantanea):
+    instantanea_id, ultimo_movimiento = instantanea
+    cursor.execute('DROP TABLE IF EXISTS temp.estado_reproducido')
+    cursor.execute('''
+        CREATE TEMP TABLE estado_reproducido (
+            codigo_barras TEXT PRIMARY KEY,
+            actualidad TEXT,
+            vendedor_actual TEXT,
+            fecha_ultimo_movimiento TEXT
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO estado_reproducido (codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento)
+        SELECT c.codigo_barras,
+               CASE WHEN i.codigo_barras IS NULL THEN c.actualidad ELSE i.actualidad END,
+               CASE WHEN i.codigo_barras IS NULL THEN c.vendedor_actual ELSE i.vendedor_actual END,
+               CASE WHEN i.codigo_barras IS NULL THEN c.fecha_ultimo_movimiento ELSE i.fecha_ultimo_movimiento END
+        FROM canastas c
+        LEFT JOIN instantaneas_canastas i ON i.instantanea_id = ? AND i.codigo_barras = c.codigo_barras
+    ''', (instantanea_id,))
+    cursor.execute('''
+        UPDATE estado_reproducido SET
+            actualidad = CASE
+                WHEN estado_reproducido.actualidad NOT IN ('Disponible', 'Prestada') THEN estado_reproducido.actualidad
+                WHEN m.tipo = 'Sale' THEN 'Prestada'
+                ELSE 'Disponible'
+            END,
+            vendedor_actual = CASE WHEN m.tipo = 'Sale' THEN m.vendedor_codigo END,
+            fecha_ultimo_movimiento = m.fecha
+        FROM (
+            SELECT codigo_barras, MAX(id) AS id FROM movimientos WHERE id > ? GROUP BY codigo_barras
+        ) ultimos
+        JOIN movimientos m ON m.id = ultimos.id
+        WHERE ultimos.codigo_barras = estado_reproducido.codigo_barras
+    ''', (ultimo_movimiento,))
+
+# Contar las canastas cuyo estado guardado no coincide con el reproducido
+def contar_diferencias_canastas(cursor):
+    cursor.execute('''
+        SELECT COUNT(*)
+        FROM canastas c
+        JOIN estado_reproducido e ON e.codigo_barras = c.codigo_barras
+        WHERE c.actualidad IS NOT e.actualidad
+           OR c.vendedor_actual IS NOT e.vendedor_actual
+           OR c.fecha_ultimo_movimiento IS NOT e.fecha_ultimo_movimiento
+    ''')
+    return cursor.fetchone()[0]
+
+# Contar los vendedores cuyos préstamos activos guardados no coinciden con los reproducidos
+def contar_diferencias_vendedores(cursor, instantanea):
+    instantanea_id, ultimo_movimiento = instantanea
+    cursor.execute('''
+        SELECT COUNT(*) FROM (
+            SELECT vendedor_codigo, SUM(cantidad) AS cantidad
+            FROM (
+                SELECT vendedor_codigo, prestadas_activas AS cantidad FROM resumen_vendedores
+                UNION ALL
+                SELECT vendedor_codigo, -prestadas_activas FROM instantaneas_vendedores WHERE instantanea_id = ?
+                UNION ALL
+                SELECT vendedor_codigo, CASE WHEN tipo = 'Sale' THEN -1 ELSE 1 END FROM movimientos WHERE id > ?
+            )
+            GROUP BY vendedor_codigo
+        )
+        WHERE cantidad != 0
+    ''', (instantanea_id, ultimo_movimiento))
+    return cursor.fetchone()[0]
+
+# Reconstruir el estado de las canastas y los contadores desde la instantánea indicada (o la
+# última; (None, 0) para todo el historial) más los movimientos posteriores, en la transacción
+# abierta. Con 'verificar' solo cuenta las diferencias sin escribir. Devuelve (instantánea usada,
+# movimientos reproducidos, canastas distintas, vendedores distintos).
+def reproducir_movimientos(cursor, instantanea=None, verificar=False):
+    instantanea = instantanea or ultima_instantanea(cursor) or (None, 0)
+    cursor.execute('SELECT COUNT(*) FROM movimientos WHERE id > ?', (instantanea[1],))
+    reproducidos = cursor.fetchone()[0]
+
+    reproducir_canastas(cursor, instantanea)
+    canastas = contar_diferencias_canastas(cursor)
+    vendedores = contar_diferencias_vendedores(cursor, instantanea)
+
+    if not verificar:
+        cursor.execute('''
+            UPDATE canastas SET
+                actualidad = e.actualidad,
+                vendedor_actual = e.vendedor_actual,
+                fecha_ultimo_movimiento = e.fecha_ultimo_movimiento
+            FROM estado_reproducido e
+            WHERE e.codigo_barras = canastas.codigo_barras
+            AND (canastas.actualidad IS NOT e.actualidad
+                 OR canastas.vendedor_actual IS NOT e.vendedor_actual
+                 OR canastas.fecha_ultimo_movimiento IS NOT e.fecha_ultimo_movimiento)
+        ''')
+        reconstruir_resumen(cursor, instantanea)
+        recalcular_vencimientos(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        incrementar_version(cursor)
+
+    cursor.execute('DROP TABLE temp.estado_reproducido')
+    return instantanea, reproducidos, canastas, vendedores
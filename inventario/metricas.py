@@ -0,0 +1,342 @@
+# Métricas de la aplicación en el formato de texto de Prometheus (/metrics).
+#
+# Se mide la duración de cada petición por ruta, el tiempo y las filas de cada consulta SQL (las
+# conexiones del pool son ConexionMedida), el tiempo de dibujar cada plantilla y cada gráfico y
+# la duración de los informes en segundo plano. Las peticiones y consultas que pasan los umbrales
+# METRICAS_PETICION_LENTA_MS y METRICAS_CONSULTA_LENTA_MS se escriben en el registro como lentas.
+#
+# Cada proceso acumula sus mediciones en memoria y cada METRICAS_VOLCADO_SEGUNDOS (al terminar
+# una petición) las suma a la tabla metricas de la base de datos, y también al salir. /metrics
+# publica la tabla, así que los totales son los de todos los workers, no se pierden cuando
+# gunicorn reemplaza un worker y no depende de a qué worker llegue Prometheus. Lo medido por los
+# demás workers aparece con hasta un intervalo de retraso.
+import atexit
+import bisect
+import functools
+import hmac
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from flask import (Blueprint, Response, before_render_template, current_app, g, has_request_context,
+                   request, session, template_rendered)
+
+bp = Blueprint('metricas', __name__)
+
+registro = logging.getLogger(__name__)
+
+# Límites de los histogramas, en segundos
+LIMITES_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LIMITES_CONSULTA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+LIMITES_TRABAJO = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+
+# Largo máximo del texto de una consulta en las etiquetas y en el registro
+LARGO_CONSULTA = 300
+
+# Valor de una etiqueta escapado según el formato de Prometheus
+def escapar_etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def formatear_etiquetas(nombres, valores):
+    return ','.join(f'{nombre}="{escapar_etiqueta(valor)}"' for nombre, valor in zip(nombres, valores))
+
+# Los valores se guardan como REAL: las cantidades se escriben sin decimales
+def formatear_valor(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(valor)
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def sumar(self, valores, cantidad=1):
+        with self.lock:
+            self.series[valores] = self.series.get(valores, 0) + cantidad
+
+    # Sacar lo medido desde el último volcado como filas (etiquetas, campo, valor) de la tabla metricas
+    def extraer(self):
+        with self.lock:
+            series, self.series = self.series, {}
+        return series, [(json.dumps(valores), '', total) for valores, total in series.items()]
+
+    # Devolver lo extraído si no se pudo guardar
+    def devolver(self, series):
+        for valores, total in series.items():
+            self.sumar(valores, total)
+
+    def exportar(self, series):
+        for valores, campos in sorted(series.items()):
+            yield f'{self.nombre}{{{formatear_etiquetas(self.etiquetas, valores)}}} {formatear_valor(campos.get("", 0))}'
+
+class Histograma:
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        # Por serie: cantidad de observaciones en cada intervalo (la última, por encima del
+        # mayor límite), suma de los valores y cantidad total
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observar(self, valores, segundos):
+        with self.lock:
+            serie = self.series.get(valores)
+            if serie is None:
+                serie = self.series[valores] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][bisect.bisect_left(self.limites, segundos)] += 1
+            serie[1] += segundos
+            serie[2] += 1
+
+    def extraer(self):
+        with self.lock:
+            series, self.series = self.series, {}
+        filas = []
+        for valores, (intervalos, suma, cantidad) in series.items():
+            etiquetas = json.dumps(valores)
+            filas.append((etiquetas, 'suma', suma))
+            filas.append((etiquetas, 'cantidad', cantidad))
+            filas.extend((etiquetas, str(limite), cantidad_intervalo)
+                         for limite, cantidad_intervalo in zip(self.limites + ('+Inf',), intervalos)
+                         if cantidad_intervalo)
+        return series, filas
+
+    def devolver(self, series):
+        with self.lock:
+            for valores, (intervalos, suma, cantidad) in series.items():
+                serie = self.series.setdefault(valores, [[0] * (len(self.limites) + 1), 0.0, 0])
+                serie[0] = [a + b for a, b in zip(serie[0], intervalos)]
+                serie[1] += suma
+                serie[2] += cantidad
+
+    def exportar(self, series):
+        for valores, campos in sorted(series.items()):
+            etiquetas = formatear_etiquetas(self.etiquetas, valores)
+            acumulado = 0
+            for limite in self.limites + ('+Inf',):
+                acumulado += campos.get(str(limite), 0)
+                yield f'{self.nombre}_bucket{{{etiquetas},le="{limite}"}} {formatear_valor(acumulado)}'
+            yield f'{self.nombre}_sum{{{etiquetas}}} {formatear_valor(campos.get("suma", 0))}'
+            yield f'{self.nombre}_count{{{etiquetas}}} {formatear_valor(campos.get("cantidad", 0))}'
+
+duracion_peticiones = Histograma('inventario_peticion_segundos', 'Duración de las peticiones por ruta',
+                                 ('endpoint', 'metodo'), LIMITES_PETICION)
+peticiones = Contador('inventario_peticiones_total', 'Peticiones por ruta y código de respuesta',
+                      ('endpoint', 'metodo', 'estado'))
+duracion_consultas = Histograma('inventario_sql_segundos', 'Tiempo de ejecución de cada consulta SQL hasta la primera fila',
+                                ('consulta',), LIMITES_CONSULTA)
+filas_consultas = Contador('inventario_sql_filas_total', 'Filas leídas o modificadas por cada consulta SQL', ('consulta',))
+errores_consultas = Contador('inventario_sql_errores_total', 'Consultas SQL que terminaron con error', ('consulta',))
+duracion_plantillas = Histograma('inventario_plantilla_segundos', 'Tiempo de dibujar cada plantilla',
+                                 ('plantilla',), LIMITES_PETICION)
+duracion_graficos = Histograma('inventario_grafico_segundos', 'Tiempo de dibujar cada gráfico',
+                               ('grafico',), LIMITES_PETICION)
+duracion_trabajos = Histograma('inventario_trabajo_segundos', 'Duración de los informes en segundo plano',
+                               ('tipo', 'estado'), LIMITES_TRABAJO)
+
+METRICAS = (duracion_peticiones, peticiones, duracion_consultas, filas_consultas, errores_consultas,
+            duracion_plantillas, duracion_graficos, duracion_trabajos)
+
+# ===================== Volcado a la base de datos =====================
+
+# Conexión propia del proceso para el volcado: no es del pool, así no se mide a sí misma ni
+# confirma la transacción de una petición
+conexion_volcado = None
+volcado_lock = threading.Lock()
+# Momento del último volcado hecho por este proceso
+ultimo_volcado = time.monotonic()
+
+# Sumar a la tabla metricas lo medido por este proceso desde el último volcado
+def volcar_metricas(ruta):
+    global conexion_volcado, ultimo_volcado
+    with volcado_lock:
+        ultimo_volcado = time.monotonic()
+        extraidas = [(metrica, *metrica.extraer()) for metrica in METRICAS]
+        try:
+            if conexion_volcado is None:
+                conexion_volcado = sqlite3.connect(ruta, check_same_thread=False)
+                conexion_volcado.execute('PRAGMA busy_timeout = 10000')
+            with conexion_volcado:
+                for metrica, _, filas in extraidas:
+                    conexion_volcado.executemany('''
+                        INSERT INTO metricas (metrica, etiquetas, campo, valor) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(metrica, etiquetas, campo) DO UPDATE SET valor = valor + excluded.valor
+                    ''', [(metrica.nombre, *fila) for fila in filas])
+        except sqlite3.Error:
+            registro.exception('No se pudieron guardar las métricas')
+            for metrica, series, _ in extraidas:
+                metrica.devolver(series)
+
+def volcar_si_corresponde(app):
+    if time.monotonic() - ultimo_volcado >= app.config['METRICAS_VOLCADO_SEGUNDOS']:
+        volcar_metricas(app.config['BASE_DATOS'])
+
+# Un worker de gunicorn nace de una copia del maestro: empieza sin las mediciones del maestro
+# (ya las vuelca el maestro) y sin su conexión
+def reiniciar_en_proceso_hijo():
+    global conexion_volcado, ultimo_volcado
+    conexion_volcado = None
+    ultimo_volcado = time.monotonic()
+    for metrica in METRICAS:
+        metrica.extraer()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reiniciar_en_proceso_hijo)
+
+# Texto de las métricas de todos los procesos: primero se vuelca lo de este proceso y después
+# se lee la tabla metricas
+def exportar_metricas(ruta):
+    volcar_metricas(ruta)
+    with volcado_lock:
+        filas = conexion_volcado.execute('SELECT metrica, etiquetas, campo, valor FROM metricas').fetchall()
+    guardadas = {}
+    for metrica, etiquetas, campo, valor in filas:
+        guardadas.setdefault(metrica, {}).setdefault(tuple(json.loads(etiquetas)), {})[campo] = valor
+
+    lineas = []
+    for metrica in METRICAS:
+        lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+        lineas.extend(metrica.exportar(guardadas.get(metrica.nombre, {})))
+    return '\n'.join(lineas) + '\n'
+
+# ===================== Consultas SQL =====================
+
+# Texto de una consulta para agruparla: sin saltos de línea ni espacios repetidos, y con las
+# listas de marcadores (IN (?, ?, ...)) reducidas a una, para no crear una serie por tamaño de lote
+@functools.lru_cache(maxsize=1024)
+def normalizar_consulta(sql):
+    sql = ' '.join(sql.split())
+    return re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', sql)[:LARGO_CONSULTA]
+
+# Registrar una consulta ya ejecutada y escribirla en el registro si fue lenta
+def registrar_consulta(umbral, sql, segundos, filas):
+    consulta = normalizar_consulta(sql)
+    duracion_consultas.observar((consulta,), segundos)
+    if filas:
+        filas_consultas.sumar((consulta,), filas)
+    if umbral is not None and segundos >= umbral:
+        ruta = request.endpoint if has_request_context() else None
+        registro.warning('Consulta lenta (%.0f ms, ruta %s): %s', segundos * 1000, ruta, consulta)
+
+# Cursor que mide cada execute y cuenta las filas modificadas (rowcount) y las leídas con fetch*
+class CursorMedido(sqlite3.Cursor):
+    sql = None
+
+    def execute(self, sql, parametros=()):
+        return self.medir(super().execute, sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.medir(super().executemany, sql, parametros)
+
+    def medir(self, ejecutar, sql, parametros):
+        inicio = time.perf_counter()
+        try:
+            resultado = ejecutar(sql, parametros)
+        except sqlite3.Error:
+            errores_consultas.sumar((normalizar_consulta(sql),))
+            raise
+        self.sql = sql
+        registrar_consulta(self.connection.umbral_consulta_lenta, sql, time.perf_counter() - inicio, max(self.rowcount, 0))
+        return resultado
+
+    def contar_filas(self, filas):
+        if self.sql is not None and filas:
+            filas_consultas.sumar((normalizar_consulta(self.sql),), filas)
+
+    def fetchone(self):
+        fila = super().fetchone()
+        self.contar_filas(0 if fila is None else 1)
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self.contar_filas(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = super().fetchall()
+        self.contar_filas(len(filas))
+        return filas
+
+# Conexión del pool: sus cursores (también los de conn.execute) son CursorMedido
+class ConexionMedida(sqlite3.Connection):
+    # Segundos a partir de los que una consulta se registra como lenta (None: nunca)
+    umbral_consulta_lenta = None
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+# ===================== Peticiones y plantillas =====================
+
+def iniciar_peticion():
+    g.inicio_peticion = time.perf_counter()
+
+def guardar_estado_peticion(respuesta):
+    g.estado_peticion = respuesta.status_code
+    return respuesta
+
+# Registrar la duración de la petición al terminar; si no llegó a haber respuesta, fue un error 500
+def terminar_peticion(error):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'sin_ruta'
+    duracion_peticiones.observar((endpoint, request.method), segundos)
+    peticiones.sumar((endpoint, request.method, str(g.pop('estado_peticion', 500))))
+
+    umbral = current_app.config['METRICAS_PETICION_LENTA_MS']
+    if umbral and segundos * 1000 >= umbral:
+        registro.warning('Petición lenta (%.0f ms): %s %s', segundos * 1000, request.method, request.full_path)
+
+    volcar_si_corresponde(current_app)
+
+def iniciar_plantilla(sender, template, context, **extra):
+    g.setdefault('inicio_plantillas', []).append(time.perf_counter())
+
+def terminar_plantilla(sender, template, context, **extra):
+    inicios = g.get('inicio_plantillas')
+    if inicios:
+        duracion_plantillas.observar((template.name,), time.perf_counter() - inicios.pop())
+
+# Medir las peticiones y las plantillas de la aplicación
+def iniciar_metricas(app):
+    app.before_request(iniciar_peticion)
+    app.after_request(guardar_estado_peticion)
+    app.teardown_request(terminar_peticion)
+    before_render_template.connect(iniciar_plantilla, app)
+    template_rendered.connect(terminar_plantilla, app)
+    # Lo medido desde el último volcado se guarda también al apagar el proceso
+    atexit.register(volcar_metricas, app.config['BASE_DATOS'])
+
+# Las métricas se piden con el token de METRICAS_TOKEN (Authorization: Bearer) o, si no hay
+# token configurado, con una sesión de administrador
+@bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICAS_TOKEN']
+    if token:
+        autorizado = hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        autorizado = session.get('role') == 'admin'
+    if not autorizado:
+        return Response('No autorizado', status=401, mimetype='text/plain')
+
+    return Response(exportar_metricas(current_app.config['BASE_DATOS']), mimetype='text/plain; version=0.0.4')
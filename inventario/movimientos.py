@@ -0,0 +1,439 @@
+# Registro de movimientos (uno a uno, por API y por lotes) e historial de movimientos
+import re
+import sqlite3
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, session, url_for
+
+from .autenticacion import login_required
+from .db import obtener_conexion
+from .instantaneas import tomar_instantanea_si_corresponde
+from .directorio import codigo_vendedor, listar_vendedores, nombres_vendedores
+from .resumen import TIPOS_MOVIMIENTO, aplicar_movimientos
+
+bp = Blueprint('movimientos', __name__)
+
+# ===================== Movimientos =====================
+
+# Validar un movimiento a partir del estado de la canasta y su portador actual
+# (columnas actualidad, vendedor_actual y fecha_ultimo_movimiento de canastas).
+# Devuelve el mensaje de error o None si el movimiento es válido.
+def validar_movimiento(tipo, vendedor_codigo, estado_canasta, vendedor_actual, fecha_ultimo_movimiento):
+    if tipo not in TIPOS_MOVIMIENTO:
+        return 'Tipo de movimiento no válido'
+
+    if tipo == 'Entra' and not fecha_ultimo_movimiento:
+        return 'No se ha registrado ningún movimiento para esta canasta, no se puede devolver.'
+
+    # Verificar si el vendedor que intenta devolver la canasta es el que la prestó
+    if tipo == 'Entra' and vendedor_actual and vendedor_actual != vendedor_codigo:
+        return '¡Esta canasta ha sido prestada a otro vendedor! No puedes devolverla.'
+
+    if tipo == 'Sale' and estado_canasta == 'Prestada':
+        return '¡Esta canasta ya ha sido prestada anteriormente!'
+
+    if tipo == 'Entra' and estado_canasta == 'Disponible':
+        return '¡Esta canasta no ha sido prestada!'
+
+    return None
+
+# Sumar registros exitosos al contador de la sesión
+def sumar_registros_sesion(vendedor_nombre, tipo, cantidad):
+    if 'contador_registros' not in session:
+        session['contador_registros'] = 0
+
+    # Verificar si el vendedor o el tipo de movimiento han cambiado
+    if vendedor_nombre != session.get('vendedor_seleccionado') or tipo != session.get('tipo_seleccionado'):
+        session['contador_registros'] = 0  # Reiniciar el contador de registros
+
+    # Actualizar la sesión con los nuevos valores seleccionados
+    session['vendedor_seleccionado'] = vendedor_nombre
+    session['tipo_seleccionado'] = tipo
+    session['codigo_barras'] = ''  # Vaciar el campo de código de barras
+
+    # Incrementar el contador de registros exitosos
+    session['contador_registros'] += cantidad
+
+# Validar y registrar el movimiento de una canasta.
+# Devuelve (error, fecha): el mensaje de error o None, y la fecha del movimiento registrado.
+def registrar_movimiento(vendedor_nombre, tipo, codigo_barras):
+    conn = obtener_conexion()
+    try:
+        # Obtener el código del vendedor por su nombre (desde el directorio en memoria)
+        cursor = conn.cursor()
+        vendedor_codigo = codigo_vendedor(cursor, vendedor_nombre)
+
+        if not vendedor_codigo:
+            return 'Vendedor no encontrado', None
+
+        # La transacción de escritura se abre antes de leer la canasta: así ninguna otra estación
+        # puede registrar un movimiento de la misma canasta entre la validación y la escritura
+        cursor.execute('BEGIN IMMEDIATE')
+
+        # Verificar el estado y el portador actual de la canasta antes de registrar el movimiento
+        cursor.execute('''
+            SELECT actualidad, vendedor_actual, fecha_ultimo_movimiento
+            FROM canastas WHERE codigo_barras = ?
+        ''', (codigo_barras,))
+        canasta = cursor.fetchone()
+
+        if not canasta:
+            return 'Canasta no encontrada', None
+
+        estado_canasta = canasta[0]  # Estado actual de la canasta
+
+        # Validar si el movimiento es válido
+        error = validar_movimiento(tipo, vendedor_codigo, *canasta)
+        if error:
+            return error, None
+
+        # Registrar el movimiento, actualizar la canasta y los contadores del tablero
+        fecha = datetime.now()
+        aplicar_movimientos(cursor, vendedor_codigo, tipo, [(codigo_barras, estado_canasta)], fecha)
+        conn.commit()
+        # Las pantallas conectadas a /eventos reciben el movimiento y los contadores nuevos
+        current_app.extensions['difusor_eventos'].avisar()
+        return None, fecha
+
+    except sqlite3.Error as e:
+        return f'Error al registrar el movimiento: {e}', None
+    finally:
+        # Si no se registró nada, liberar el bloqueo de escritura
+        if conn.in_transaction:
+            conn.rollback()
+
+# Ruta para registrar movimientos
+@bp.route('/movimientos', methods=['GET', 'POST'])
+@login_required
+def movimientos():
+    # Inicializar contador de registros exitosos si no está en la sesión
+    if 'contador_registros' not in session:
+        session['contador_registros'] = 0
+
+    if request.method == 'POST':
+        vendedor_nombre = request.form['vendedor']  # Nombre del vendedor
+        tipo = request.form['tipo']  # Tipo de movimiento (sale o entra)
+        codigo_barras = request.form['codigo_barras']
+        
+        # Validar los campos
+        if not (vendedor_nombre and tipo and codigo_barras):
+            flash('Todos los campos son obligatorios')
+            return redirect(url_for('movimientos.movimientos'))
+
+        error = registrar_movimiento(vendedor_nombre, tipo, codigo_barras)[0]
+        if error:
+            flash(error)
+        else:
+            flash('Movimiento registrado con éxito')
+
+            # Actualizar la sesión y el contador de registros exitosos
+            sumar_registros_sesion(vendedor_nombre, tipo, 1)
+
+        return redirect(url_for('movimientos.movimientos'))  # Redirigir a la misma página para mostrar el resultado
+
+    # Obtener la lista de vendedores ordenada alfabéticamente por su nombre
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    vendedores = nombres_vendedores(cursor)
+
+    # Pedir la instantánea periódica del estado (en segundo plano) si ya hay suficientes movimientos
+    tomar_instantanea_si_corresponde(conn)
+
+    # Obtener los 100 movimientos más recientes, ordenados de más reciente a más antiguo
+    cursor.execute(''' 
+        SELECT m.fecha, v.nombre, m.tipo, m.codigo_barras 
+        FROM movimientos m 
+        JOIN vendedores v ON m.vendedor_codigo = v.codigo 
+        ORDER BY m.fecha DESC 
+        LIMIT 100
+    ''')
+    movimientos = cursor.fetchall()
+
+    # Obtener los valores previamente seleccionados para mostrar en el formulario
+    vendedor_seleccionado = session.get('vendedor_seleccionado', '')
+    tipo_seleccionado = session.get('tipo_seleccionado', '')
+    codigo_barras = session.get('codigo_barras', '')  # El campo se vacía en la sesión
+
+    return render_template('movimientos.html', 
+                           vendedores=vendedores, 
+                           vendedor_seleccionado=vendedor_seleccionado, 
+                           tipo_seleccionado=tipo_seleccionado, 
+                           codigo_barras=codigo_barras,
+                           contador_registros=session['contador_registros'],
+                           movimientos=movimientos)
+
+
+# API para registrar un movimiento desde la página de escaneo sin recargarla
+@bp.route('/api/movimientos', methods=['POST'])
+@login_required
+def api_registrar_movimiento():
+    datos = request.get_json(silent=True) or request.form
+    vendedor_nombre = datos.get('vendedor', '')
+    tipo = datos.get('tipo', '')
+    codigo_barras = datos.get('codigo_barras', '')
+
+    # Validar los campos
+    if not (vendedor_nombre and tipo and codigo_barras):
+        error, fecha = 'Todos los campos son obligatorios', None
+    else:
+        error, fecha = registrar_movimiento(vendedor_nombre, tipo, codigo_barras)
+
+    if error:
+        return {'ok': False, 'mensaje': error,
+                'contador_registros': session.get('contador_registros', 0)}, 400
+
+    sumar_registros_sesion(vendedor_nombre, tipo, 1)
+    return {
+        'ok': True,
+        'mensaje': 'Movimiento registrado con éxito',
+        'contador_registros': session['contador_registros'],
+        'movimiento': {
+            'fecha': str(fecha),
+            'vendedor': vendedor_nombre,
+            'tipo': tipo,
+            'codigo_barras': codigo_barras,
+        },
+    }
+
+# Tamaño de los grupos de códigos en las consultas con IN (límite de parámetros de SQLite)
+TAMANO_GRUPO_CONSULTA = 500
+MAXIMO_CODIGOS_LOTE = 1000
+
+# Separar la lista de códigos escaneados (uno por línea, o separados por comas o espacios)
+def separar_codigos(texto):
+    return [codigo for codigo in re.split(r'[\s,;]+', texto) if codigo]
+
+# Validar y registrar un lote de canastas para un vendedor en una sola transacción, que se abre
+# (BEGIN IMMEDIATE) antes de leer las canastas y confirma quien llama.
+# Devuelve una lista con el resultado de cada código, en el mismo orden recibido.
+def registrar_lote_movimientos(cursor, vendedor_codigo, tipo, codigos):
+    cursor.execute('BEGIN IMMEDIATE')
+
+    # Consultar el estado y el portador actual de todas las canastas del lote
+    canastas = {}
+    codigos_unicos = list(dict.fromkeys(codigos))
+    for i in range(0, len(codigos_unicos), TAMANO_GRUPO_CONSULTA):
+        grupo = codigos_unicos[i:i + TAMANO_GRUPO_CONSULTA]
+        marcadores = ','.join('?' * len(grupo))
+        cursor.execute(f'''
+            SELECT codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento
+            FROM canastas
+            WHERE codigo_barras IN ({marcadores})
+        ''', grupo)
+        for codigo_barras, *canasta in cursor.fetchall():
+            canastas[codigo_barras] = canasta
+
+    resultados = []
+    validas = []
+    vistos = set()
+    for codigo_barras in codigos:
+        if codigo_barras in vistos:
+            error = 'Código repetido en el lote'
+        elif codigo_barras not in canastas:
+            error = 'Canasta no encontrada'
+        else:
+            error = validar_movimiento(tipo, vendedor_codigo, *canastas[codigo_barras])
+        vistos.add(codigo_barras)
+
+        if error:
+            resultados.append({'codigo_barras': codigo_barras, 'registrado': False, 'mensaje': error})
+        else:
+            validas.append((codigo_barras, canastas[codigo_barras][0]))
+            resultados.append({'codigo_barras': codigo_barras, 'registrado': True, 'mensaje': 'Movimiento registrado'})
+
+    if validas:
+        aplicar_movimientos(cursor, vendedor_codigo, tipo, validas, datetime.now())
+
+    return resultados
+
+# Ruta para registrar muchas canastas de un vendedor a la vez (modo lote)
+@bp.route('/movimientos/lote', methods=['GET', 'POST'])
+@login_required
+def movimientos_lote():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    vendedores = nombres_vendedores(cursor)
+
+    if request.method == 'GET':
+        return render_template('movimientos_lote.html', vendedores=vendedores, resultados=[],
+                               vendedor_seleccionado=session.get('vendedor_seleccionado', ''),
+                               tipo_seleccionado=session.get('tipo_seleccionado', ''))
+
+    # Se acepta el formulario de la página o JSON: {"vendedor": ..., "tipo": ..., "codigos": [...]}
+    if request.is_json:
+        datos = request.get_json(silent=True) or {}
+        vendedor_nombre = datos.get('vendedor', '')
+        tipo = datos.get('tipo', '')
+        codigos = [str(codigo).strip() for codigo in datos.get('codigos', []) if str(codigo).strip()]
+    else:
+        vendedor_nombre = request.form.get('vendedor', '')
+        tipo = request.form.get('tipo', '')
+        codigos = separar_codigos(request.form.get('codigos', ''))
+
+    def responder(error=None, resultados=()):
+        if request.is_json:
+            return {'error': error, 'resultados': list(resultados)}, 400 if error else 200
+        if error:
+            flash(error)
+        return render_template('movimientos_lote.html', vendedores=vendedores, resultados=resultados,
+                               vendedor_seleccionado=vendedor_nombre, tipo_seleccionado=tipo)
+
+    # Validar los campos
+    if not (vendedor_nombre and tipo in TIPOS_MOVIMIENTO and codigos):
+        return responder('Todos los campos son obligatorios')
+
+    if len(codigos) > MAXIMO_CODIGOS_LOTE:
+        return responder(f'El lote no puede tener más de {MAXIMO_CODIGOS_LOTE} códigos')
+
+    try:
+        vendedor_codigo = codigo_vendedor(cursor, vendedor_nombre)
+        if not vendedor_codigo:
+            return responder('Vendedor no encontrado')
+
+        resultados = registrar_lote_movimientos(cursor, vendedor_codigo, tipo, codigos)
+        conn.commit()
+        current_app.extensions['difusor_eventos'].avisar()
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return responder(f'Error al registrar el lote: {e}')
+
+    registrados = sum(1 for resultado in resultados if resultado['registrado'])
+    if registrados:
+        sumar_registros_sesion(vendedor_nombre, tipo, registrados)
+    if not request.is_json:
+        flash(f'{registrados} de {len(resultados)} movimientos registrados')
+    return responder(resultados=resultados)
+
+# ===================== Historial de movimientos =====================
+
+# Tamaños de página permitidos para el historial
+TAMANOS_PAGINA = (25, 50, 100, 200)
+TAMANO_PAGINA_DEFECTO = 50
+# Máximo de filas que se cuentan para el total; por encima se muestra "más de"
+LIMITE_CONTEO = 10000
+
+# Leer los filtros del historial desde la URL
+def leer_filtros_movimientos(args):
+    return {
+        'vendedor': args.get('vendedor', '').strip(),
+        'tipo': args.get('tipo', '').strip(),
+        'codigo_barras': args.get('codigo_barras', '').strip(),
+        'fecha_desde': args.get('fecha_desde', '').strip(),
+        'fecha_hasta': args.get('fecha_hasta', '').strip(),
+    }
+
+# Convertir los filtros en condiciones SQL con sus parámetros
+def condiciones_movimientos(filtros):
+    condiciones = []
+    parametros = []
+    if filtros['vendedor']:
+        condiciones.append('m.vendedor_codigo = ?')
+        parametros.append(filtros['vendedor'])
+    if filtros['tipo'] in ('Sale', 'Entra'):
+        condiciones.append('m.tipo = ?')
+        parametros.append(filtros['tipo'])
+    if filtros['codigo_barras']:
+        condiciones.append('m.codigo_barras = ?')
+        parametros.append(filtros['codigo_barras'])
+    if filtros['fecha_desde']:
+        condiciones.append('m.fecha >= ?')
+        parametros.append(filtros['fecha_desde'])
+    if filtros['fecha_hasta']:
+        # Incluye todo el día final, también las fechas guardadas con microsegundos
+        condiciones.append("m.fecha < date(?, '+1 day')")
+        parametros.append(filtros['fecha_hasta'])
+    return condiciones, parametros
+
+# La posición de una página es "fecha|id" de la fila del borde
+def leer_posicion(valor):
+    fecha, _, id_movimiento = (valor or '').rpartition('|')
+    if not fecha or not id_movimiento.isdigit():
+        return None
+    return fecha, int(id_movimiento)
+
+# Consultar una página del historial, del más reciente al más antiguo, continuando
+# después (o antes) de la posición dada en lugar de usar OFFSET. 'esquemas' son las bases
+# donde se buscan los movimientos: la principal y, si se adjuntaron, las del archivo (que
+# conservan el id de cada movimiento, así la posición sirve en todas).
+# Devuelve (movimientos, hay_anterior, hay_siguiente).
+def consultar_pagina_movimientos(cursor, filtros, por_pagina, despues=None, antes=None, esquemas=('main',)):
+    condiciones, parametros = condiciones_movimientos(filtros)
+    orden = 'DESC'
+    if despues:
+        condiciones.append('(m.fecha, m.id) < (?, ?)')
+        parametros.extend(despues)
+    elif antes:
+        condiciones.append('(m.fecha, m.id) > (?, ?)')
+        parametros.extend(antes)
+        orden = 'ASC'
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    consulta = ' UNION ALL '.join(f'''
+        SELECT m.id, m.fecha, v.nombre, m.tipo, m.codigo_barras
+        FROM {esquema}.movimientos m
+        JOIN main.vendedores v ON m.vendedor_codigo = v.codigo
+        {where}
+    ''' for esquema in esquemas)
+    # Se pide una fila de más para saber si hay otra página
+    cursor.execute(f'{consulta} ORDER BY fecha {orden}, id {orden} LIMIT ?',
+                   parametros * len(esquemas) + [por_pagina + 1])
+    movimientos = cursor.fetchall()
+    hay_mas = len(movimientos) > por_pagina
+    movimientos = movimientos[:por_pagina]
+
+    if antes:
+        movimientos.reverse()
+        return movimientos, hay_mas, True
+    return movimientos, bool(despues), hay_mas
+
+# Contar los movimientos que cumplen los filtros hasta LIMITE_CONTEO, sin recorrer toda la tabla.
+# Devuelve (total, hay_mas_del_limite).
+def contar_movimientos(cursor, filtros):
+    condiciones, parametros = condiciones_movimientos(filtros)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    cursor.execute(f'''
+        SELECT COUNT(*) FROM (SELECT 1 FROM movimientos m {where} LIMIT ?)
+    ''', parametros + [LIMITE_CONTEO + 1])
+    total = cursor.fetchone()[0]
+    return min(total, LIMITE_CONTEO), total > LIMITE_CONTEO
+
+# Página del historial con filtros y paginación, usada por ver_movimientos y generar_informe_movimientos
+def pagina_movimientos(titulo):
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    filtros = leer_filtros_movimientos(request.args)
+    por_pagina = request.args.get('por_pagina', type=int)
+    if por_pagina not in TAMANOS_PAGINA:
+        por_pagina = TAMANO_PAGINA_DEFECTO
+    despues = leer_posicion(request.args.get('despues'))
+    antes = None if despues else leer_posicion(request.args.get('antes'))
+
+    movimientos, hay_anterior, hay_siguiente = consultar_pagina_movimientos(cursor, filtros, por_pagina, despues, antes)
+    total, total_es_minimo = contar_movimientos(cursor, filtros)
+
+    vendedores = listar_vendedores(cursor)
+
+    # Parámetros que se conservan en los enlaces de página (sin los filtros vacíos)
+    parametros_pagina = {clave: valor for clave, valor in filtros.items() if valor}
+    parametros_pagina['por_pagina'] = por_pagina
+
+    return render_template('ver_movimientos.html',
+                           titulo=titulo,
+                           movimientos=movimientos,
+                           vendedores=vendedores,
+                           filtros=filtros,
+                           por_pagina=por_pagina,
+                           tamanos_pagina=TAMANOS_PAGINA,
+                           total=total,
+                           total_es_minimo=total_es_minimo,
+                           hay_anterior=hay_anterior,
+                           hay_siguiente=hay_siguiente,
+                           parametros_pagina=parametros_pagina)
+
+# Ruta para ver los movimientos registrados
+@bp.route('/ver_movimientos')
+@login_required
+def ver_movimientos():
+    return pagina_movimientos('Historial de Movimientos')
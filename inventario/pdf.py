@@ -0,0 +1,94 @@
+# Informes PDF con reportlab. Las filas se agregan al documento en tablas de
+# FILAS_POR_TABLA_PDF filas, así solo hay una tabla en memoria a la vez.
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from .exportaciones import iterar_filas
+
+# Filas de cada tabla del PDF; el informe se arma con varias tablas seguidas de este tamaño
+FILAS_POR_TABLA_PDF = 500
+
+# Documento que recibe las tablas de un generador: build() empieza con una lista que solo tiene
+# la primera y, cada vez que handle_flowable deja esa lista vacía, se agrega la siguiente. Así
+# nunca hay más de una tabla del informe en memoria.
+class DocumentoPorLotes(SimpleDocTemplate):
+    def __init__(self, archivo, **kwargs):
+        super().__init__(archivo, **kwargs)
+        self.lote_actual = None
+        self.pendientes = iter(())
+
+    def handle_flowable(self, flowables):
+        super().handle_flowable(flowables)
+        # reportlab también llama a handle_flowable con sus propias listas (_hanging)
+        if flowables is self.lote_actual and not flowables:
+            siguiente = next(self.pendientes, None)
+            if siguiente is not None:
+                flowables.append(siguiente)
+
+    def build_por_lotes(self, flowables, **kwargs):
+        self.pendientes = iter(flowables)
+        primero = next(self.pendientes, None)
+        self.lote_actual = [] if primero is None else [primero]
+        self.build(self.lote_actual, **kwargs)
+
+ESTILO_TABLA_PDF = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.whitesmoke]),
+])
+
+ESTILO_ENCABEZADO_PDF = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+])
+
+# Tablas de FILAS_POR_TABLA_PDF filas con los mismos anchos de columna, para que se vean como una sola
+def tablas_por_lotes(filas, anchos):
+    lote = []
+    for fila in iterar_filas(filas):
+        lote.append(['' if valor is None else str(valor) for valor in fila])
+        if len(lote) == FILAS_POR_TABLA_PDF:
+            yield Table(lote, colWidths=anchos, style=ESTILO_TABLA_PDF, hAlign='LEFT')
+            lote = []
+    if lote:
+        yield Table(lote, colWidths=anchos, style=ESTILO_TABLA_PDF, hAlign='LEFT')
+
+# Escribir un informe PDF paginado. El título y el encabezado de las columnas se dibujan en
+# cada página desde la plantilla, así se repiten aunque la tabla continúe en otra página.
+def generar_pdf(archivo, titulo, encabezado, filas, anchos=None):
+    documento = DocumentoPorLotes(archivo, pagesize=letter, title=titulo,
+                                  leftMargin=40, rightMargin=40, topMargin=90, bottomMargin=40)
+    if anchos is None:
+        anchos = [documento.width / len(encabezado)] * len(encabezado)
+    tabla_encabezado = Table([encabezado], colWidths=anchos, style=ESTILO_ENCABEZADO_PDF, hAlign='LEFT')
+    generado = datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    def dibujar_pagina(canvas, documento):
+        ancho, alto = documento.pagesize
+        canvas.saveState()
+        canvas.setFont('Helvetica-Bold', 14)
+        canvas.drawString(documento.leftMargin, alto - 45, titulo)
+        tabla_encabezado.wrapOn(canvas, documento.width, documento.topMargin)
+        tabla_encabezado.drawOn(canvas, documento.leftMargin, alto - documento.topMargin)
+        canvas.setFont('Helvetica-Oblique', 8)
+        canvas.drawRightString(ancho - documento.rightMargin, 20,
+                               f'Generado el {generado} - Página {documento.page}')
+        canvas.restoreState()
+
+    def contenido():
+        tablas = tablas_por_lotes(filas, anchos)
+        primera = next(tablas, None)
+        if primera is None:
+            yield Paragraph('No hay datos para este informe.', getSampleStyleSheet()['Normal'])
+            return
+        yield primera
+        yield from tablas
+
+    documento.build_por_lotes(contenido(), onFirstPage=dibujar_pagina, onLaterPages=dibujar_pagina)
@@ -0,0 +1,119 @@
+# Resumen de canastas.
+#
+# Los contadores del tablero (resumen_canastas y resumen_vendedores) y el resumen diario de
+# movimientos (resumen_diario) se mantienen en la misma transacción que cada escritura sobre
+# canastas y movimientos. Las tablas se crean en esquema.py.
+from .vencimientos import expresion_vencimiento, quitar_vencidas
+
+# Tipos de movimiento: salida (préstamo) y entrada (devolución) de una canasta
+TIPOS_MOVIMIENTO = ('Sale', 'Entra')
+
+def incrementar_version(cursor, nombre='tablero'):
+    cursor.execute('''
+        INSERT INTO versiones (nombre, valor) VALUES (?, 1)
+        ON CONFLICT(nombre) DO UPDATE SET valor = valor + 1
+    ''', (nombre,))
+
+def leer_version(cursor, nombre='tablero'):
+    cursor.execute('SELECT valor FROM versiones WHERE nombre = ?', (nombre,))
+    version = cursor.fetchone()
+    return version[0] if version else 0
+
+def sumar_resumen_canastas(cursor, actualidad, cantidad):
+    cursor.execute('''
+        INSERT INTO resumen_canastas (actualidad, cantidad) VALUES (?, ?)
+        ON CONFLICT(actualidad) DO UPDATE SET cantidad = cantidad + excluded.cantidad
+    ''', (actualidad, cantidad))
+
+def sumar_resumen_vendedor(cursor, vendedor_codigo, cantidad):
+    cursor.execute('''
+        INSERT INTO resumen_vendedores (vendedor_codigo, prestadas_activas) VALUES (?, ?)
+        ON CONFLICT(vendedor_codigo) DO UPDATE SET prestadas_activas = prestadas_activas + excluded.prestadas_activas
+    ''', (vendedor_codigo, cantidad))
+
+# Sumar al resumen diario los movimientos de un vendedor, por tamaño y color de cada canasta.
+# Tamaño y color vacíos ('') si la canasta no existe, igual que al reconstruir el resumen.
+def sumar_resumen_diario(cursor, vendedor_codigo, tipo, codigos, fecha):
+    dia = str(fecha)[:10]
+    cursor.executemany('''
+        INSERT INTO resumen_diario (dia, vendedor_codigo, tipo, tamano, color, cantidad)
+        SELECT ?, ?, ?, COALESCE(MAX(tamano), ''), COALESCE(MAX(color), ''), 1
+        FROM canastas WHERE codigo_barras = ?
+        ON CONFLICT(dia, vendedor_codigo, tipo, tamano, color) DO UPDATE SET cantidad = cantidad + excluded.cantidad
+    ''', [(dia, vendedor_codigo, tipo, codigo_barras) for codigo_barras in codigos])
+
+# Movimientos de un rango de días (YYYY-MM-DD, ambos incluidos) como filas de
+# (vendedor_codigo, tipo, tamano, color, cantidad) para agrupar encima. Los días cerrados se leen
+# del resumen diario; el día en curso (y cualquier fecha posterior) de los movimientos, que son
+# pocos y están indexados por fecha. Devuelve la subconsulta y sus parámetros.
+def subconsulta_movimientos_dias(fecha_inicio, fecha_fin, hoy):
+    sql = '''
+        SELECT vendedor_codigo, tipo, tamano, color, cantidad
+        FROM resumen_diario
+        WHERE dia >= ? AND dia <= ? AND dia < ?
+        UNION ALL
+        SELECT m.vendedor_codigo, m.tipo, COALESCE(c.tamano, ''), COALESCE(c.color, ''), 1
+        FROM movimientos m
+        LEFT JOIN canastas c ON c.codigo_barras = m.codigo_barras
+        WHERE m.fecha >= ? AND m.fecha < date(?, '+1 day')
+    '''
+    return sql, (fecha_inicio, fecha_fin, hoy, max(fecha_inicio, hoy), fecha_fin)
+
+# Leer el total de canastas, las disponibles y las prestadas desde el resumen
+def leer_resumen_canastas(cursor):
+    cursor.execute('SELECT actualidad, cantidad FROM resumen_canastas')
+    cantidades = dict(cursor.fetchall())
+    total_canastas = sum(cantidades.values())
+    return total_canastas, cantidades.get('Disponible', 0), cantidades.get('Prestada', 0)
+
+# Leer cuántas canastas tiene prestadas cada vendedor desde el resumen
+def leer_resumen_vendedores(cursor, orden='v.nombre'):
+    cursor.execute(f'''
+        SELECT v.nombre, r.prestadas_activas
+        FROM resumen_vendedores r
+        JOIN vendedores v ON r.vendedor_codigo = v.codigo
+        ORDER BY {orden}
+    ''')
+    return cursor.fetchall()
+
+# Registrar movimientos de un vendedor y actualizar las canastas y los contadores en la
+# transacción abierta. 'canastas' es una lista de (codigo_barras, estado_canasta) ya validados.
+def aplicar_movimientos(cursor, vendedor_codigo, tipo, canastas, fecha):
+    # Estado de las canastas según el tipo de movimiento. Cualquier otro tipo se rechaza antes de
+    # escribir: los contadores tratarían como devolución todo lo que no es una salida.
+    if tipo == 'Sale':
+        estado_anterior, estado_nuevo = 'Disponible', 'Prestada'
+    elif tipo == 'Entra':
+        estado_anterior, estado_nuevo = 'Prestada', 'Disponible'
+    else:
+        raise ValueError(f'Tipo de movimiento no válido: {tipo!r}')
+
+    cursor.executemany('''
+        INSERT INTO movimientos (vendedor_codigo, tipo, codigo_barras, fecha)
+        VALUES (?, ?, ?, ?)
+    ''', [(vendedor_codigo, tipo, codigo_barras, fecha) for codigo_barras, _ in canastas])
+
+    # También se actualiza el portador actual: el vendedor mientras está prestada, nadie al devolverla.
+    # Si queda prestada se calcula su vencimiento según su tamaño y color, igual que en
+    # recalcular_vencimientos (una canasta fuera de servicio no vence); si no, se borra.
+    vendedor_actual = vendedor_codigo if tipo == 'Sale' else None
+    cursor.executemany(f'''
+        UPDATE canastas SET
+            actualidad = CASE WHEN actualidad = ? THEN ? ELSE actualidad END,
+            vendedor_actual = ?,
+            fecha_ultimo_movimiento = ?,
+            fecha_vencimiento = CASE WHEN (CASE WHEN actualidad = ? THEN ? ELSE actualidad END) = 'Prestada'
+                                     THEN {expresion_vencimiento('?')} END
+        WHERE codigo_barras = ?
+    ''', [(estado_anterior, estado_nuevo, vendedor_actual, fecha, estado_anterior, estado_nuevo, fecha, codigo_barras)
+          for codigo_barras, _ in canastas])
+    quitar_vencidas(cursor, [codigo_barras for codigo_barras, _ in canastas])
+
+    cambian = [codigo_barras for codigo_barras, estado_canasta in canastas if estado_canasta == estado_anterior]
+    if cambian:
+        sumar_resumen_canastas(cursor, estado_anterior, -len(cambian))
+        sumar_resumen_canastas(cursor, estado_nuevo, len(cambian))
+
+    sumar_resumen_vendedor(cursor, vendedor_codigo, len(canastas) if tipo == 'Sale' else -len(canastas))
+    sumar_resumen_diario(cursor, vendedor_codigo, tipo, [codigo_barras for codigo_barras, _ in canastas], fecha)
+    incrementar_version(cursor)
@@ -0,0 +1,129 @@
+# Tablero: página principal con el resumen de canastas y el gráfico de canastas prestadas por vendedor
+import io
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Blueprint, Response, flash, redirect, render_template, request, session, url_for
+
+from .autenticacion import login_required
+from .canastas import barrer_vencidas_si_corresponde
+from .db import obtener_conexion
+from .instantaneas import tomar_instantanea_si_corresponde
+from .metricas import duracion_graficos
+from .resumen import leer_resumen_canastas, leer_resumen_vendedores, leer_version
+from .vencimientos import contar_vencidas
+
+bp = Blueprint('tablero', __name__)
+
+# Función para obtener los datos del resumen de canastas y el gráfico de vendedores
+@bp.route('/')
+def index():
+    # Verificar si el usuario está autenticado
+    if 'user_id' not in session:
+        flash('Por favor, inicia sesión para acceder a la página principal.')
+        return redirect(url_for('usuarios.login'))  # Redirige al login si no está autenticado
+    
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Total de canastas, disponibles y prestadas (desde el resumen)
+        total_canastas, disponibles, prestadas = leer_resumen_canastas(cursor)
+
+        # Canastas perdidas (préstamo vencido), del mismo conjunto que la página de canastas perdidas
+        barrer_vencidas_si_corresponde(conn)
+        canastas_perdidas = contar_vencidas(cursor)
+
+        # Pedir la instantánea periódica del estado (en segundo plano) si ya hay suficientes movimientos
+        tomar_instantanea_si_corresponde(conn)
+
+        # Versión de los datos, el gráfico se sirve desde su propia URL y se cachea por versión
+        version_tablero = leer_version(cursor)
+
+        # Pasar los datos a la plantilla HTML
+        return render_template('index.html', 
+                               total_canastas=total_canastas, 
+                               disponibles=disponibles, 
+                               prestadas=prestadas, 
+                               canastas_perdidas=canastas_perdidas, 
+                               version_tablero=version_tablero)
+
+    except sqlite3.Error as e:
+        flash(f'Error al obtener los datos: {e}')
+        return redirect(url_for('tablero.index'))
+
+# ===================== Gráfico del tablero =====================
+
+# Gráficos ya renderizados, por versión de los datos del tablero
+graficos_cache = OrderedDict()
+graficos_cache_lock = threading.Lock()
+GRAFICOS_CACHE_MAXIMO = 4
+
+# Crear gráfico de barras para las canastas prestadas activas por vendedor
+def renderizar_grafico_vendedores(vendedores):
+    vendedores_nombres = [v[0] for v in vendedores]
+    canastas_prestadas_activas = [v[1] for v in vendedores]
+
+    # matplotlib se carga al dibujar el primer gráfico y no al iniciar la aplicación.
+    # Se usa Figure directamente (sin pyplot) para que la figura no quede registrada en memoria.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.bar(vendedores_nombres, canastas_prestadas_activas, color='#e84a1d')
+    ax.set_xlabel('Vendedores')
+    ax.set_ylabel('Canastas Prestadas')
+    ax.set_title('Canastas Prestadas por Vendedor')
+
+    # Incluir la inclinación de 10 grados para los nombres de los vendedores
+    ax.tick_params(axis='x', labelrotation=10)
+
+    img = io.BytesIO()
+    FigureCanvas(fig).print_png(img)
+    return img.getvalue()
+
+# Obtener el PNG del gráfico para una versión, renderizándolo solo si no está en caché
+def obtener_grafico_vendedores(cursor, version):
+    with graficos_cache_lock:
+        if version in graficos_cache:
+            graficos_cache.move_to_end(version)
+            return graficos_cache[version]
+
+    vendedores = leer_resumen_vendedores(cursor)
+    inicio = time.perf_counter()
+    png = renderizar_grafico_vendedores(vendedores)
+    duracion_graficos.observar(('vendedores',), time.perf_counter() - inicio)
+
+    with graficos_cache_lock:
+        graficos_cache[version] = png
+        # Descartar las versiones más antiguas
+        while len(graficos_cache) > GRAFICOS_CACHE_MAXIMO:
+            graficos_cache.popitem(last=False)
+    return png
+
+@bp.route('/grafico_vendedores.png')
+@login_required
+def grafico_vendedores():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    version = leer_version(cursor)
+    etag = f'tablero-{version}'
+
+    # El navegador ya tiene esta versión del gráfico
+    if etag in request.if_none_match:
+        respuesta = Response(status=304)
+    else:
+        png = obtener_grafico_vendedores(cursor, version)
+        respuesta = Response(png, mimetype='image/png')
+
+    respuesta.set_etag(etag)
+    # La URL incluye la versión (?v=), así que si coincide se puede guardar indefinidamente
+    if request.args.get('v') == str(version):
+        respuesta.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        respuesta.headers['Cache-Control'] = 'private, no-cache'
+    return respuesta
@@ -0,0 +1,183 @@
+# Trabajos en segundo plano para los informes pesados.
+#
+# Cada trabajo se guarda en la tabla trabajos con su tipo, sus parámetros y una clave que
+# incluye la versión de los datos (y la fecha, en los informes que dependen de ella). Se ejecuta en un hilo fuera de la petición y deja su
+# archivo en la carpeta de reportes; si se pide el mismo informe sin que los datos hayan
+# cambiado, se reutiliza el trabajo existente.
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import current_app, redirect, session, url_for
+
+from .db import obtener_conexion
+from .metricas import duracion_trabajos
+from .resumen import leer_version
+
+PENDIENTE = 'pendiente'
+EN_PROCESO = 'en_proceso'
+TERMINADO = 'terminado'
+ERROR = 'error'
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+# Clave de caché: el mismo informe con los mismos parámetros sobre la misma versión de los datos
+# (una lista de versiones y la fecha en los informes que dependen de la fecha)
+def clave_trabajo(tipo, parametros, version):
+    texto = json.dumps([tipo, parametros, version], sort_keys=True)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+def crear_trabajo(cursor, tipo, parametros, clave, usuario_id):
+    id_trabajo = uuid.uuid4().hex
+    cursor.execute('''
+        INSERT INTO trabajos (id, tipo, parametros, clave, estado, usuario_id, creado)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (id_trabajo, tipo, json.dumps(parametros), clave, PENDIENTE, usuario_id,
+          datetime.now().strftime(FORMATO_FECHA)))
+    return id_trabajo
+
+def leer_trabajo(cursor, id_trabajo):
+    cursor.execute('''
+        SELECT id, tipo, parametros, estado, archivo, nombre_descarga, tipo_mime, error, creado, terminado
+        FROM trabajos WHERE id = ?
+    ''', (id_trabajo,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    columnas = ('id', 'tipo', 'parametros', 'estado', 'archivo', 'nombre_descarga', 'tipo_mime', 'error', 'creado', 'terminado')
+    trabajo = dict(zip(columnas, fila))
+    trabajo['parametros'] = json.loads(trabajo['parametros'])
+    return trabajo
+
+def trabajos_recientes(cursor, limite=20):
+    cursor.execute('''
+        SELECT id, tipo, estado, nombre_descarga, creado, terminado
+        FROM trabajos ORDER BY creado DESC LIMIT ?
+    ''', (limite,))
+    return cursor.fetchall()
+
+# Trabajo con la misma clave que se pueda reutilizar: en curso, o terminado con su archivo todavía en disco
+def buscar_trabajo_reutilizable(cursor, clave):
+    cursor.execute('''
+        SELECT id, estado, archivo FROM trabajos
+        WHERE clave = ? AND estado IN (?, ?, ?)
+        ORDER BY creado DESC
+    ''', (clave, PENDIENTE, EN_PROCESO, TERMINADO))
+    for id_trabajo, estado, archivo in cursor.fetchall():
+        if estado != TERMINADO or (archivo and os.path.exists(archivo)):
+            return id_trabajo
+    return None
+
+def marcar_en_proceso(cursor, id_trabajo):
+    cursor.execute('UPDATE trabajos SET estado = ? WHERE id = ?', (EN_PROCESO, id_trabajo))
+
+def marcar_terminado(cursor, id_trabajo, archivo, nombre_descarga, tipo_mime):
+    cursor.execute('''
+        UPDATE trabajos SET estado = ?, archivo = ?, nombre_descarga = ?, tipo_mime = ?, terminado = ?
+        WHERE id = ?
+    ''', (TERMINADO, archivo, nombre_descarga, tipo_mime, datetime.now().strftime(FORMATO_FECHA), id_trabajo))
+
+def marcar_error(cursor, id_trabajo, error):
+    cursor.execute('UPDATE trabajos SET estado = ?, error = ?, terminado = ? WHERE id = ?',
+                   (ERROR, error, datetime.now().strftime(FORMATO_FECHA), id_trabajo))
+
+# Los trabajos que siguen pendientes después del tiempo máximo se dan por interrumpidos
+# (por ejemplo, si el proceso que los ejecutaba se reinició)
+def marcar_interrumpidos(cursor, minutos_maximos):
+    limite = (datetime.now() - timedelta(minutes=minutos_maximos)).strftime(FORMATO_FECHA)
+    cursor.execute('''
+        UPDATE trabajos SET estado = ?, error = 'El trabajo se interrumpió, vuelve a solicitar el informe'
+        WHERE estado IN (?, ?) AND creado < ?
+    ''', (ERROR, PENDIENTE, EN_PROCESO, limite))
+
+# Borrar los trabajos y archivos más antiguos que el tiempo de retención
+def limpiar_trabajos(cursor, horas_retencion):
+    limite = (datetime.now() - timedelta(hours=horas_retencion)).strftime(FORMATO_FECHA)
+    cursor.execute('SELECT archivo FROM trabajos WHERE creado < ? AND archivo IS NOT NULL', (limite,))
+    for (archivo,) in cursor.fetchall():
+        try:
+            os.remove(archivo)
+        except OSError:
+            pass
+    cursor.execute('DELETE FROM trabajos WHERE creado < ?', (limite,))
+
+# ===================== Ejecución =====================
+
+# Informes que se generan en segundo plano. Cada uno recibe el cursor y los parámetros del trabajo,
+# ejecuta su consulta y devuelve (nombre de descarga, tipo MIME, función que escribe el archivo, argumentos).
+# Los registra cada blueprint junto a las rutas que los piden.
+INFORMES_SEGUNDO_PLANO = {}
+# Informes que cambian con la fecha aunque no cambien los datos (días prestada, canastas vencidas)
+INFORMES_POR_FECHA = set()
+
+def informe_segundo_plano(tipo, por_fecha=False):
+    def registrar(funcion):
+        INFORMES_SEGUNDO_PLANO[tipo] = funcion
+        if por_fecha:
+            INFORMES_POR_FECHA.add(tipo)
+        return funcion
+    return registrar
+
+# Carpeta donde los trabajos dejan los archivos generados
+def carpeta_reportes(app):
+    return os.path.join(app.instance_path, 'reportes')
+
+# Se ejecuta en un hilo del ejecutor, con su propia conexión del pool
+def ejecutar_trabajo(app, id_trabajo):
+    with app.app_context():
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        trabajo = leer_trabajo(cursor, id_trabajo)
+        marcar_en_proceso(cursor, id_trabajo)
+        conn.commit()
+
+        temporal = None
+        inicio = time.perf_counter()
+        try:
+            nombre_descarga, tipo_mime, generar, argumentos = INFORMES_SEGUNDO_PLANO[trabajo['tipo']](conn.cursor(), trabajo['parametros'])
+            os.makedirs(carpeta_reportes(app), exist_ok=True)
+            archivo = os.path.join(carpeta_reportes(app), id_trabajo + os.path.splitext(nombre_descarga)[1])
+
+            # Se escribe con otro nombre y se renombra al terminar para no servir archivos a medias
+            temporal = archivo + '.tmp'
+            with open(temporal, 'wb') as salida:
+                generar(salida, *argumentos)
+            os.replace(temporal, archivo)
+
+            marcar_terminado(cursor, id_trabajo, archivo, nombre_descarga, tipo_mime)
+            estado = TERMINADO
+        except Exception as e:
+            app.logger.exception('Error en el trabajo %s', id_trabajo)
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+            marcar_error(cursor, id_trabajo, str(e))
+            estado = ERROR
+        conn.commit()
+        duracion_trabajos.observar((trabajo['tipo'], estado), time.perf_counter() - inicio)
+
+# Registrar el informe pedido y redirigir a la página del trabajo. Si ya hay un trabajo con los
+# mismos parámetros sobre la misma versión de los datos, se reutiliza en lugar de generarlo otra vez.
+def encolar_informe(tipo, parametros):
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    limpiar_trabajos(cursor, current_app.config['TRABAJOS_RETENCION_HORAS'])
+    marcar_interrumpidos(cursor, current_app.config['TRABAJOS_MINUTOS_MAXIMOS'])
+
+    version = leer_version(cursor)
+    # Los informes que dependen de la fecha se reutilizan solo el mismo día y mientras no
+    # cambie el conjunto de canastas vencidas
+    if tipo in INFORMES_POR_FECHA:
+        version = [version, leer_version(cursor, 'vencidas'), date.today().isoformat()]
+    clave = clave_trabajo(tipo, parametros, version)
+    id_trabajo = buscar_trabajo_reutilizable(cursor, clave)
+    if id_trabajo is None:
+        id_trabajo = crear_trabajo(cursor, tipo, parametros, clave, session.get('user_id'))
+        conn.commit()
+        current_app.extensions['ejecutor_trabajos'].submit(ejecutar_trabajo, current_app._get_current_object(), id_trabajo)
+    else:
+        conn.commit()
+
+    return redirect(url_for('informes.ver_trabajo', id_trabajo=id_trabajo))
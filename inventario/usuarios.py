@@ -0,0 +1,208 @@
+# Usuarios: inicio y cierre de sesión, registro, cambio de contraseña y administración
+import re
+import sqlite3
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from .autenticacion import admin_required, login_required
+from .db import obtener_conexion
+
+bp = Blueprint('usuarios', __name__)
+
+# Ruta para registrar usuarios (solo administradores)
+@bp.route('/registrar_usuario', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def registrar_usuario():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        role = request.form['role']
+
+        if not username or not password:
+            flash('Todos los campos son obligatorios')
+            return redirect(url_for('usuarios.registrar_usuario'))
+
+        if not es_contrasena_segura(password):
+            flash('La contraseña no es segura. Debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas, números y símbolos.')
+            return redirect(url_for('usuarios.registrar_usuario'))
+
+        try:
+            conn = obtener_conexion()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM usuarios WHERE username = ?', (username,))
+            if cursor.fetchone():
+                flash('El nombre de usuario ya existe')
+                return redirect(url_for('usuarios.registrar_usuario'))
+
+            hashed_password = generate_password_hash(password)
+            cursor.execute('''
+                INSERT INTO usuarios (username, password, role)
+                VALUES (?, ?, ?)
+            ''', (username, hashed_password, role))
+            conn.commit()
+            flash('Usuario registrado con éxito')
+        except sqlite3.Error as e:
+            flash(f'Error al registrar el usuario: {e}')
+
+        return redirect(url_for('tablero.index'))
+
+    return render_template('registrar_usuario.html')
+
+# Ruta para iniciar sesión
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        if not username or not password:
+            flash('Por favor ingrese un nombre de usuario y una contraseña')
+            return redirect(url_for('usuarios.login'))
+
+        try:
+            conn = obtener_conexion()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM usuarios WHERE username = ?', (username,))
+            user = cursor.fetchone()
+
+            if user:
+                # Verificar si la contraseña proporcionada coincide con el hash almacenado
+                if check_password_hash(user[2], password):  # user[2] contiene el hash de la contraseña
+                    session['user_id'] = user[0]
+                    session['role'] = user[3]
+                    flash('Login exitoso')
+                    return redirect(url_for('tablero.index'))  # Redirigir a la página de inicio
+                else:
+                    flash('Contraseña incorrecta')
+            else:
+                flash('Usuario no encontrado')
+
+        except sqlite3.Error as e:
+            flash(f'Error al intentar iniciar sesión: {e}')
+    
+    return render_template('login.html')
+
+# Ruta para cerrar sesión
+@bp.route('/logout')
+def logout():
+    session.pop('user_id', None)
+    session.pop('role', None)
+    flash('Has cerrado sesión exitosamente')
+    return redirect(url_for('usuarios.login'))  # Redirige al login después de cerrar sesión
+
+# Obtener las contraseñas antiguas y actualizarlas como hashes
+def actualizar_contraseñas():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    # Seleccionar todos los usuarios sin contraseña hasheada
+    cursor.execute('SELECT id, password FROM usuarios')
+    usuarios = cursor.fetchall()
+
+    for usuario in usuarios:
+        id_usuario = usuario[0]
+        contraseña_plana = usuario[1]
+        
+        # Hashear la contraseña
+        hashed_password = generate_password_hash(contraseña_plana)
+        
+        # Actualizar la contraseña hasheada en la base de datos
+        cursor.execute('UPDATE usuarios SET password = ? WHERE id = ?', (hashed_password, id_usuario))
+    
+    conn.commit()
+
+@bp.route('/actualizar_contraseñas')
+def actualizar_contraseñas_route():
+    try:
+        actualizar_contraseñas()
+        flash('Las contraseñas se han actualizado correctamente.')
+    except Exception as e:
+        flash(f'Error al actualizar las contraseñas: {e}')
+    
+    return redirect(url_for('tablero.index'))
+
+
+# RUTA: Cambiar tu propia contraseña
+@bp.route('/cambiar_contrasena', methods=['GET', 'POST'])
+@login_required
+def cambiar_contrasena():
+    if request.method == 'POST':
+        actual = request.form['actual']
+        nueva = request.form['nueva']
+        confirmar = request.form['confirmar']
+
+        if nueva != confirmar:
+            flash('La nueva contraseña y la confirmación no coinciden.')
+            return redirect(url_for('usuarios.cambiar_contrasena'))
+
+        if not es_contrasena_segura(nueva):
+            flash('La nueva contraseña no es segura. Debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas, números y símbolos.')
+            return redirect(url_for('usuarios.cambiar_contrasena'))
+
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute('SELECT password FROM usuarios WHERE id = ?', (session['user_id'],))
+        actual_hash = cursor.fetchone()[0]
+
+        if not check_password_hash(actual_hash, actual):
+            flash('La contraseña actual no es correcta.')
+            return redirect(url_for('usuarios.cambiar_contrasena'))
+
+        nueva_hash = generate_password_hash(nueva)
+        cursor.execute('UPDATE usuarios SET password = ? WHERE id = ?', (nueva_hash, session['user_id']))
+        conn.commit()
+
+        flash('Contraseña actualizada correctamente.')
+        return redirect(url_for('tablero.index'))
+
+    return render_template('cambiar_contrasena.html')
+
+# RUTA: Gestionar usuarios (listar y modificar)
+@bp.route('/gestionar_usuarios', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def gestionar_usuarios():
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+
+    if request.method == 'POST':
+        user_id = request.form['user_id']
+        nuevo_username = request.form['username']
+        nuevo_role = request.form['role']
+        nueva_contrasena = request.form.get('nueva_contrasena')
+
+        if not nuevo_username or not nuevo_role:
+            flash('Todos los campos son obligatorios.')
+            return redirect(url_for('usuarios.gestionar_usuarios'))
+
+        # Actualizar nombre y rol
+        cursor.execute('''
+            UPDATE usuarios SET username = ?, role = ? WHERE id = ?
+        ''', (nuevo_username, nuevo_role, user_id))
+
+        # Actualizar contraseña si se ingresó una nueva
+        if nueva_contrasena:
+            if not es_contrasena_segura(nueva_contrasena):
+                flash('La contraseña no es segura. Debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas, números y símbolos.')
+                return redirect(url_for('usuarios.gestionar_usuarios'))
+
+            nueva_hash = generate_password_hash(nueva_contrasena)
+            cursor.execute('UPDATE usuarios SET password = ? WHERE id = ?', (nueva_hash, user_id))
+
+        conn.commit()
+        flash('Usuario actualizado correctamente.')
+
+    cursor.execute('SELECT id, username, role FROM usuarios')
+    usuarios = cursor.fetchall()
+    return render_template('gestionar_usuarios.html', usuarios=usuarios)
+
+def es_contrasena_segura(password):
+    return (
+        len(password) >= 8 and
+        re.search(r"[A-Z]", password) and
+        re.search(r"[a-z]", password) and
+        re.search(r"[0-9]", password) and
+        re.search(r"[!@#$%^&*(),.?\":{}|<>]", password)
+    )
@@ -0,0 +1,81 @@
+# Detector de canastas perdidas.
+#
+# Cada canasta prestada guarda su fecha de vencimiento: la fecha del préstamo más los días
+# permitidos para su tamaño y color (tabla umbrales_vencimiento). Un barrido periódico pasa
+# a canastas_vencidas las canastas cuyo vencimiento ya llegó, y al devolverlas salen de
+# ella. El tablero, la página de canastas perdidas y su PDF leen esa misma tabla.
+
+# Días permitidos para la canasta de la fila de canastas que se está actualizando:
+# primero el umbral de su tamaño y color, luego el de su tamaño y por último el general
+DIAS_PERMITIDOS_SQL = '''COALESCE(
+    (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = canastas.tamano AND u.color = canastas.color),
+    (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = canastas.tamano AND u.color = ''),
+    (SELECT u.dias FROM umbrales_vencimiento u WHERE u.tamano = '' AND u.color = '')
+)'''
+
+# Expresión SQL de la fecha de vencimiento a partir de la fecha del préstamo
+def expresion_vencimiento(fecha_prestamo):
+    return f"datetime({fecha_prestamo}, '+' || {DIAS_PERMITIDOS_SQL} || ' days')"
+
+# Canastas perdidas con la fecha del préstamo, el vendedor, los días que lleva prestada cada una
+# hasta la fecha indicada (parámetro) y la fecha en que vencieron
+CONSULTA_VENCIDAS = '''
+    SELECT cv.codigo_barras,
+           cv.fecha_prestamo,
+           v.nombre AS nombre_vendedor,
+           CAST(julianday(?) - julianday(cv.fecha_prestamo) AS INTEGER) AS dias_prestada,
+           cv.fecha_vencimiento
+    FROM canastas_vencidas cv
+    LEFT JOIN vendedores v ON cv.vendedor_codigo = v.codigo
+    ORDER BY cv.fecha_prestamo
+'''
+
+# Guardar los umbrales configurados. 'umbrales' usa como clave "Tamaño" o "Tamaño/Color".
+# Devuelve True si cambiaron respecto a los guardados (hay que recalcular los vencimientos).
+def guardar_umbrales(cursor, dias_general, umbrales):
+    nuevos = {('', ''): int(dias_general)}
+    for clave, dias in umbrales.items():
+        tamano, _, color = clave.partition('/')
+        nuevos[(tamano.strip(), color.strip())] = int(dias)
+
+    cursor.execute('SELECT tamano, color, dias FROM umbrales_vencimiento')
+    actuales = {(tamano, color): dias for tamano, color, dias in cursor.fetchall()}
+    if actuales == nuevos:
+        return False
+
+    cursor.execute('DELETE FROM umbrales_vencimiento')
+    cursor.executemany('INSERT INTO umbrales_vencimiento (tamano, color, dias) VALUES (?, ?, ?)',
+                       [(tamano, color, dias) for (tamano, color), dias in nuevos.items()])
+    return True
+
+# Pasar a canastas_vencidas las canastas cuyo vencimiento llegó. Solo se revisan los
+# vencimientos posteriores al último ya registrado: los anteriores entraron en un barrido previo.
+def barrer_vencidas(cursor, ahora):
+    cursor.execute('''
+        INSERT OR IGNORE INTO canastas_vencidas (codigo_barras, vendedor_codigo, fecha_prestamo, fecha_vencimiento)
+        SELECT codigo_barras, vendedor_actual, fecha_ultimo_movimiento, fecha_vencimiento
+        FROM canastas
+        WHERE fecha_vencimiento > COALESCE((SELECT MAX(fecha_vencimiento) FROM canastas_vencidas), '')
+        AND fecha_vencimiento <= ?
+    ''', (ahora,))
+    return cursor.rowcount
+
+# Recalcular el vencimiento de todas las canastas prestadas y el conjunto de vencidas desde
+# cero (al crear la tabla o al cambiar los umbrales)
+def recalcular_vencimientos(cursor, ahora):
+    cursor.execute(f'''
+        UPDATE canastas SET fecha_vencimiento = CASE
+            WHEN actualidad = 'Prestada' AND vendedor_actual IS NOT NULL AND fecha_ultimo_movimiento IS NOT NULL
+            THEN {expresion_vencimiento('fecha_ultimo_movimiento')}
+        END
+    ''')
+    cursor.execute('DELETE FROM canastas_vencidas')
+    barrer_vencidas(cursor, ahora)
+
+# Quitar del conjunto de vencidas las canastas que tuvieron un movimiento
+def quitar_vencidas(cursor, codigos):
+    cursor.executemany('DELETE FROM canastas_vencidas WHERE codigo_barras = ?', [(codigo,) for codigo in codigos])
+
+def contar_vencidas(cursor):
+    cursor.execute('SELECT COUNT(*) FROM canastas_vencidas')
+    return cursor.fetchone()[0]
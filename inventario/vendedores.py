@@ -0,0 +1,121 @@
+# Registro, modificación y exportación de vendedores
+import sqlite3
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+
+from .autenticacion import admin_required, login_required
+from .db import obtener_conexion
+from .directorio import invalidar_directorio
+from .exportaciones import respuesta_csv
+from .resumen import incrementar_version
+
+bp = Blueprint('vendedores', __name__)
+
+# Ruta para agregar un vendedor
+@bp.route('/vendedores', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def vendedores():
+    if request.method == 'POST':
+        codigo = request.form['codigo']
+        nombre = request.form['nombre']
+        
+        # Validar que los campos no estén vacíos
+        if not (codigo and nombre):
+            flash('Todos los campos son obligatorios')
+            return redirect(url_for('vendedores.vendedores'))
+        
+        # Insertar en la base de datos
+        try:
+            conn = obtener_conexion()
+            cursor = conn.cursor()
+            cursor.execute(''' 
+                INSERT INTO vendedores (codigo, nombre)
+                VALUES (?, ?)
+            ''', (codigo, nombre))
+            invalidar_directorio(cursor)
+            conn.commit()
+            flash('Vendedor registrado con éxito')
+        except sqlite3.Error as e:
+            flash(f'Error al registrar el vendedor: {e}')
+        
+        return redirect(url_for('vendedores.vendedores'))
+
+    conn = obtener_conexion()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM vendedores')
+    vendedores = cursor.fetchall()
+    
+    return render_template('vendedores.html', vendedores=vendedores)
+
+# Ruta para eliminar un vendedor (solo administradores)
+@bp.route('/eliminar_vendedor', methods=['POST'])
+@login_required
+@admin_required
+def eliminar_vendedor():
+    codigo = request.form['codigo']
+    
+    if not codigo:
+        flash('Debe ingresar el código del vendedor')
+        return redirect(url_for('vendedores.vendedores'))
+
+    try:
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute('''DELETE FROM vendedores WHERE codigo = ?''', (codigo,))
+        incrementar_version(cursor)
+        invalidar_directorio(cursor)
+        conn.commit()
+
+        flash('Vendedor eliminado con éxito')
+    except sqlite3.Error as e:
+        flash(f'Error al eliminar el vendedor: {e}')
+
+    return redirect(url_for('vendedores.vendedores'))
+
+# Ruta para modificar un vendedor (solo administradores)
+@bp.route('/modificar_vendedor', methods=['POST'])
+@login_required
+@admin_required
+def modificar_vendedor():
+    codigo = request.form['codigo']
+    nombre = request.form['nombre']
+    
+    if not (codigo and nombre):
+        flash('Todos los campos son obligatorios')
+        return redirect(url_for('vendedores.vendedores'))
+    
+    try:
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute('''UPDATE vendedores SET nombre = ? WHERE codigo = ?''', (nombre, codigo))
+        incrementar_version(cursor)
+        invalidar_directorio(cursor)
+        conn.commit()
+        
+        flash('Vendedor modificado con éxito')
+    except sqlite3.Error as e:
+        flash(f'Error al modificar el vendedor: {e}')
+    
+    return redirect(url_for('vendedores.vendedores'))
+
+@bp.route('/exportar_vendedores_csv', methods=['GET'])
+@login_required
+def exportar_vendedores_csv():
+    try:
+        # Conexión a la base de datos
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+
+        # Obtener todos los vendedores
+        cursor.execute('SELECT codigo, nombre FROM vendedores')
+
+        # Definir el encabezado de las columnas del CSV
+        header = ["Código", "Nombre"]
+
+        # Enviar el archivo CSV mientras se leen las filas del cursor
+        return respuesta_csv('vendedores.csv', header, cursor)
+
+    except Exception as e:
+        flash(f'Error al exportar los vendedores a CSV: {e}')
+        return redirect(url_for('tablero.index'))
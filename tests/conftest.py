@@ -0,0 +1,107 @@
+# Aplicación de prueba sobre una base SQLite temporal, con vendedores y canastas de ejemplo
+import time
+from collections import OrderedDict
+
+import pytest
+
+from inventario import canastas, crear_app, directorio, instantaneas, metricas, tablero
+from inventario.db import obtener_conexion
+from inventario.esquema import reconstruir_resumen, reconstruir_resumen_diario
+from inventario.instantaneas import ultima_instantanea
+from inventario.trabajos import ERROR, TERMINADO
+
+VENDEDORES = [('V1', 'Ana'), ('V2', 'Bruno'), ('V3', 'Carla')]
+CANASTAS = [(f'C{i:03d}', 'Grande' if i % 2 else 'Pequeña', 'Rojo' if i % 3 else 'Azul') for i in range(30)]
+
+# Estado de las canastas y contenido de las tablas de resumen, para comparar
+CONSULTAS_ESTADO = {
+    'canastas': 'SELECT codigo_barras, actualidad, vendedor_actual, fecha_ultimo_movimiento FROM canastas ORDER BY 1',
+    'resumen_canastas': 'SELECT actualidad, cantidad FROM resumen_canastas WHERE cantidad != 0 ORDER BY 1',
+    'resumen_vendedores': 'SELECT vendedor_codigo, prestadas_activas FROM resumen_vendedores WHERE prestadas_activas != 0 ORDER BY 1',
+    'resumen_diario': 'SELECT dia, vendedor_codigo, tipo, tamano, color, cantidad FROM resumen_diario ORDER BY 1, 2, 3, 4, 5',
+}
+
+def leer_estado(cursor):
+    estado = {}
+    for nombre, sql in CONSULTAS_ESTADO.items():
+        cursor.execute(sql)
+        estado[nombre] = cursor.fetchall()
+    return estado
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Cachés y revisiones de cada proceso: cada prueba empieza con una base nueva
+    monkeypatch.setattr(directorio, 'directorio_cache', {'version': None, 'vendedores': [], 'codigos': {}})
+    monkeypatch.setattr(canastas, 'ultimo_barrido_vencidas', None)
+    monkeypatch.setattr(instantaneas, 'ultima_revision_instantaneas', None)
+    monkeypatch.setattr(tablero, 'graficos_cache', OrderedDict())
+    # Las métricas se vuelcan por la conexión del proceso, que apunta a la base de la prueba anterior
+    if metricas.conexion_volcado is not None:
+        metricas.conexion_volcado.close()
+    metricas.reiniciar_en_proceso_hijo()
+
+    app = crear_app({
+        'TESTING': True,
+        'BASE_DATOS': str(tmp_path / 'inventario.db'),
+        'ARCHIVO_CARPETA': str(tmp_path / 'archivo'),
+    })
+    # Los informes en segundo plano dejan sus archivos en la carpeta instance
+    app.instance_path = str(tmp_path / 'instance')
+    with app.app_context():
+        conn = obtener_conexion()
+        conn.executemany('INSERT INTO vendedores (codigo, nombre) VALUES (?, ?)', VENDEDORES)
+        conn.executemany('''
+            INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+            VALUES (?, ?, ?, 'Nuevo', '2023-01-01 00:00:00', 'Disponible')
+        ''', CANASTAS)
+        reconstruir_resumen(conn.cursor())
+        conn.commit()
+    yield app
+    app.extensions['ejecutor_trabajos'].shutdown()
+
+# Cliente con la sesión de un administrador
+@pytest.fixture
+def cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['user_id'] = 1
+        sesion['role'] = 'admin'
+    return cliente
+
+# Función que lee el estado actual de la base de prueba
+@pytest.fixture
+def estado(app):
+    def leer():
+        with app.app_context():
+            return leer_estado(obtener_conexion().cursor())
+    return leer
+
+# Función que recalcula las tablas de resumen desde cero sobre el estado actual, sin confirmar
+@pytest.fixture
+def recuento(app):
+    def recontar():
+        with app.app_context():
+            conn = obtener_conexion()
+            cursor = conn.cursor()
+            reconstruir_resumen(cursor, ultima_instantanea(cursor))
+            reconstruir_resumen_diario(cursor)
+            recontado = leer_estado(cursor)
+            conn.rollback()
+            return recontado
+    return recontar
+
+# Función que espera a que termine el trabajo al que redirige la respuesta de un informe en
+# segundo plano. Devuelve (id del trabajo, estado en JSON).
+@pytest.fixture
+def esperar_trabajo(cliente):
+    def esperar(respuesta, segundos=10):
+        assert respuesta.status_code == 302
+        id_trabajo = respuesta.headers['Location'].rstrip('/').rsplit('/', 1)[-1]
+        limite = time.monotonic() + segundos
+        while time.monotonic() < limite:
+            estado = cliente.get(f'/trabajos/{id_trabajo}/estado').get_json()
+            if estado['estado'] in (TERMINADO, ERROR):
+                return id_trabajo, estado
+            time.sleep(0.05)
+        raise AssertionError(f'El trabajo {id_trabajo} no terminó en {segundos} s')
+    return esperar
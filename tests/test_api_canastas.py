@@ -0,0 +1,38 @@
+# Inventario de canastas por páginas desde /api/canastas: filtros, búsqueda por prefijo y orden
+
+def pedir(cliente, **parametros):
+    respuesta = cliente.get('/api/canastas', query_string=parametros)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+def test_paginas_cubren_todas_las_canastas(cliente):
+    codigos = []
+    for pagina in (1, 2):
+        datos = pedir(cliente, pagina=pagina, por_pagina=25)
+        assert (datos['total'], datos['paginas'], datos['por_pagina']) == (30, 2, 25)
+        codigos += [canasta['codigo_barras'] for canasta in datos['canastas']]
+    assert codigos == [f'C{i:03d}' for i in range(30)]
+
+    # Más allá de la última página no hay filas
+    assert pedir(cliente, pagina=3, por_pagina=25)['canastas'] == []
+
+def test_filtros_busqueda_y_orden(cliente):
+    datos = pedir(cliente, buscar='C01', tamano='Grande', orden='codigo_barras', direccion='desc')
+    assert [canasta['codigo_barras'] for canasta in datos['canastas']] == ['C019', 'C017', 'C015', 'C013', 'C011']
+    assert datos['total'] == 5
+
+    # El orden por otra columna desempata por código, así las páginas son estables
+    datos = pedir(cliente, orden='color', por_pagina=25)
+    colores = [(canasta['color'], canasta['codigo_barras']) for canasta in datos['canastas']]
+    assert colores == sorted(colores)
+
+def test_parametros_no_validos_usan_los_de_defecto(cliente):
+    datos = pedir(cliente, orden='codigo_barras; DROP TABLE canastas', por_pagina=7, pagina=-3)
+    assert (datos['pagina'], datos['por_pagina'], datos['total']) == (1, 50, 30)
+
+def test_solo_administradores(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['user_id'] = 2
+        sesion['role'] = 'vendedor'
+    assert cliente.get('/api/canastas').status_code == 302
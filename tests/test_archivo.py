@@ -0,0 +1,87 @@
+# Archivar los préstamos cerrados y reconstruir después el resumen diario no cambia los
+# totales de los informes por vendedor ni por tamaño y color
+from datetime import date, datetime, timedelta
+
+from inventario.archivo import adjuntar_archivos_rango, archivar_movimientos, carpeta_archivo
+from inventario.db import obtener_conexion
+from inventario.informes import consultar_movimientos_por_vendedor, consultar_totales_por_canasta
+from inventario.movimientos import consultar_pagina_movimientos, leer_filtros_movimientos
+from inventario.resumen import aplicar_movimientos
+
+# Préstamos y devoluciones de 2023 y 2024: cada canasta sale y vuelve con el mismo vendedor,
+# y las tres últimas quedan prestadas
+def registrar_historial(conn):
+    cursor = conn.cursor()
+    fecha = datetime(2023, 11, 1, 8, 0, 0)
+    for vuelta in range(4):
+        for i in range(12):
+            codigo, vendedor = f'C{i:03d}', f'V{i % 3 + 1}'
+            aplicar_movimientos(cursor, vendedor, 'Sale', [(codigo, 'Disponible')], fecha)
+            fecha += timedelta(days=3)
+            if vuelta < 3 or i < 9:
+                aplicar_movimientos(cursor, vendedor, 'Entra', [(codigo, 'Prestada')], fecha)
+            fecha += timedelta(hours=5)
+    conn.commit()
+
+def totales(cursor):
+    hoy = date.today().isoformat()
+    return (sorted(consultar_movimientos_por_vendedor(cursor, '2023-01-01', hoy)),
+            sorted(consultar_totales_por_canasta(cursor, '2023-01-01', hoy)),
+            sorted(consultar_totales_por_canasta(cursor, '2024-01-01', '2024-01-31')))
+
+def test_archivar_y_reconstruir_resumen_diario_conserva_totales(app, estado):
+    with app.app_context():
+        conn = obtener_conexion()
+        registrar_historial(conn)
+        antes = totales(conn.cursor())
+    estado_antes = estado()
+
+    with app.app_context():
+        conn = obtener_conexion()
+        archivados = archivar_movimientos(conn, carpeta_archivo(app), '2024-06-01')
+        assert sum(cantidad for _, cantidad in archivados) > 0
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM movimientos WHERE fecha < '2024-06-01' AND tipo = 'Entra'")
+        assert cursor.fetchone()[0] == 0
+        assert totales(cursor) == antes
+
+    resultado = app.test_cli_runner().invoke(args=['reconstruir-resumen-diario'])
+    assert resultado.exit_code == 0, resultado.output
+
+    with app.app_context():
+        conn = obtener_conexion()
+        assert totales(conn.cursor()) == antes
+    assert estado() == estado_antes
+
+# Páginas del informe de movimientos de un rango que abarca años archivados y la tabla de movimientos
+def paginas_rango(conn, fecha_inicio, fecha_fin, por_pagina):
+    cursor = conn.cursor()
+    filtros = leer_filtros_movimientos({'fecha_desde': fecha_inicio, 'fecha_hasta': fecha_fin})
+    esquemas = ['main'] + adjuntar_archivos_rango(conn, fecha_inicio, fecha_fin)
+    filas, despues, hay_siguiente = [], None, True
+    while hay_siguiente:
+        movimientos, _, hay_siguiente = consultar_pagina_movimientos(cursor, filtros, por_pagina, despues,
+                                                                     esquemas=esquemas)
+        assert len(movimientos) <= por_pagina
+        filas.extend(movimientos)
+        despues = movimientos[-1][1], movimientos[-1][0]
+    return filas
+
+def test_informe_movimientos_por_paginas_incluye_lo_archivado(app, cliente):
+    with app.app_context():
+        conn = obtener_conexion()
+        registrar_historial(conn)
+        antes = paginas_rango(conn, '2023-12-01', '2024-08-31', 7)
+        assert len(antes) > 7
+        archivar_movimientos(conn, carpeta_archivo(app), '2024-06-01')
+
+    with app.app_context():
+        assert paginas_rango(obtener_conexion(), '2023-12-01', '2024-08-31', 7) == antes
+
+    respuesta = cliente.get('/informe_movimientos?fecha_inicio=2023-12-01&fecha_fin=2024-08-31&por_pagina=25')
+    texto = respuesta.get_data(as_text=True)
+    assert respuesta.status_code == 200
+    assert f'{len(antes)} movimientos en el rango de fechas' in texto
+    # Solo la primera página, con el enlace a la siguiente desde el último movimiento mostrado
+    assert f'despues={antes[24][1]}|{antes[24][0]}'.replace(' ', '+').replace('|', '%7C') in texto
+    assert antes[25][1] not in texto
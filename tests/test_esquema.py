@@ -0,0 +1,81 @@
+# Migraciones: una base que se actualiza desde la versión 1 con datos queda igual que una
+# creada de cero en la que se registran los mismos movimientos
+import sqlite3
+from datetime import datetime, timedelta
+
+from inventario import esquema
+from inventario.resumen import aplicar_movimientos
+from inventario.vencimientos import barrer_vencidas
+
+VENDEDORES = [('V1', 'Ana'), ('V2', 'Bruno'), ('V3', 'Carla')]
+CANASTAS = [(f'C{i:03d}', 'Grande' if i % 2 else 'Pequeña', 'Rojo') for i in range(6)]
+
+# (vendedor, tipo, código, días atrás): C001 y C003 quedan prestadas y vencidas, C002 prestada
+HISTORIAL = [
+    ('V3', 'Sale', 'C003', 20), ('V3', 'Entra', 'C003', 19), ('V2', 'Sale', 'C003', 15),
+    ('V1', 'Sale', 'C000', 10), ('V1', 'Sale', 'C001', 10), ('V1', 'Entra', 'C000', 9),
+    ('V2', 'Sale', 'C002', 2),
+]
+
+# Las dos bases usan las mismas fechas
+AHORA = datetime.now()
+
+def fecha(dias_atras):
+    return (AHORA - timedelta(days=dias_atras)).strftime('%Y-%m-%d %H:%M:%S')
+
+def leer_tablas(conn):
+    tablas = ('vendedores', 'canastas', 'movimientos', 'resumen_canastas', 'resumen_vendedores',
+              'resumen_diario', 'canastas_vencidas')
+    return {tabla: conn.execute(f'SELECT * FROM {tabla} ORDER BY 1, 2').fetchall() for tabla in tablas}
+
+def base_actualizada(ruta, monkeypatch):
+    conn = sqlite3.connect(ruta)
+    with monkeypatch.context() as parche:
+        parche.setattr(esquema, 'MIGRACIONES', esquema.MIGRACIONES[:1])
+        esquema.migrar(conn)
+
+    # Datos escritos por la aplicación de la versión 1: solo movimientos y el estado de cada canasta
+    prestadas = {}
+    for _, tipo, codigo, _ in HISTORIAL:
+        prestadas[codigo] = tipo == 'Sale'
+    conn.executemany('INSERT INTO vendedores (codigo, nombre) VALUES (?, ?)', VENDEDORES)
+    conn.executemany('''
+        INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+        VALUES (?, ?, ?, 'Nuevo', '2023-01-01 00:00:00', ?)
+    ''', [(codigo, tamano, color, 'Prestada' if prestadas.get(codigo) else 'Disponible')
+          for codigo, tamano, color in CANASTAS])
+    conn.executemany('INSERT INTO movimientos (vendedor_codigo, tipo, codigo_barras, fecha) VALUES (?, ?, ?, ?)',
+                     [(vendedor, tipo, codigo, fecha(dias_atras)) for vendedor, tipo, codigo, dias_atras in HISTORIAL])
+    conn.commit()
+
+    esquema.migrar(conn)
+    return conn
+
+def base_nueva(ruta):
+    conn = sqlite3.connect(ruta)
+    esquema.migrar(conn)
+    cursor = conn.cursor()
+    cursor.executemany('INSERT INTO vendedores (codigo, nombre) VALUES (?, ?)', VENDEDORES)
+    cursor.executemany('''
+        INSERT INTO canastas (codigo_barras, tamano, color, estado, fecha_registro, actualidad)
+        VALUES (?, ?, ?, 'Nuevo', '2023-01-01 00:00:00', 'Disponible')
+    ''', CANASTAS)
+    esquema.reconstruir_resumen(cursor)
+    for vendedor, tipo, codigo, dias_atras in HISTORIAL:
+        estado_canasta = 'Disponible' if tipo == 'Sale' else 'Prestada'
+        aplicar_movimientos(cursor, vendedor, tipo, [(codigo, estado_canasta)], fecha(dias_atras))
+    barrer_vencidas(cursor, fecha(0))
+    conn.commit()
+    return conn
+
+def test_base_actualizada_igual_a_base_nueva(tmp_path, monkeypatch):
+    actualizada = base_actualizada(tmp_path / 'actualizada.db', monkeypatch)
+    nueva = base_nueva(tmp_path / 'nueva.db')
+    try:
+        assert esquema.version_actual(actualizada) == esquema.version_actual(nueva) == esquema.MIGRACIONES[-1][0]
+        tablas = leer_tablas(nueva)
+        assert [fila[0] for fila in tablas['canastas_vencidas']] == ['C001', 'C003']
+        assert leer_tablas(actualizada) == tablas
+    finally:
+        actualizada.close()
+        nueva.close()
@@ -0,0 +1,52 @@
+# Eventos en tiempo real: el vigilante publica los cambios a las pantallas conectadas y las que
+# no caben en el proceso reciben un flujo que les pide reconectarse más tarde
+import json
+import queue
+
+from inventario import crear_app
+
+def leer_eventos(cola):
+    eventos = []
+    while not cola.empty():
+        nombre, datos = cola.get_nowait().strip().split('\n')
+        eventos.append((nombre.removeprefix('event: '), json.loads(datos.removeprefix('data: '))))
+    return eventos
+
+def test_revisar_publica_movimientos_y_tablero(app, cliente):
+    difusor = app.extensions['difusor_eventos']
+    cola = queue.Queue()
+    difusor.pantallas.add(cola)
+
+    with app.app_context():
+        version, ultimo = difusor.revisar(None, None)
+    (nombre, tablero), = leer_eventos(cola)
+    assert nombre == 'tablero' and tablero['prestadas'] == 0
+
+    # Sin cambios no se publica nada
+    with app.app_context():
+        assert difusor.revisar(version, ultimo) == (version, ultimo)
+    assert cola.empty()
+
+    cliente.post('/movimientos/lote', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigos': ['C001', 'C002']})
+    with app.app_context():
+        difusor.revisar(version, ultimo)
+    (nombre, movimientos), (_, tablero) = leer_eventos(cola)
+    assert nombre == 'movimientos'
+    assert [m['codigo_barras'] for m in movimientos] == ['C001', 'C002']
+    assert tablero['prestadas'] == 2
+    assert tablero['vendedores'] == [{'nombre': 'Ana', 'prestadas': 2}]
+
+def test_pantalla_de_mas_recibe_retry_y_no_un_error(app, cliente):
+    app.config['EVENTOS_MAXIMO_PANTALLAS'] = 0
+    respuesta = cliente.get('/eventos')
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'text/event-stream'
+    assert respuesta.get_data(as_text=True).startswith('retry: ')
+    assert not app.extensions['difusor_eventos'].pantallas
+
+def test_maximo_de_pantallas_segun_hilos_de_gunicorn(tmp_path, monkeypatch):
+    monkeypatch.delenv('EVENTOS_MAXIMO_PANTALLAS', raising=False)
+    monkeypatch.setenv('GUNICORN_HILOS', '12')
+    app = crear_app({'TESTING': True, 'BASE_DATOS': str(tmp_path / 'inventario.db')})
+    assert app.config['EVENTOS_MAXIMO_PANTALLAS'] == 6
+    app.extensions['ejecutor_trabajos'].shutdown()
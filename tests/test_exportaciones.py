@@ -0,0 +1,39 @@
+# Exportaciones: el CSV se envía por bloques mientras se leen las filas y el libro de Excel se
+# genera en segundo plano
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from inventario import exportaciones
+
+def test_csv_se_envia_por_bloques(monkeypatch):
+    monkeypatch.setattr(exportaciones, 'FILAS_POR_LOTE', 4)
+    filas = ((i, f'Canasta {i}', None) for i in range(10))
+    bloques = list(exportaciones.generar_csv(['Número', 'Nombre', 'Vacío'], filas))
+    assert len(bloques) == 3
+    lineas = list(csv.reader(io.StringIO(''.join(bloques))))
+    assert lineas[0] == ['Número', 'Nombre', 'Vacío']
+    assert lineas[1:] == [[str(i), f'Canasta {i}', ''] for i in range(10)]
+
+def test_exportar_canastas_csv(cliente):
+    respuesta = cliente.get('/exportar_canastas_csv')
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'text/csv'
+    assert 'attachment; filename=canastas.csv' == respuesta.headers['Content-Disposition']
+    lineas = list(csv.reader(io.StringIO(respuesta.get_data(as_text=True))))
+    assert len(lineas) == 31
+    assert lineas[1][0] == 'C000' and lineas[1][-1] == 'Disponible'
+
+def test_exportar_canastas_excel_en_segundo_plano(cliente, esperar_trabajo):
+    id_trabajo, estado = esperar_trabajo(cliente.get('/exportar_canastas'))
+    assert estado['estado'] == 'terminado', estado['error']
+
+    respuesta = cliente.get(estado['descarga'])
+    assert respuesta.mimetype == exportaciones.TIPO_EXCEL
+    assert 'canastas.xlsx' in respuesta.headers['Content-Disposition']
+    hoja = load_workbook(io.BytesIO(respuesta.data), read_only=True).active
+    filas = list(hoja.iter_rows(values_only=True))
+    assert filas[0] == ('Código de Barras', 'Tamaño', 'Color', 'Estado', 'Fecha de Registro', 'Actualidad')
+    assert len(filas) == 31
+    assert filas[1][0] == 'C000'
@@ -0,0 +1,68 @@
+# Importación de canastas desde CSV y XLSX: se validan todas las filas, se descartan los códigos
+# ya registrados y se insertan las demás
+import io
+
+from openpyxl import Workbook
+
+from inventario.canastas import validar_filas_importacion
+
+def importar(cliente, contenido, nombre):
+    return cliente.post('/canastas/importar', data={'archivo': (io.BytesIO(contenido), nombre)},
+                        content_type='multipart/form-data')
+
+def test_validar_filas_importacion():
+    filas = [
+        ['Código de barras', 'Tamaño', 'Color', 'Estado'],
+        ['N001', 'grande', 'AZUL', 'nuevo'],
+        ['', 'Grande', 'Azul', 'Nuevo'],
+        ['N001', 'Grande', 'Azul', 'Nuevo'],
+        ['N002', 'Gigante', 'Azul', 'Nuevo'],
+        ['N003', 'Grande', 'Fucsia', 'Nuevo'],
+        ['N004', 'Grande', 'Azul', 'Roto'],
+        ['X' * 26, 'Grande', 'Azul', 'Nuevo'],
+        ['', '', '', ''],
+        ['N005', 'Pequeña', 'Gris Claro', 'Usado'],
+    ]
+    validas, errores = validar_filas_importacion(filas)
+    assert validas == [(2, 'N001', 'Grande', 'Azul', 'Nuevo'), (10, 'N005', 'Pequeña', 'Gris Claro', 'Usado')]
+    assert [(error['fila'], error['mensaje']) for error in errores] == [
+        (3, 'Falta el código de barras'),
+        (4, 'Código repetido en el archivo'),
+        (5, 'Tamaño no válido: Gigante'),
+        (6, 'Color no válido: Fucsia'),
+        (7, 'Estado no válido: Roto'),
+        (8, 'El código de barras tiene más de 25 caracteres'),
+    ]
+
+def test_importar_csv_descarta_los_registrados(cliente, estado, recuento):
+    contenido = 'codigo_barras;tamano;color;estado\nN001;Grande;Azul;Nuevo\nC001;Grande;Azul;Nuevo\nN002;Mediana;Rojo;Usado\n'
+    respuesta = importar(cliente, contenido.encode('utf-8-sig'), 'canastas.csv')
+    assert respuesta.status_code == 200
+    texto = respuesta.get_data(as_text=True)
+    assert '2 canastas registradas, 1 filas con errores' in texto
+    assert 'La canasta ya está registrada' in texto
+
+    actual = estado()
+    assert ('N002', 'Disponible', None, None) in actual['canastas']
+    assert actual['resumen_canastas'] == [('Disponible', 32)]
+    assert actual == recuento()
+
+def test_importar_xlsx(cliente, estado):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(['Código', 'Tamaño', 'Color', 'Estado'])
+    hoja.append([123456789, 'Estandar', 'Verde', 'Nuevo'])
+    hoja.append(['N010', 'Estandar', 'Verde', 'Regular'])
+    contenido = io.BytesIO()
+    libro.save(contenido)
+
+    respuesta = importar(cliente, contenido.getvalue(), 'canastas.xlsx')
+    assert '1 canastas registradas, 1 filas con errores' in respuesta.get_data(as_text=True)
+    # Los códigos numéricos de Excel se guardan sin decimales
+    assert ('123456789', 'Disponible', None, None) in estado()['canastas']
+
+def test_importar_otro_formato_no_registra_nada(cliente, estado):
+    antes = estado()
+    respuesta = importar(cliente, b'N001,Grande,Azul,Nuevo', 'canastas.txt')
+    assert 'El archivo debe ser CSV o XLSX' in respuesta.get_data(as_text=True)
+    assert estado() == antes
@@ -0,0 +1,76 @@
+# Reproducir los movimientos después de un reinicio de las canastas da el mismo estado que
+# el registrado en vivo, y no deshace el reinicio
+from inventario import instantaneas
+from inventario.db import obtener_conexion
+from inventario.instantaneas import MANUAL, PERIODICA, tomar_instantanea
+
+def escanear(cliente, vendedor, tipo, codigos):
+    for codigo in codigos:
+        respuesta = cliente.post('/api/movimientos', json={'vendedor': vendedor, 'tipo': tipo, 'codigo_barras': codigo})
+        assert respuesta.get_json()['ok'], respuesta.get_json()
+
+def reproducir(app, *argumentos):
+    resultado = app.test_cli_runner().invoke(args=['reproducir-movimientos', *argumentos])
+    return resultado.exit_code, resultado.output
+
+def test_reproducir_despues_de_un_reinicio_coincide_con_el_estado_en_vivo(app, cliente, estado):
+    escanear(cliente, 'Ana', 'Sale', ['C001', 'C002', 'C003'])
+    escanear(cliente, 'Bruno', 'Sale', ['C004', 'C005'])
+    escanear(cliente, 'Ana', 'Entra', ['C002'])
+    with app.app_context():
+        conn = obtener_conexion()
+        anterior = tomar_instantanea(conn.cursor(), MANUAL)
+        conn.commit()
+
+    assert cliente.post('/borrar_movimientos').status_code == 302
+    escanear(cliente, 'Carla', 'Sale', ['C001', 'C006'])
+    escanear(cliente, 'Bruno', 'Sale', ['C007'])
+    escanear(cliente, 'Carla', 'Entra', ['C006'])
+    en_vivo = estado()
+
+    # Desde la última instantánea (el reinicio) y desde el inicio del historial que cuenta
+    for argumentos in ((), ('--instantanea', '0')):
+        codigo, salida = reproducir(app, *argumentos)
+        assert codigo == 0, salida
+        assert '0 canastas y 0 vendedores con diferencias' in salida
+        assert estado() == en_vivo
+
+    # Un estado dañado a mano se corrige reproduciendo los movimientos
+    with app.app_context():
+        conn = obtener_conexion()
+        conn.execute("UPDATE canastas SET actualidad = 'Disponible', vendedor_actual = NULL WHERE codigo_barras = 'C007'")
+        conn.execute('UPDATE resumen_vendedores SET prestadas_activas = prestadas_activas + 4')
+        conn.commit()
+    codigo, salida = reproducir(app, '--instantanea', '0')
+    assert codigo == 0, salida
+    assert estado() == en_vivo
+
+    # Una instantánea anterior al reinicio solo sirve para verificar
+    codigo, salida = reproducir(app, '--instantanea', str(anterior[0]))
+    assert codigo != 0
+    assert 'anterior al último reinicio' in salida
+    codigo, salida = reproducir(app, '--instantanea', str(anterior[0]), '--verificar')
+    assert codigo == 0, salida
+    assert estado() == en_vivo
+
+def test_instantanea_periodica_se_toma_fuera_de_la_peticion(app, cliente, monkeypatch):
+    app.config['INSTANTANEAS_CADA_MOVIMIENTOS'] = 3
+    monkeypatch.setattr(instantaneas, 'ultima_revision_instantaneas', None)
+    escanear(cliente, 'Ana', 'Sale', ['C001', 'C002', 'C003'])
+
+    pedidas = []
+    monkeypatch.setattr(app.extensions['ejecutor_trabajos'], 'submit', lambda *argumentos: pedidas.append(argumentos))
+    assert cliente.get('/movimientos').status_code == 200
+    with app.app_context():
+        cursor = obtener_conexion().cursor()
+        cursor.execute('SELECT COUNT(*) FROM instantaneas')
+        assert cursor.fetchone()[0] == 0
+
+    # La petición solo la encarga; el ejecutor la toma con su propia conexión
+    assert len(pedidas) == 1
+    funcion, argumento = pedidas[0]
+    funcion(argumento)
+    with app.app_context():
+        cursor = obtener_conexion().cursor()
+        cursor.execute('SELECT movimiento_id, motivo FROM instantaneas')
+        assert cursor.fetchall() == [(3, PERIODICA)]
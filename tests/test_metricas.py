@@ -0,0 +1,49 @@
+# Métricas en /metrics: lo medido por cada proceso se suma en la tabla metricas de la base, así
+# los totales son los de todos los workers
+import re
+import sqlite3
+
+from inventario import metricas
+
+def valor(texto, linea):
+    coincidencia = re.search(rf'^{re.escape(linea)} (\S+)$', texto, re.MULTILINE)
+    return float(coincidencia.group(1)) if coincidencia else 0.0
+
+PETICIONES_API = 'inventario_peticiones_total{endpoint="canastas.api_canastas",metodo="GET",estado="200"}'
+
+def test_peticiones_se_cuentan_por_ruta(cliente):
+    antes = valor(cliente.get('/metrics').get_data(as_text=True), PETICIONES_API)
+    for _ in range(3):
+        cliente.get('/api/canastas')
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    assert valor(texto, PETICIONES_API) == antes + 3
+    assert '# TYPE inventario_peticion_segundos histogram' in texto
+    assert 'inventario_peticion_segundos_count{endpoint="canastas.api_canastas",metodo="GET"}' in texto
+
+def test_se_suman_las_mediciones_de_otro_proceso(app, cliente):
+    antes = valor(cliente.get('/metrics').get_data(as_text=True), PETICIONES_API)
+    # Otro worker volcó 5 peticiones a la misma tabla
+    otra = sqlite3.connect(app.config['BASE_DATOS'])
+    try:
+        otra.execute('''
+            INSERT INTO metricas (metrica, etiquetas, campo, valor) VALUES (?, ?, '', 5)
+            ON CONFLICT(metrica, etiquetas, campo) DO UPDATE SET valor = valor + excluded.valor
+        ''', ('inventario_peticiones_total', '["canastas.api_canastas", "GET", "200"]'))
+        otra.commit()
+    finally:
+        otra.close()
+    assert valor(cliente.get('/metrics').get_data(as_text=True), PETICIONES_API) == antes + 5
+
+def test_token_de_metricas(app):
+    app.config['METRICAS_TOKEN'] = 'secreto'
+    cliente = app.test_client()
+    assert cliente.get('/metrics').status_code == 401
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer otro'}).status_code == 401
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
+
+def test_volcado_no_pierde_mediciones(app):
+    metricas.peticiones.sumar(('prueba', 'GET', '200'))
+    metricas.volcar_metricas(app.config['BASE_DATOS'])
+    metricas.peticiones.sumar(('prueba', 'GET', '200'))
+    texto = metricas.exportar_metricas(app.config['BASE_DATOS'])
+    assert valor(texto, 'inventario_peticiones_total{endpoint="prueba",metodo="GET",estado="200"}') == 2
@@ -0,0 +1,47 @@
+# Registro de movimientos por lote y por la API de escaneo
+
+def test_lote_registra_las_validas_y_coincide_con_recuento(cliente, estado, recuento):
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigo_barras': 'C001'})
+    assert respuesta.get_json()['ok']
+
+    # Lote con canastas válidas, una ya prestada, una repetida y una que no existe
+    respuesta = cliente.post('/movimientos/lote', json={
+        'vendedor': 'Bruno', 'tipo': 'Sale',
+        'codigos': ['C010', 'C011', 'C001', 'C010', 'NO-EXISTE', 'C002'],
+    })
+    resultados = respuesta.get_json()['resultados']
+    assert [r['codigo_barras'] for r in resultados] == ['C010', 'C011', 'C001', 'C010', 'NO-EXISTE', 'C002']
+    assert [r['codigo_barras'] for r in resultados if r['registrado']] == ['C010', 'C011', 'C002']
+    assert estado() == recuento()
+
+    respuesta = cliente.post('/movimientos/lote', json={'vendedor': 'Bruno', 'tipo': 'Entra', 'codigos': ['C010', 'C011']})
+    assert all(r['registrado'] for r in respuesta.get_json()['resultados'])
+    assert estado() == recuento()
+    assert estado()['resumen_canastas'] == [('Disponible', 28), ('Prestada', 2)]
+
+def test_lote_demasiado_grande_no_registra_nada(cliente, estado):
+    antes = estado()
+    codigos = [f'C{i:03d}' for i in range(30)] * 40
+    respuesta = cliente.post('/movimientos/lote', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigos': codigos})
+    assert respuesta.status_code == 400
+    assert estado() == antes
+
+def test_api_responde_el_movimiento_registrado(cliente):
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigo_barras': 'C005'})
+    datos = respuesta.get_json()
+    assert respuesta.status_code == 200 and datos['ok']
+    assert datos['movimiento']['codigo_barras'] == 'C005'
+    assert datos['contador_registros'] == 1
+
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigo_barras': 'C005'})
+    assert respuesta.status_code == 400
+    assert not respuesta.get_json()['ok']
+
+def test_tipo_no_valido_no_registra_nada(cliente, estado, recuento):
+    antes = estado()
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Perdida', 'codigo_barras': 'C001'})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['mensaje'] == 'Tipo de movimiento no válido'
+    respuesta = cliente.post('/movimientos/lote', json={'vendedor': 'Ana', 'tipo': 'Perdida', 'codigos': ['C001']})
+    assert respuesta.status_code == 400
+    assert estado() == antes == recuento()
@@ -0,0 +1,83 @@
+# Paginación por posición (keyset) del historial de movimientos: recorrer las páginas hacia
+# adelante y hacia atrás da las mismas filas, sin saltos ni repetidos, aunque haya fechas iguales
+from datetime import datetime, timedelta
+
+from inventario.db import obtener_conexion
+from inventario.movimientos import consultar_pagina_movimientos, contar_movimientos, leer_filtros_movimientos
+from inventario.resumen import aplicar_movimientos
+
+# Lotes de préstamos y devoluciones: todas las canastas de un lote tienen la misma fecha
+def registrar_historial(conn):
+    cursor = conn.cursor()
+    fecha = datetime(2024, 3, 1, 8, 0, 0)
+    for vuelta in range(3):
+        for vendedor, codigos in (('V1', ['C001', 'C002', 'C003']), ('V2', ['C004', 'C005']), ('V3', ['C006'])):
+            aplicar_movimientos(cursor, vendedor, 'Sale', [(codigo, 'Disponible') for codigo in codigos], fecha)
+            fecha += timedelta(hours=2)
+            aplicar_movimientos(cursor, vendedor, 'Entra', [(codigo, 'Prestada') for codigo in codigos], fecha)
+            fecha += timedelta(days=1)
+    conn.commit()
+
+def posicion(movimiento):
+    return movimiento[1], movimiento[0]
+
+def recorrer(cursor, filtros, por_pagina):
+    paginas = []
+    movimientos, hay_anterior, hay_siguiente = consultar_pagina_movimientos(cursor, filtros, por_pagina)
+    assert not hay_anterior
+    paginas.append(movimientos)
+    while hay_siguiente:
+        movimientos, hay_anterior, hay_siguiente = consultar_pagina_movimientos(
+            cursor, filtros, por_pagina, despues=posicion(paginas[-1][-1]))
+        assert hay_anterior
+        paginas.append(movimientos)
+
+    # De la última página hacia atrás se obtienen las mismas páginas
+    hacia_atras = [paginas[-1]]
+    while True:
+        movimientos, hay_anterior, hay_siguiente = consultar_pagina_movimientos(
+            cursor, filtros, por_pagina, antes=posicion(hacia_atras[0][0]))
+        assert hay_siguiente
+        hacia_atras.insert(0, movimientos)
+        if not hay_anterior:
+            break
+    return paginas, hacia_atras
+
+def test_paginas_hacia_adelante_y_hacia_atras(app):
+    with app.app_context():
+        conn = obtener_conexion()
+        registrar_historial(conn)
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM movimientos ORDER BY fecha DESC, id DESC')
+        todos = [fila[0] for fila in cursor.fetchall()]
+        assert len(todos) == 36
+
+        filtros = leer_filtros_movimientos({})
+        paginas, hacia_atras = recorrer(cursor, filtros, 5)
+        assert [movimiento[0] for pagina in paginas for movimiento in pagina] == todos
+        assert [len(pagina) for pagina in paginas] == [5] * 7 + [1]
+        # Hacia atrás la primera página puede quedar más corta, pero el orden y las filas son los mismos
+        assert [movimiento[0] for pagina in hacia_atras for movimiento in pagina] == todos
+
+def test_paginas_con_filtros(app):
+    with app.app_context():
+        conn = obtener_conexion()
+        registrar_historial(conn)
+        cursor = conn.cursor()
+        filtros = leer_filtros_movimientos({'vendedor': 'V1', 'tipo': 'Sale', 'fecha_desde': '2024-03-02',
+                                            'fecha_hasta': '2024-03-07'})
+        paginas, _ = recorrer(cursor, filtros, 2)
+        movimientos = [movimiento for pagina in paginas for movimiento in pagina]
+        assert [movimiento[4] for movimiento in movimientos] == ['C003', 'C002', 'C001'] * 2
+        assert all(movimiento[2] == 'Ana' and movimiento[3] == 'Sale' for movimiento in movimientos)
+        assert contar_movimientos(cursor, filtros) == (6, False)
+
+def test_ruta_con_posicion(app, cliente):
+    with app.app_context():
+        registrar_historial(obtener_conexion())
+    respuesta = cliente.get('/ver_movimientos?por_pagina=25')
+    assert respuesta.status_code == 200
+    respuesta = cliente.get('/ver_movimientos?por_pagina=25&despues=2024-03-05 08:00:00|15')
+    assert respuesta.status_code == 200
+    # Una posición mal formada muestra la primera página
+    assert cliente.get('/ver_movimientos?despues=no-es-posicion').status_code == 200
@@ -0,0 +1,40 @@
+# Informes PDF por lotes: las tablas se piden al generador a medida que se dibujan, así la
+# lista que recorre reportlab nunca tiene más de una tabla del informe
+import io
+import re
+
+from inventario import pdf
+
+def contar_paginas(contenido):
+    return len(re.findall(rb'/Type /Page\b', contenido))
+
+def test_informe_largo_se_arma_por_lotes(monkeypatch):
+    monkeypatch.setattr(pdf, 'FILAS_POR_TABLA_PDF', 100)
+    largos = []
+    handle_flowable = pdf.DocumentoPorLotes.handle_flowable
+
+    def registrar_largo(documento, flowables):
+        if flowables is documento.lote_actual:
+            largos.append(len(flowables))
+        handle_flowable(documento, flowables)
+    monkeypatch.setattr(pdf.DocumentoPorLotes, 'handle_flowable', registrar_largo)
+
+    leidas = []
+    def filas():
+        for i in range(1234):
+            leidas.append(i)
+            yield (i, f'Canasta {i}', None)
+
+    salida = io.BytesIO()
+    pdf.generar_pdf(salida, 'Prueba', ['Número', 'Nombre', 'Vacío'], filas())
+    contenido = salida.getvalue()
+    assert contenido.startswith(b'%PDF')
+    assert contar_paginas(contenido) > 30
+    assert len(leidas) == 1234
+    # Solo la tabla actual (y el resto de una tabla partida entre páginas) está en la lista
+    assert len(largos) > 13 and max(largos) <= 2
+
+def test_informe_sin_filas():
+    salida = io.BytesIO()
+    pdf.generar_pdf(salida, 'Vacío', ['A', 'B'], iter(()))
+    assert contar_paginas(salida.getvalue()) == 1
@@ -0,0 +1,22 @@
+# Los contadores del tablero y el resumen diario que se mantienen en cada escritura deben
+# coincidir con un recuento completo desde canastas y movimientos
+
+def escanear(cliente, vendedor, tipo, codigo):
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': vendedor, 'tipo': tipo, 'codigo_barras': codigo})
+    return respuesta.get_json()
+
+def test_prestamos_y_devoluciones_coinciden_con_recuento(cliente, estado, recuento):
+    for codigo in ('C001', 'C002', 'C003'):
+        assert escanear(cliente, 'Ana', 'Sale', codigo)['ok']
+    assert estado() == recuento()
+
+    assert escanear(cliente, 'Ana', 'Entra', 'C002')['ok']
+    assert estado() == recuento()
+
+    # Movimientos rechazados: ya prestada, devuelta por otro vendedor, no prestada
+    assert not escanear(cliente, 'Bruno', 'Sale', 'C001')['ok']
+    assert not escanear(cliente, 'Bruno', 'Entra', 'C003')['ok']
+    assert not escanear(cliente, 'Ana', 'Entra', 'C002')['ok']
+    assert estado() == recuento()
+    assert estado()['resumen_canastas'] == [('Disponible', 28), ('Prestada', 2)]
+    assert estado()['resumen_vendedores'] == [('V1', 2)]
@@ -0,0 +1,47 @@
+# Caché de los informes en segundo plano: el mismo informe sobre los mismos datos reutiliza el
+# trabajo; los informes que dependen de la fecha se generan otra vez al cambiar el día o las vencidas
+from datetime import date, datetime, timedelta
+
+from inventario import canastas, trabajos
+from inventario.db import obtener_conexion
+from inventario.resumen import aplicar_movimientos
+
+def id_trabajo(respuesta):
+    assert respuesta.status_code == 302
+    return respuesta.headers['Location'].rstrip('/').rsplit('/', 1)[-1]
+
+def test_mismo_informe_reutiliza_el_trabajo_hasta_que_cambian_los_datos(cliente, esperar_trabajo):
+    primero, estado = esperar_trabajo(cliente.get('/exportar_canastas'))
+    assert estado['estado'] == trabajos.TERMINADO
+    assert id_trabajo(cliente.get('/exportar_canastas')) == primero
+
+    cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Sale', 'codigo_barras': 'C001'})
+    assert id_trabajo(cliente.get('/exportar_canastas')) != primero
+
+def test_informe_por_fecha_cambia_con_el_dia_y_con_las_vencidas(app, cliente, monkeypatch):
+    with app.app_context():
+        conn = obtener_conexion()
+        aplicar_movimientos(conn.cursor(), 'V1', 'Sale', [('C001', 'Disponible')], datetime.now() - timedelta(days=10))
+        conn.commit()
+    assert 'canastas_perdidas' in trabajos.INFORMES_POR_FECHA
+
+    primero = id_trabajo(cliente.get('/exportar_pdf_canastas_perdidas'))
+    assert id_trabajo(cliente.get('/exportar_pdf_canastas_perdidas')) == primero
+
+    # Otra canasta vence sin ningún movimiento nuevo: solo cambia la versión de las vencidas
+    with app.app_context():
+        conn = obtener_conexion()
+        conn.execute("UPDATE canastas SET actualidad = 'Prestada', vendedor_actual = 'V2', "
+                     "fecha_ultimo_movimiento = '2024-01-01 00:00:00', fecha_vencimiento = ? WHERE codigo_barras = 'C002'",
+                     ((datetime.now() - timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S'),))
+        conn.commit()
+    monkeypatch.setattr(canastas, 'ultimo_barrido_vencidas', None)
+    segundo = id_trabajo(cliente.get('/exportar_pdf_canastas_perdidas'))
+    assert segundo != primero
+
+    class Manana(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+    monkeypatch.setattr(trabajos, 'date', Manana)
+    assert id_trabajo(cliente.get('/exportar_pdf_canastas_perdidas')) not in (primero, segundo)
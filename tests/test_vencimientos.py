@@ -0,0 +1,87 @@
+# Barrido de canastas vencidas: las que pasaron los días permitidos entran en canastas_vencidas,
+# salen al devolverlas y el barrido no deja abierta la transacción de escritura
+import sqlite3
+from datetime import datetime, timedelta
+
+from inventario import canastas
+from inventario.db import obtener_conexion
+from inventario.resumen import aplicar_movimientos, leer_version
+from inventario.vencimientos import contar_vencidas, recalcular_vencimientos
+
+def prestar(app, vendedor, codigos, dias_atras):
+    with app.app_context():
+        conn = obtener_conexion()
+        fecha = datetime.now() - timedelta(days=dias_atras)
+        aplicar_movimientos(conn.cursor(), vendedor, 'Sale', [(codigo, 'Disponible') for codigo in codigos], fecha)
+        conn.commit()
+
+def barrer(app):
+    canastas.ultimo_barrido_vencidas = None
+    with app.app_context():
+        conn = obtener_conexion()
+        canastas.barrer_vencidas_si_corresponde(conn)
+        assert not conn.in_transaction
+        cursor = conn.cursor()
+        return contar_vencidas(cursor), leer_version(cursor), leer_version(cursor, 'vencidas')
+
+def test_barrido_marca_las_vencidas_y_la_devolucion_las_quita(app, cliente):
+    prestar(app, 'V1', ['C001', 'C002'], dias_atras=10)
+    prestar(app, 'V2', ['C003'], dias_atras=2)
+    _, version_tablero, version_vencidas = barrer(app)
+
+    # Un barrido sin cambios no incrementa ninguna versión
+    vencidas, tablero, vencidas_version = barrer(app)
+    assert vencidas == 2
+    assert (tablero, vencidas_version) == (version_tablero, version_vencidas)
+
+    respuesta = cliente.post('/api/movimientos', json={'vendedor': 'Ana', 'tipo': 'Entra', 'codigo_barras': 'C001'})
+    assert respuesta.get_json()['ok']
+    assert barrer(app)[0] == 1
+
+    # El barrido incremental y el recálculo completo dan el mismo conjunto
+    with app.app_context():
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute('SELECT codigo_barras FROM canastas_vencidas')
+        incremental = cursor.fetchall()
+        recalcular_vencimientos(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        cursor.execute('SELECT codigo_barras FROM canastas_vencidas')
+        assert cursor.fetchall() == incremental == [('C002',)]
+        conn.rollback()
+
+def test_barrido_sin_vencidas_libera_el_bloqueo_de_escritura(app):
+    prestar(app, 'V1', ['C001'], dias_atras=1)
+    assert barrer(app)[0] == 0
+
+    otra = sqlite3.connect(app.config['BASE_DATOS'], timeout=0)
+    try:
+        otra.execute('BEGIN IMMEDIATE')
+        otra.rollback()
+    finally:
+        otra.close()
+
+def test_canasta_fuera_de_servicio_no_vence(app):
+    with app.app_context():
+        conn = obtener_conexion()
+        conn.execute("UPDATE canastas SET actualidad = 'Fuera de servicio' WHERE codigo_barras = 'C004'")
+        conn.commit()
+    # La salida se registra, pero la canasta sigue fuera de servicio
+    with app.app_context():
+        conn = obtener_conexion()
+        fecha = datetime.now() - timedelta(days=10)
+        aplicar_movimientos(conn.cursor(), 'V1', 'Sale', [('C004', 'Fuera de servicio'), ('C005', 'Disponible')], fecha)
+        conn.commit()
+    assert barrer(app)[0] == 1
+
+    with app.app_context():
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute('SELECT codigo_barras, fecha_vencimiento IS NOT NULL FROM canastas WHERE codigo_barras IN (?, ?) ORDER BY 1',
+                       ('C004', 'C005'))
+        incremental = cursor.fetchall()
+        recalcular_vencimientos(cursor, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        cursor.execute('SELECT codigo_barras, fecha_vencimiento IS NOT NULL FROM canastas WHERE codigo_barras IN (?, ?) ORDER BY 1',
+                       ('C004', 'C005'))
+        assert cursor.fetchall() == incremental == [('C004', 0), ('C005', 1)]
+        assert contar_vencidas(cursor) == 1
+        conn.rollback()
@@ -0,0 +1,45 @@
+# Directorio de vendedores en memoria: los cambios en vendedores se ven en la siguiente petición
+import sqlite3
+
+from inventario import directorio
+from inventario.db import obtener_conexion
+
+def escanear(cliente, vendedor, codigo):
+    return cliente.post('/api/movimientos', json={'vendedor': vendedor, 'tipo': 'Sale', 'codigo_barras': codigo}).get_json()
+
+def test_directorio_se_lee_una_vez_por_version(app):
+    with app.app_context():
+        cursor = obtener_conexion().cursor()
+        primero = directorio.obtener_directorio(cursor)
+        assert directorio.obtener_directorio(cursor) is primero
+        assert directorio.nombres_vendedores(cursor) == ['Ana', 'Bruno', 'Carla']
+        assert directorio.codigo_vendedor(cursor, 'Bruno') == 'V2'
+        assert directorio.codigo_vendedor(cursor, 'Nadie') is None
+
+def test_altas_cambios_y_bajas_invalidan_el_directorio(cliente):
+    assert not escanear(cliente, 'Diana', 'C001')['ok']
+
+    cliente.post('/vendedores', data={'codigo': 'V4', 'nombre': 'Diana'})
+    assert escanear(cliente, 'Diana', 'C001')['ok']
+
+    cliente.post('/modificar_vendedor', data={'codigo': 'V4', 'nombre': 'Diana M.'})
+    assert not escanear(cliente, 'Diana', 'C002')['ok']
+    assert escanear(cliente, 'Diana M.', 'C002')['ok']
+
+    cliente.post('/eliminar_vendedor', data={'codigo': 'V2'})
+    assert not escanear(cliente, 'Bruno', 'C003')['ok']
+
+# Otro proceso que modifica los vendedores solo incrementa la versión en la base
+def test_cambio_hecho_por_otro_proceso(app, cliente):
+    assert escanear(cliente, 'Ana', 'C001')['ok']
+    otra = sqlite3.connect(app.config['BASE_DATOS'])
+    try:
+        otra.execute("UPDATE vendedores SET nombre = 'Ana B.' WHERE codigo = 'V1'")
+        otra.execute('''
+            INSERT INTO versiones (nombre, valor) VALUES ('vendedores', 1)
+            ON CONFLICT(nombre) DO UPDATE SET valor = valor + 1
+        ''')
+        otra.commit()
+    finally:
+        otra.close()
+    assert escanear(cliente, 'Ana B.', 'C002')['ok']
@@ -0,0 +1,21 @@
+# Punto de entrada WSGI para producción.
+#
+# Linux / Heroku:  gunicorn -c gunicorn.conf.py wsgi:app
+# Windows:         python wsgi.py   (sirve la aplicación con waitress)
+#
+# crear_app aplica las migraciones pendientes una sola vez; con preload_app en
+# gunicorn.conf.py esto ocurre en el proceso maestro, antes de crear los workers.
+import os
+
+from inventario import crear_app
+
+app = crear_app()
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    # waitress es un solo proceso con varios hilos: todas las estaciones comparten el pool de conexiones
+    serve(app,
+          host=os.getenv('HOST', '0.0.0.0'),
+          port=int(os.getenv('PORT', '8000')),
+          threads=int(os.getenv('WAITRESS_HILOS', '8')))